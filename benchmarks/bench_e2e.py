@@ -0,0 +1,58 @@
+"""
+End-to-end benchmark: runs src/main.py --online against the local stub server and
+reports wall time and records/sec for a few concurrency settings.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import harness
+from stub_server import StubServer
+
+def _run_main(inputs_path: str, output_dir: str, extra: List[str]) -> float:
+    cmd = [
+        sys.executable, os.path.join(harness.SRC, "main.py"),
+        "--online", "--inputs", inputs_path, "--output-dir", output_dir, "--formats", "jsonl",
+    ] + extra
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def run(quick: bool = False, latency: float = 0.05, urls: int = 0) -> List[Dict[str, Any]]:
+    count = urls or (40 if quick else 400)
+    # Throughput rows run unpaced; the last row shows the cost of the default per-host rate control
+    settings = [
+        ["--concurrency", "1", "--no-rate-control"],
+        ["--concurrency", "16", "--no-rate-control"],
+        ["--concurrency", "16", "--parse-workers", "4", "--no-rate-control"],
+        ["--concurrency", "16"],
+    ]
+    if quick:
+        settings = settings[1:2]
+    results: List[Dict[str, Any]] = []
+    with StubServer(latency=latency, size_kb=100 if quick else 300) as server, tempfile.TemporaryDirectory() as tmp:
+        inputs_path = os.path.join(tmp, "inputs.ndjson")
+        with open(inputs_path, "w", encoding="utf-8") as f:
+            for i in range(count):
+                f.write(json.dumps(f"{server.base_url}/profile/{i}") + "\n")
+        for extra in settings:
+            out_dir = tempfile.mkdtemp(dir=tmp)
+            wall = _run_main(inputs_path, out_dir, extra + ["--per-host", extra[1]])
+            name = "main.py[" + " ".join(extra) + f",{count} urls,{int(latency * 1000)}ms]"
+            print(f"{name:<48} wall {wall:8.2f} s   {count / wall:8.1f} records/s")
+            results.append({
+                "name": name,
+                "params": {"urls": count, "latency_s": latency, "args": extra},
+                "repeat": 1,
+                "number": 1,
+                "min_s": wall,
+                "median_s": wall,
+                "mean_s": wall,
+                "ops_per_s": count / wall,
+                "server_requests": server.requests,
+            })
+    return results
@@ -0,0 +1,79 @@
+"""Memory held by N export records: the plain dict layout vs. the slotted ProfileRecord."""
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List
+
+import harness  # noqa: F401  (puts src/ on sys.path)
+from outputs.records import ProfileRecord
+
+# One parsed profile as a parse worker hands it back; every copy gets fresh strings (as after unpickling)
+_TEMPLATE = json.dumps({
+    "name": "Person {i}",
+    "profileImage": "https://scontent.example.com/v/t39/{i}_profile.jpg",
+    "coverImage": "https://scontent.example.com/v/t39/{i}_cover.jpg",
+    "images": ["https://scontent.example.com/v/t39/{i}_profile.jpg", "https://scontent.example.com/v/t39/{i}_cover.jpg"],
+    "userId": "{i}",
+    "profileUrl": "https://www.facebook.com/profile.php?id={i}",
+    "userData": [
+        {"type": "work", "text": "Works at Company {i}", "icon": "https://static.xx.fbcdn.net/rsrc.php/v3/work.png"},
+        {"type": "education", "text": "Studied at School {i}", "icon": "https://static.xx.fbcdn.net/rsrc.php/v3/edu.png"},
+        {"type": "location", "text": "Lives in City {i}", "icon": None},
+    ],
+    "_source": "profileUrl",
+})
+
+def _parsed(n: int) -> Iterator[Dict[str, Any]]:
+    for i in range(n):
+        yield json.loads(_TEMPLATE.replace("{i}", str(i)))
+
+def _dict_record(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    # The layout build_result_record produced before ProfileRecord
+    return {
+        "name": parsed.get("name"),
+        "profileImage": parsed.get("profileImage"),
+        "coverImage": parsed.get("coverImage"),
+        "images": parsed.get("images", []),
+        "userId": parsed.get("userId"),
+        "profileUrl": parsed.get("profileUrl"),
+        "userData": parsed.get("userData", []),
+        "_fetchedAt": datetime.utcnow().isoformat() + "Z",
+        "_source": parsed.get("_source", "unknown"),
+    }
+
+def _profile_record(parsed: Dict[str, Any]) -> ProfileRecord:
+    return ProfileRecord(parsed, source=parsed.get("_source", "unknown"))
+
+def _measure_memory(name: str, build: Callable[[Dict[str, Any]], Any], n: int) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records: List[Any] = [build(p) for p in _parsed(n)]
+    elapsed = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    result = {
+        "name": name,
+        "params": {"records": n},
+        "repeat": 1,
+        "number": 1,
+        "min_s": elapsed,
+        "median_s": elapsed,
+        "mean_s": elapsed,
+        "ops_per_s": n / elapsed if elapsed > 0 else None,
+        "held_bytes": held,
+        "peak_bytes": peak,
+        "bytes_per_record": held / n,
+    }
+    print(f"{name:<48} {held / 2 ** 20:10.1f} MiB held   {held / n:8.0f} B/record   {elapsed:6.2f} s")
+    return result
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    n = 100_000 if quick else 1_000_000
+    return [
+        _measure_memory(f"record_memory[dict,{n}]", _dict_record, n),
+        _measure_memory(f"record_memory[ProfileRecord,{n}]", _profile_record, n),
+    ]
@@ -0,0 +1,104 @@
+"""Micro-benchmarks for the parser, work/education extraction, name search, bulk matching and every export format."""
+import shutil
+import tempfile
+from typing import Any, Dict, List
+
+import harness  # noqa: F401  (puts src/ on sys.path)
+from corpus import profile_html
+from bs4 import BeautifulSoup
+from extractors.bulk_matcher import MatchIndex
+from extractors.facebook_parser import FacebookParser
+from extractors.profile_matcher import ProfileMatcher
+from outputs.export_manager import ExportManager, STREAM_FORMATS
+
+def _records(n: int) -> List[Dict[str, Any]]:
+    parser = FacebookParser(engine="lxml")
+    base = parser.parse_profile_html(profile_html(1, size_kb=20, depth=4), base_url="https://www.facebook.com/profile.php?id=1")
+    out = []
+    for i in range(n):
+        rec = dict(base)
+        rec["userId"] = str(i)
+        rec["profileUrl"] = f"https://www.facebook.com/profile.php?id={i}"
+        rec["_fetchedAt"] = "2024-01-01T00:00:00Z"
+        rec["_source"] = "profileUrl"
+        out.append(rec)
+    return out
+
+def _match_profiles(n: int) -> List[Dict[str, Any]]:
+    # Names spread over a syllable alphabet, so blocks stay realistic as n grows
+    syllables = ["an", "be", "co", "da", "el", "fi", "go", "ha", "in", "jo", "ka", "lu", "mi", "no", "or", "pe", "ri", "sa", "tu", "vi"]
+    def word(i: int, length: int) -> str:
+        return "".join(syllables[(i // 20 ** k) % 20] for k in range(length)).title()
+    return [
+        {"name": f"{word(i * 7919, 3)} {word(i, 4)}", "userId": str(i),
+         "userData": [{"type": "work", "text": f"Works at Company {i % 500}", "icon": None}]}
+        for i in range(n)
+    ]
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    repeat = 3 if quick else 5
+    sizes = (50,) if quick else (50, 300, 800)
+    depths = (4,) if quick else (4, 16, 48)
+
+    for size in sizes:
+        for depth in depths:
+            html = profile_html(size * 31 + depth, size_kb=size, depth=depth)
+            params = {"size_kb": size, "depth": depth, "bytes": len(html)}
+            for engine in ("bs4", "lxml"):
+                parser = FacebookParser(engine=engine)
+                results.append(harness.measure(
+                    f"parse_profile_html[{engine},{size}KB,d{depth}]",
+                    lambda p=parser, h=html: p.parse_profile_html(h, base_url="https://www.facebook.com/profile.php?id=1"),
+                    repeat=repeat, params=dict(params, engine=engine),
+                ))
+            soup = BeautifulSoup(html, "html.parser")
+            parser = FacebookParser(engine="bs4")
+            results.append(harness.measure(
+                f"_extract_work_education[{size}KB,d{depth}]",
+                lambda p=parser, s=soup: p._extract_work_education(s),
+                repeat=repeat, params=params,
+            ))
+
+    matcher = ProfileMatcher(online=False)
+    online_matcher = ProfileMatcher(online=True, scrolls_amount=10)
+    results.append(harness.measure(
+        "search_profiles_by_name[offline]", lambda: matcher.search_profiles_by_name("Ada Lovelace", limit=3),
+        repeat=repeat, number=1000,
+    ))
+    results.append(harness.measure(
+        "search_profiles_by_name[paginated,10 scrolls]", lambda: online_matcher.search_profiles_by_name("Ada Lovelace", limit=3),
+        repeat=repeat, number=1000,
+    ))
+
+    n = 20000 if quick else 200000
+    index = MatchIndex()
+    index.add_many(_match_profiles(n))
+    queries = [{"name": p["name"][:-1], "employer": "Company 7"} for p in _match_profiles(200)]
+    results.append(harness.measure(
+        f"MatchIndex.match[{'vectorized' if index.vectorized else 'python'},{n} profiles]",
+        lambda: [index.match(q, k=3) for q in queries],
+        repeat=repeat, params={"profiles": n, "queries": len(queries)},
+    ))
+
+    n = 2000 if quick else 20000
+    items = _records(n)
+    tmp = tempfile.mkdtemp(prefix="bench-export-")
+    try:
+        exporter = ExportManager(tmp)
+        batch = {
+            "json": lambda: exporter.export_json(items, "batch.json"),
+            "csv": lambda: exporter.export_csv(items, "batch.csv"),
+            "xml": lambda: exporter.export_xml(items, "batch.xml", root_tag="users", item_tag="user"),
+            "jsonl": lambda: exporter.export_jsonl(items, "batch.jsonl"),
+        }
+        for fmt, fn in batch.items():
+            results.append(harness.measure(f"export[{fmt},batch,{n}]", fn, repeat=repeat, params={"records": n}))
+        for fmt in STREAM_FORMATS:
+            def stream(fmt=fmt):
+                with exporter.open_writer(fmt, f"stream.{fmt}") as w:
+                    w.write_many(items)
+            results.append(harness.measure(f"export[{fmt},stream,{n}]", stream, repeat=repeat, params={"records": n}))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
@@ -0,0 +1,71 @@
+"""
+Deterministic synthetic Facebook-like profile pages for benchmarks.
+
+Every document is a function of (seed, size, depth): the same arguments always give the
+same HTML, so timings are comparable across commits and machines.
+"""
+import json
+import random
+from typing import Dict, Iterator, List, Sequence
+
+FIRST = ["Ada", "Grace", "Alan", "Mark", "Linus", "Margaret", "Dennis", "Barbara", "Ken", "Radia"]
+LAST = ["Lovelace", "Hopper", "Turing", "Zuckerberg", "Torvalds", "Hamilton", "Ritchie", "Liskov", "Thompson", "Perlman"]
+EMPLOYERS = ["Example Corp", "Acme Inc", "Initech", "Globex", "Umbrella Labs", "Hooli"]
+SCHOOLS = ["Example University", "State College", "Central High School", "Tech Institute"]
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua").split()
+
+SIZES_KB = (50, 300, 800)
+DEPTHS = (4, 16, 48)
+
+def profile_html(seed: int, size_kb: int = 300, depth: int = 16) -> str:
+    """One profile page of roughly `size_kb` KB whose filler content is nested `depth` divs deep."""
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+    user_id = 100000000 + seed
+    head = (
+        f"<head><title>{name} - Facebook</title>"
+        f'<meta property="og:title" content="{name}"/>'
+        f'<meta property="og:image" content="https://cdn.example.com/p/{seed}.jpg"/>'
+        f'<meta property="og:url" content="https://www.facebook.com/profile.php?id={user_id}"/>'
+        f'<script>window.__data = {{"entity_id":"{user_id}"}};</script></head>'
+    )
+    about = (
+        f'<div data-imgperflogname="profileCoverPhoto"><img src="https://cdn.example.com/c/{seed}.jpg"/></div>'
+        f"<h1>{name}</h1><ul>"
+        f"<li>Works at {rng.choice(EMPLOYERS)}</li>"
+        f"<li>Worked at {rng.choice(EMPLOYERS)}</li>"
+        f"<li>Studied Computer Science at {rng.choice(SCHOOLS)}</li></ul>"
+    )
+    parts: List[str] = [f"<html>{head}<body>{about}"]
+    target = size_kb * 1024
+    length = sum(len(p) for p in parts)
+    block = 0
+    while length < target:
+        opening = "".join(f'<div class="x{block % 7} d{d}">' for d in range(depth))
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40)))
+        inner = f"<span>{text}</span><img src=\"https://cdn.example.com/i/{seed}/{block}.jpg\"/>"
+        if block % 25 == 0:
+            inner += "<img src=\"https://static.example.com/sprite.gif\"/>"
+        chunk = opening + inner + "</div>" * depth
+        parts.append(chunk)
+        length += len(chunk)
+        block += 1
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def corpus(count: int, sizes_kb: Sequence[int] = SIZES_KB, depths: Sequence[int] = DEPTHS) -> Iterator[Dict[str, str]]:
+    """`count` documents cycling through sizes and depths, shaped like inputs' embeddedHtmlProfiles."""
+    for i in range(count):
+        size = sizes_kb[i % len(sizes_kb)]
+        depth = depths[(i // len(sizes_kb)) % len(depths)]
+        yield {
+            "baseUrl": f"https://www.facebook.com/profile.php?id={100000000 + i}",
+            "html": profile_html(i, size_kb=size, depth=depth),
+        }
+
+def write_inputs(path: str, count: int, sizes_kb: Sequence[int] = SIZES_KB, depths: Sequence[int] = DEPTHS) -> str:
+    """Writes an inputs JSON document whose embeddedHtmlProfiles is the synthetic corpus."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"profileUrls": [], "names": [], "embeddedHtmlProfiles": list(corpus(count, sizes_kb, depths))}, f)
+    return path
@@ -0,0 +1,91 @@
+"""
+Timing helpers and the machine-readable results format shared by all benchmarks.
+
+Results file (JSON):
+  {"meta": {"commit", "python", "platform", "timestamp"},
+   "results": [{"name", "params", "repeat", "number", "min_s", "median_s", "mean_s", "ops_per_s", ...extra}]}
+Timings are per operation (one call of the benchmarked function).
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    repeat: int = 5,
+    number: int = 1,
+    params: Optional[Dict[str, Any]] = None,
+    **extra: Any,
+) -> Dict[str, Any]:
+    """Runs fn `number` times per sample for `repeat` samples (after one warm-up call)."""
+    fn()
+    samples: List[float] = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        for _ in range(max(1, number)):
+            fn()
+        samples.append((time.perf_counter() - start) / max(1, number))
+    result = {
+        "name": name,
+        "params": params or {},
+        "repeat": repeat,
+        "number": number,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "ops_per_s": 1.0 / min(samples) if min(samples) > 0 else None,
+    }
+    result.update(extra)
+    print(f"{name:<48} median {result['median_s'] * 1000:10.3f} ms   min {result['min_s'] * 1000:10.3f} ms")
+    return result
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(path: str, results: List[Dict[str, Any]]) -> str:
+    doc = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    return path
+
+def compare(baseline_path: str, current_path: str, threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    Per-benchmark median ratio current/baseline. Entries slower by more than `threshold`
+    are flagged as regressions.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = {r["name"]: r for r in json.load(f)["results"]}
+    with open(current_path, "r", encoding="utf-8") as f:
+        current = json.load(f)["results"]
+    rows = []
+    for r in current:
+        b = base.get(r["name"])
+        if not b or not b.get("median_s"):
+            continue
+        ratio = r["median_s"] / b["median_s"]
+        rows.append({"name": r["name"], "baseline_s": b["median_s"], "current_s": r["median_s"], "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
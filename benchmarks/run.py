@@ -0,0 +1,50 @@
+"""
+Runs the benchmark suite and writes machine-readable results.
+
+    python benchmarks/run.py --out bench.json                 # everything
+    python benchmarks/run.py --only micro --quick             # fast subset
+    python benchmarks/run.py --out new.json --compare old.json --fail-threshold 0.1
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import harness  # noqa: E402
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Scraper benchmark suite.")
+    parser.add_argument("--out", default="bench_results.json", help="Results JSON path. Defaults to bench_results.json")
+    parser.add_argument("--only", choices=["micro", "e2e", "memory"], default=None, help="Run just one group.")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer repeats.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub server latency per request (seconds) for e2e.")
+    parser.add_argument("--urls", type=int, default=0, help="Profile URLs fetched per e2e run.")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against.")
+    parser.add_argument("--fail-threshold", type=float, default=0.10, help="Relative slowdown counted as a regression.")
+    args = parser.parse_args()
+
+    results = []
+    if args.only in (None, "micro"):
+        import bench_micro
+        results.extend(bench_micro.run(quick=args.quick))
+    if args.only in (None, "e2e"):
+        import bench_e2e
+        results.extend(bench_e2e.run(quick=args.quick, latency=args.latency, urls=args.urls))
+    if args.only in (None, "memory"):
+        import bench_memory
+        results.extend(bench_memory.run(quick=args.quick))
+    harness.save_results(args.out, results)
+    print(f"Wrote {len(results)} results to {args.out}")
+
+    if args.compare:
+        rows = harness.compare(args.compare, args.out, threshold=args.fail_threshold)
+        for row in rows:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['name']:<48} x{row['ratio']:6.2f}{flag}")
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Local HTTP stand-in for profile pages, for end-to-end benchmarks without the network.
+
+Any GET path returns a synthetic profile (see corpus.profile_html) seeded from the path,
+after an artificial delay of `latency` seconds (plus up to `jitter`).
+"""
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from corpus import profile_html
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Streamed fetches hang up mid-body on purpose (FacebookParser stream/max_bytes)
+        pass
+
+class StubServer:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, size_kb: int = 300, depth: int = 16, port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.size_kb = size_kb
+        self.depth = depth
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._pages = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                delay = server.latency + (random.random() * server.jitter if server.jitter else 0.0)
+                if delay:
+                    time.sleep(delay)
+                body = server._page(self.path)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = _QuietServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _page(self, path: str) -> bytes:
+        seed = zlib.crc32(path.encode("utf-8"))
+        with self._lock:
+            body = self._pages.get(seed)
+        if body is None:
+            body = profile_html(seed, size_kb=self.size_kb, depth=self.depth).encode("utf-8")
+            with self._lock:
+                self._pages[seed] = body
+        return body
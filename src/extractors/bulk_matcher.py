@@ -0,0 +1,310 @@
+import csv
+import heapq
+import json
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .metrics import METRICS
+from .url_canonicalizer import canonicalize_profile_url
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+NGRAM_SIZE = 3
+# userData text prefixes in front of the employer/school name ("Works at Acme" -> "Acme")
+AFFILIATION_PREFIX_RE = re.compile(
+    r"^(?:works? at|worked at|studie[sd] at|studied|went to|founder (?:of|at)|ceo (?:of|at))\s+", re.IGNORECASE
+)
+# CRM columns read_crm_rows understands; anything else in a row is ignored
+CRM_COLUMNS = ("id", "name", "userId", "profileUrl", "employer", "school")
+# One output row per (CRM row, match)
+MATCH_COLUMNS = ["crmId", "rank", "score", "nameScore", "affiliationScore", "idMatch", "name", "profileUrl", "userId"]
+
+# Score weights: name n-gram Dice / name token Jaccard / employer+school token Jaccard
+NAME_WEIGHT, TOKEN_WEIGHT, AFFILIATION_WEIGHT = 0.6, 0.2, 0.2
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lowercase ASCII-folded words separated by single spaces ("Zoë O'Brien" -> "zoe o brien")."""
+    if not text:
+        return ""
+    folded = unicodedata.normalize("NFKD", str(text))
+    folded = "".join(c for c in folded if not unicodedata.combining(c)).lower()
+    return " ".join(re.findall(r"[a-z0-9]+", folded))
+
+def char_ngrams(normalized: str, n: int = NGRAM_SIZE) -> Set[str]:
+    padded = f" {normalized} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))} if normalized else set()
+
+def affiliations(record: Dict[str, Any]) -> Set[str]:
+    """Normalized employer/school names: CRM employer/school columns, or the work/education entries of userData."""
+    names = [record.get("employer"), record.get("school")]
+    for entry in record.get("userData") or ():
+        if isinstance(entry, dict) and entry.get("type") in ("work", "education"):
+            names.append(AFFILIATION_PREFIX_RE.sub("", (entry.get("text") or "").strip()))
+    return {n for n in map(normalize_text, names) if n}
+
+def match_keys(record: Dict[str, Any]) -> Tuple[Set[str], Set[str], Set[str], Set[str], Set[str]]:
+    """
+    (name n-grams, name tokens, affiliation words, affiliation keys, id keys) of a scraped
+    record or CRM row. Affiliation keys are "a:<employer or school>"; id keys are
+    "u:<userId>" and "p:<canonical profile URL key>", the latter only for URLs that
+    name a profile (id: or vanity: keys; see canonicalize_profile_url).
+    """
+    name = normalize_text(record.get("name"))
+    affs = affiliations(record)
+    ids = set()
+    if record.get("userId"):
+        ids.add(f"u:{record['userId']}")
+    if record.get("profileUrl"):
+        url_key = canonicalize_profile_url(record["profileUrl"])[0]
+        if url_key.startswith(("id:", "vanity:")):
+            ids.add("p:" + url_key)
+    words = {w for a in affs for w in a.split()}
+    return char_ngrams(name), set(name.split()), words, {"a:" + a for a in affs}, ids
+
+def read_crm_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """CRM rows from CSV (header row), JSON Lines or a JSON array; rows without an "id" get their 1-based row number."""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if ext == "csv":
+            rows: Iterable[Dict[str, Any]] = csv.DictReader(f)
+        elif ext in ("jsonl", "ndjson"):
+            rows = (json.loads(line) for line in f if line.strip())
+        elif ext == "json":
+            rows = json.load(f)
+        else:
+            raise ValueError(f"Unsupported CRM file '{path}'; expected .csv, .jsonl/.ndjson or .json")
+        for number, row in enumerate(rows, start=1):
+            out = {k: row.get(k) or None for k in CRM_COLUMNS}
+            out["id"] = out["id"] or str(number)
+            yield out
+
+class _Feature:
+    """One set-valued feature of every indexed profile, stored CSR-style: ids[ptr[i]:ptr[i + 1]]."""
+
+    def __init__(self):
+        self.ptr = array("I", [0])
+        self.ids = array("I")
+        self.np_ptr = None
+        self.np_ids = None
+
+    def append(self, ids: Iterable[int]) -> None:
+        self.ids.extend(sorted(ids))
+        self.ptr.append(len(self.ids))
+
+    def size(self, i: int) -> int:
+        return self.ptr[i + 1] - self.ptr[i]
+
+    def shared(self, i: int, query: Set[int]) -> int:
+        return sum(1 for t in self.ids[self.ptr[i]:self.ptr[i + 1]] if t in query)
+
+    def freeze(self) -> None:
+        self.np_ptr = _np_ints(self.ptr)
+        self.np_ids = _np_ints(self.ids)
+
+    def np_shared(self, cands: Any, query: Any) -> Tuple[Any, Any]:
+        # (shared ids with `query`, set size) per candidate, without a Python loop
+        starts = self.np_ptr[cands]
+        sizes = self.np_ptr[cands + 1] - starts
+        total = int(sizes.sum())
+        if total == 0 or not len(query):
+            return np.zeros(len(cands)), sizes
+        seg = np.repeat(np.arange(len(cands)), sizes)
+        offsets = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        hits = np.isin(self.np_ids[np.repeat(starts, sizes) + offsets], query)
+        return np.bincount(seg, weights=hits, minlength=len(cands)), sizes
+
+class MatchIndex:
+    """
+    Blocking index for matching many CRM rows against scraped profiles without
+    comparing every pair. Each profile is filed under its blocking keys:
+      - the character n-grams and the tokens of its normalized name
+      - "u:<userId>" and "p:<canonical profile URL>"
+      - "a:<employer or school>" taken from the work/education entries of userData
+    A query is scored only against profiles that share a key with it. Keys filed under
+    more than `max_block` profiles (" jo", "son", a large employer) count towards scores
+    but don't pull in candidates, unless the name has nothing rarer, in which case its
+    rarest token is used. Past `max_candidates`, only the profiles that share the most
+    keys are scored.
+    Score = 0.6 x name n-gram Dice + 0.2 x name token Jaccard + 0.2 x employer/school
+    word Jaccard (name terms rescaled to 1.0 when either side has no affiliations);
+    a userId or profile URL match scores 1.0. Scoring runs vectorized over the candidate
+    block when numpy is installed, and in plain Python otherwise (same results).
+    """
+
+    def __init__(self, max_block: int = 2000, max_candidates: int = 500, vectorized: Optional[bool] = None):
+        if vectorized and np is None:
+            raise ValueError("vectorized matching requires numpy.")
+        self.max_block = max(1, int(max_block))
+        self.max_candidates = max(1, int(max_candidates))
+        self.vectorized = np is not None if vectorized is None else vectorized
+        self.profiles: List[Dict[str, Any]] = []
+        self._vocab: Dict[str, int] = {}
+        self._postings: Dict[int, array] = {}
+        self._grams = _Feature()
+        self._tokens = _Feature()
+        self._words = _Feature()
+        self._frozen = False
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def add(self, record: Dict[str, Any]) -> int:
+        """Indexes one scraped record; returns its profile number."""
+        idx = len(self.profiles)
+        grams, tokens, words, affs, ids = match_keys(record)
+        self.profiles.append({k: record.get(k) for k in ("name", "profileUrl", "userId")})
+        gram_ids = [self._term("g:" + g) for g in grams]
+        token_ids = [self._term("t:" + t) for t in tokens]
+        self._grams.append(gram_ids)
+        self._tokens.append(token_ids)
+        self._words.append(self._term("w:" + w) for w in words)
+        for term in (*gram_ids, *token_ids, *(self._term(k) for k in affs | ids)):
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = array("I")
+            posting.append(idx)
+        self._frozen = False
+        return idx
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        for record in records:
+            self.add(record)
+        return len(self.profiles)
+
+    def match(self, query: Dict[str, Any], k: int = 3, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Top-`k` profiles for one CRM row (name, userId, profileUrl, employer, school),
+        best first, as {"profile", "score", "nameScore", "affiliationScore", "idMatch"}
+        where "profile" is the profile number (see self.profiles).
+        """
+        grams, tokens, words, affs, ids = match_keys(query)
+        q_grams = self._known("g:" + g for g in grams)
+        q_tokens = self._known("t:" + t for t in tokens)
+        q_words = self._known("w:" + w for w in words)
+        q_exact = sorted(self._known(ids))
+        sizes = (len(grams), len(tokens), len(words))
+        keys = sorted(q_grams | q_tokens | self._known(affs))
+        blocking = [t for t in keys if len(self._postings[t]) <= self.max_block]
+        if not blocking and q_tokens:
+            # Only common keys ("john smith"): block on the rarest name token anyway
+            blocking = [min(sorted(q_tokens), key=lambda t: len(self._postings[t]))]
+        blocking += q_exact
+        METRICS.inc("match_queries_total")
+        if self.vectorized:
+            matches = self._match_numpy(blocking, q_exact, (q_grams, q_tokens, q_words), sizes, k, min_score)
+        else:
+            matches = self._match_python(blocking, q_exact, (q_grams, q_tokens, q_words), sizes, k, min_score)
+        if not matches:
+            METRICS.inc("match_unmatched_total")
+        return matches
+
+    def match_many(
+        self, queries: Iterable[Dict[str, Any]], k: int = 3, min_score: float = 0.0
+    ) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        for query in queries:
+            yield query, self.match(query, k=k, min_score=min_score)
+
+    # -------------------- helpers --------------------
+
+    def _term(self, key: str) -> int:
+        term = self._vocab.get(key)
+        if term is None:
+            term = self._vocab[key] = len(self._vocab)
+        return term
+
+    def _known(self, keys: Iterable[str]) -> Set[int]:
+        return {self._vocab[k] for k in keys if k in self._vocab}
+
+    def _freeze(self) -> None:
+        if not self._frozen:
+            for feature in (self._grams, self._tokens, self._words):
+                feature.freeze()
+            self._frozen = True
+
+    def _match_python(self, blocking, q_exact, queries, sizes, k, min_score) -> List[Dict[str, Any]]:
+        counts = Counter()
+        for term in blocking:
+            counts.update(self._postings[term])
+        exact_hits = {i for term in q_exact for i in self._postings[term]}
+        cands = [i for i, _n in heapq.nsmallest(self.max_candidates, counts.items(), key=lambda kv: (-kv[1], kv[0]))]
+        cands = sorted(set(cands) | exact_hits)
+        METRICS.inc("match_candidates_total", len(cands))
+        q_grams, q_tokens, q_words = queries
+        scored = []
+        for i in cands:
+            shared_g = self._grams.shared(i, q_grams)
+            shared_t = self._tokens.shared(i, q_tokens)
+            shared_w = self._words.shared(i, q_words)
+            size_g, size_t, size_w = self._grams.size(i), self._tokens.size(i), self._words.size(i)
+            name = 2 * shared_g / (sizes[0] + size_g) if sizes[0] + size_g else 0.0
+            token = shared_t / (sizes[1] + size_t - shared_t) if sizes[1] + size_t - shared_t else 0.0
+            has_aff = sizes[2] > 0 and size_w > 0
+            aff = shared_w / (sizes[2] + size_w - shared_w) if has_aff else 0.0
+            if has_aff:
+                score = NAME_WEIGHT * name + TOKEN_WEIGHT * token + AFFILIATION_WEIGHT * aff
+            else:
+                score = (NAME_WEIGHT * name + TOKEN_WEIGHT * token) / (NAME_WEIGHT + TOKEN_WEIGHT)
+            if i in exact_hits:
+                score = 1.0
+            if score >= min_score:
+                scored.append((score, i, name, aff if has_aff else None, i in exact_hits))
+        best = heapq.nsmallest(k, scored, key=lambda s: (-s[0], s[1]))
+        return [_match(*s) for s in best]
+
+    def _match_numpy(self, blocking, q_exact, queries, sizes, k, min_score) -> List[Dict[str, Any]]:
+        self._freeze()
+        if not blocking:
+            return []
+        cands, counts = np.unique(np.concatenate([_np_ints(self._postings[t]) for t in blocking]), return_counts=True)
+        exact_hits = np.unique(np.concatenate([_np_ints(self._postings[t]) for t in q_exact])) if q_exact else cands[:0]
+        if len(cands) > self.max_candidates:
+            keep = np.lexsort((cands, -counts))[:self.max_candidates]
+            cands = np.union1d(cands[keep], exact_hits)
+        METRICS.inc("match_candidates_total", len(cands))
+        q_grams, q_tokens, q_words = (np.fromiter(q, dtype=np.int64, count=len(q)) for q in queries)
+        shared_g, size_g = self._grams.np_shared(cands, q_grams)
+        shared_t, size_t = self._tokens.np_shared(cands, q_tokens)
+        shared_w, size_w = self._words.np_shared(cands, q_words)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            name = np.where(sizes[0] + size_g > 0, 2 * shared_g / (sizes[0] + size_g), 0.0)
+            token_union = sizes[1] + size_t - shared_t
+            token = np.where(token_union > 0, shared_t / token_union, 0.0)
+            has_aff = (sizes[2] > 0) & (size_w > 0)
+            aff = np.where(has_aff, shared_w / (sizes[2] + size_w - shared_w), 0.0)
+        score = np.where(
+            has_aff,
+            NAME_WEIGHT * name + TOKEN_WEIGHT * token + AFFILIATION_WEIGHT * aff,
+            (NAME_WEIGHT * name + TOKEN_WEIGHT * token) / (NAME_WEIGHT + TOKEN_WEIGHT),
+        )
+        is_exact = np.isin(cands, exact_hits)
+        score = np.where(is_exact, 1.0, score)
+        ok = np.nonzero(score >= min_score)[0]
+        if len(ok) > k:
+            # Everything tied with the k-th best score stays in, so ties break by profile number below
+            kth = -np.partition(-score[ok], k - 1)[k - 1]
+            ok = ok[score[ok] >= kth]
+        ok = ok[np.lexsort((cands[ok], -score[ok]))][:k]
+        return [
+            _match(float(score[j]), int(cands[j]), float(name[j]), float(aff[j]) if has_aff[j] else None, bool(is_exact[j]))
+            for j in ok
+        ]
+
+def _np_ints(values: array) -> Any:
+    # Copy out of the array's buffer, so the array can keep growing
+    return np.frombuffer(values, dtype=np.uint32).astype(np.int64)
+
+def _match(score: float, profile: int, name: float, aff: Optional[float], exact: bool) -> Dict[str, Any]:
+    return {
+        "profile": profile,
+        "score": round(score, 4),
+        "nameScore": round(name, 4),
+        "affiliationScore": None if aff is None else round(aff, 4),
+        "idMatch": exact,
+    }
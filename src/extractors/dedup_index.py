@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import Optional
+
+# Rough per-entry overhead of a str in a Python set (hash table slot + object header)
+SET_ENTRY_OVERHEAD = 80
+
+class SqliteKeySet:
+    """A set of strings kept in a temporary SQLite file; exact, and bounded only by disk."""
+
+    def __init__(self, directory: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(prefix="dedup-", suffix=".sqlite3", dir=directory)
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE keys (key TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._count = 0
+
+    def add(self, key: str) -> bool:
+        cur = self._conn.execute("INSERT OR IGNORE INTO keys (key) VALUES (?)", (key,))
+        added = cur.rowcount == 1
+        self._count += added
+        return added
+
+    def __contains__(self, key: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM keys WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._conn.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over `num_bits` bits. Membership can report false positives
+    (a new key seen as a duplicate) at roughly `error_rate` once `capacity` keys are added;
+    it never reports false negatives.
+    """
+
+    def __init__(self, num_bits: int, capacity: int):
+        self.num_bits = max(8, int(num_bits))
+        self.num_hashes = max(1, round(self.num_bits / max(1, capacity) * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    @property
+    def error_rate(self) -> float:
+        return (1 - math.exp(-self.num_hashes * max(1, self._count) / self.num_bits)) ** self.num_hashes
+
+    def add(self, key: str) -> bool:
+        added = False
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        self._count += added
+        return added
+
+    def __contains__(self, key: str) -> bool:
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        pass
+
+    def _positions(self, key: str):
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+class DedupIndex:
+    """
+    Set of seen profile keys that starts as an in-memory set and, once its estimated
+    footprint passes `memory_budget` bytes, moves to a spill backend:
+      - "sqlite": an exact disk-backed set in a temp file under `directory`
+      - "bloom":  a Bloom filter using the memory budget as its bit array, sized for
+                  `capacity` keys (may drop a small fraction of new keys as false duplicates)
+    add() returns True for keys not seen before.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = 256 * 1024 * 1024,
+        spill: str = "sqlite",
+        directory: Optional[str] = None,
+        capacity: int = 10_000_000,
+    ):
+        if spill not in ("sqlite", "bloom"):
+            raise ValueError(f"Unknown dedup spill backend '{spill}'; expected sqlite or bloom.")
+        self.memory_budget = max(0, int(memory_budget))
+        self.spill = spill
+        self.directory = directory
+        self.capacity = max(1, int(capacity))
+        self._keys = set()
+        self._estimated = 0
+        self._backend = None
+
+    def add(self, key: str) -> bool:
+        if self._backend is not None:
+            return self._backend.add(key)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        self._estimated += sys.getsizeof(key) + SET_ENTRY_OVERHEAD
+        if self._estimated > self.memory_budget:
+            self._spill()
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        if self._backend is not None:
+            return key in self._backend
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._backend) if self._backend is not None else len(self._keys)
+
+    @property
+    def backend(self) -> str:
+        return self.spill if self._backend is not None else "memory"
+
+    def close(self) -> None:
+        if self._backend is not None:
+            self._backend.close()
+
+    def _spill(self) -> None:
+        if self.spill == "bloom":
+            backend = BloomFilter(num_bits=self.memory_budget * 8, capacity=max(self.capacity, len(self._keys) * 2))
+        else:
+            backend = SqliteKeySet(self.directory)
+        for key in self._keys:
+            backend.add(key)
+        logging.info("Dedup index passed its memory budget at %d keys; spilled to %s", len(self._keys), self.spill)
+        self._backend = backend
+        self._keys = set()
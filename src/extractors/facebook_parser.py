@@ -1,30 +1,130 @@
+import codecs
 import logging
 import re
-from typing import Dict, List, Optional
+import threading
+from bisect import bisect_left
+from html import escape as html_escape
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
 from urllib.parse import urlparse, parse_qs
 
-try:
-    import requests
-except Exception:  # pragma: no cover
-    requests = None
+from .fetch_pool import DEFAULT_HEADERS
+from .lazy_import import lazy_import
+from .metrics import METRICS
+from .stable_hash import stable_int
 
-from bs4 import BeautifulSoup
+if TYPE_CHECKING:  # pragma: no cover
+    from bs4 import BeautifulSoup
+
+# bs4, lxml and requests are imported on first use (see lazy_import)
+
+PARSE_ENGINES = ("bs4", "lxml")
+
+# Record fields in output order; FacebookParser(fields=...) extracts a subset of them
+RECORD_FIELDS = ("name", "profileImage", "coverImage", "images", "userId", "profileUrl", "userData")
+# Fields that <head> meta tags (or the URL) can answer, enabling the head-only fast path
+HEAD_FIELDS = {"name", "profileImage", "userId", "profileUrl"}
+
+HEAD_END_RE = re.compile(r"</head\s*>", re.IGNORECASE)
+CDATA_RE = re.compile(r"<!\[CDATA\[(.*?)\]\]>", re.DOTALL)
 
 OG_IMAGE_KEYS = {"og:image", "og:image:url"}
 OG_TITLE_KEYS = {"og:title"}
 OG_URL_KEYS = {"og:url", "al:ios:url", "al:android:url"}
 
+WORK_KEYWORDS = ["works at", "worked at", "founder", "ceo"]
+USER_DATA_KEYWORDS = WORK_KEYWORDS + ["studied", "education", "university", "college", "high school"]
+USER_DATA_TAGS = {"li", "div", "span"}
+
+# Text nodes BeautifulSoup leaves out of get_text(); the lxml engine mirrors this.
+NON_TEXT_TAGS = {"script", "style", "rt", "rp"}
+# iterwalk only reports comments and processing instructions (whose tails are text) when asked
+TEXT_WALK_EVENTS = ("start", "end", "comment", "pi")
+
+def extract_user_id(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    try:
+        parsed = urlparse(url)
+        # profile.php?id=4
+        qs = parse_qs(parsed.query)
+        if "id" in qs and len(qs["id"]) > 0:
+            return qs["id"][0]
+        # /zuck or /mark.zuckerberg.94 -> cannot guarantee numeric
+        # Return last path segment if numeric-like
+        last = parsed.path.strip("/").split("/")[-1]
+        if last.isdigit():
+            return last
+    except Exception:
+        return None
+    return None
+
+def normalize_fields(fields: Union[None, str, Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """'name,userId' or an iterable of names -> those fields in RECORD_FIELDS order; None/''/'all' -> None (every field)."""
+    if fields is None:
+        return None
+    names = [f.strip() for f in (fields.split(",") if isinstance(fields, str) else fields) if f and f.strip()]
+    if not names or names == ["all"]:
+        return None
+    unknown = [f for f in names if f not in RECORD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s) {', '.join(unknown)}; expected any of {', '.join(RECORD_FIELDS)}.")
+    return tuple(f for f in RECORD_FIELDS if f in names)
+
 class FacebookParser:
     """
     Parses *public* Facebook profile HTML into a normalized record.
     Supports:
       - Parsing from URL (online mode required).
       - Parsing from HTML string (offline-safe; used by tests and demo).
+    Engines:
+      - "bs4": BeautifulSoup with the pure-Python html.parser backend (default).
+      - "lxml": a single lxml document walk producing the same record, much faster on large pages.
+    Projection:
+      - fields=("name", "userId", ...) returns only those keys and skips the other extractors
+      - when only HEAD_FIELDS are requested, just the <head> section is parsed; the full
+        document is parsed only if a field is missing there (e.g. a name that needs <h1>)
+    Streaming (online):
+      - with stream=True the body is read in `chunk_size` pieces; for a HEAD_FIELDS
+        projection the connection is closed as soon as </head> arrives and yields every field
+      - max_bytes caps how much of one document is read (implies streaming); the parse then
+        runs on the truncated document
+      - partial bodies are never written to the response cache
+    With a `scheduler` (rate_control.RequestScheduler), every request is paced per host and
+    429/5xx responses and connection errors are retried.
     """
 
-    def __init__(self, online: bool = False, timeout: int = 15):
+    def __init__(
+        self,
+        online: bool = False,
+        timeout: int = 15,
+        engine: str = "bs4",
+        session=None,
+        cache=None,
+        fields: Union[None, str, Iterable[str]] = None,
+        stream: bool = False,
+        max_bytes: Optional[int] = None,
+        chunk_size: int = 16 * 1024,
+        scheduler=None,
+    ):
+        if engine not in PARSE_ENGINES:
+            raise ValueError(f"Unknown parse engine '{engine}'; expected one of {', '.join(PARSE_ENGINES)}.")
+        if engine == "lxml" and lazy_import("lxml.html") is None:
+            raise RuntimeError("lxml not available; cannot use the lxml parse engine.")
         self.online = online
         self.timeout = timeout
+        self.engine = engine
+        # Optional shared requests.Session (see fetch_pool.make_session) for keep-alive reuse
+        self.session = session
+        # Optional http_cache.ResponseCache; fetched pages are stored and revalidated through it
+        self.cache = cache
+        self.fields = normalize_fields(fields)
+        self._wanted = set(self.fields or RECORD_FIELDS)
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.stream = bool(stream) or self.max_bytes is not None
+        self.chunk_size = max(1, int(chunk_size))
+        self.scheduler = scheduler
+        # Per fetch thread: (url, body, record) of the last page closed early after </head>
+        self._head_parse = threading.local()
 
     def parse_profile_from_url(self, url: str) -> Dict:
         if not self.online:
@@ -32,35 +132,91 @@ class FacebookParser:
             logging.info("Offline mode: synthesizing profile for %s", url)
             return self._synthesize_offline(url)
 
+        html = self.fetch_html(url)
+        record = self.take_head_record(url, html)
+        return record if record is not None else self.parse_profile_html(html, base_url=url)
+
+    def fetch_html(self, url: str) -> str:
+        requests = lazy_import("requests")
         if requests is None:
             raise RuntimeError("requests not available; cannot fetch in online mode.")
+        http = self.session or requests
+        headers = dict(DEFAULT_HEADERS)
+        entry = self.cache.get(url) if self.cache is not None else None
+        if entry is not None:
+            if self.cache.is_fresh(entry):
+                METRICS.inc("cache_requests_total", labels={"result": "hit"})
+                return entry["body"]
+            headers.update(self.cache.conditional_headers(entry))
+        elif self.cache is not None:
+            METRICS.inc("cache_requests_total", labels={"result": "miss"})
+        def send():
+            if not self.stream:
+                return http.get(url, headers=headers, timeout=self.timeout)
+            return http.get(url, headers=headers, timeout=self.timeout, stream=True)
 
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        resp = requests.get(url, headers=headers, timeout=self.timeout)
-        resp.raise_for_status()
-        return self.parse_profile_html(resp.text, base_url=url)
+        with METRICS.timer("fetch_seconds"):
+            resp = self.scheduler.request(url, send) if self.scheduler is not None else send()
+            METRICS.inc("fetch_responses_total", labels={"status": resp.status_code})
+            if entry is not None and resp.status_code == 304:
+                METRICS.inc("cache_requests_total", labels={"result": "revalidated"})
+                self.cache.revalidated(url, entry)
+                return entry["body"]
+            resp.raise_for_status()
+            if self.stream:
+                body, complete, head_record = self._read_streamed(resp, url)
+            else:
+                METRICS.inc("bytes_downloaded_total", len(resp.content))
+                body, complete, head_record = resp.text, True, None
+        self._head_parse.last = (url, body, head_record) if head_record is not None else None
+        if self.cache is not None and complete:
+            self.cache.put(url, body, etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"))
+        return body
+
+    def take_head_record(self, url: str, html: str) -> Optional[Dict]:
+        """
+        The record this thread's last fetch_html(url) already parsed from <head> before
+        closing the connection early, if `html` is that body; else None (parse it instead).
+        """
+        last = getattr(self._head_parse, "last", None)
+        if last is None or last[0] != url or last[1] is not html:
+            return None
+        self._head_parse.last = None
+        METRICS.inc("parse_head_only_total")
+        return last[2]
 
     def parse_profile_html(self, html: str, base_url: Optional[str] = None) -> Dict:
-        soup = BeautifulSoup(html, "html.parser")
+        with METRICS.timer("parse_seconds", labels={"engine": self.engine}):
+            if self.fields is not None and self._wanted <= HEAD_FIELDS:
+                record = self._parse_head_only(html, base_url)
+                if record is not None:
+                    METRICS.inc("parse_head_only_total")
+                    return record
+            if self.engine == "lxml":
+                return self._parse_profile_html_lxml(html, base_url=base_url)
+            return self._parse_profile_html_bs4(html, base_url=base_url)
+
+    def _parse_profile_html_bs4(self, html: str, base_url: Optional[str] = None) -> Dict:
+        bs4 = lazy_import("bs4")
+        if bs4 is None:
+            raise RuntimeError("bs4 not available; cannot use the bs4 parse engine.")
+        soup = bs4.BeautifulSoup(html, "html.parser")
+        want = self._wanted
 
         # Name heuristics: prefer og:title, otherwise title, otherwise fallback from h1
-        name = self._first_meta(soup, OG_TITLE_KEYS) or (soup.title.string.strip() if soup.title else None)
-        if not name:
-            h1 = soup.find("h1")
-            name = h1.get_text(strip=True) if h1 else None
+        name = None
+        if "name" in want:
+            name = self._first_meta(soup, OG_TITLE_KEYS) or (soup.title.string.strip() if soup.title else None)
+            if not name:
+                h1 = soup.find("h1")
+                name = h1.get_text(strip=True) if h1 else None
 
         # Profile and cover image heuristics via og:image and common selectors
-        profile_image = self._first_meta(soup, OG_IMAGE_KEYS)
+        profile_image = self._first_meta(soup, OG_IMAGE_KEYS) if "profileImage" in want else None
         cover_image = None
         # Look for cover image by heuristic class names seen on public profiles
-        for selector in ["image.cover", "img.cover", "[data-imgperflogname='profileCoverPhoto'] img", "img[alt*='cover']"]:
+        cover_selectors = ["image.cover", "img.cover", "[data-imgperflogname='profileCoverPhoto'] img", "img[alt*='cover']"]
+        for selector in cover_selectors if "coverImage" in want else ():
             el = soup.select_one(selector)
             if el and el.get("src"):
                 cover_image = el["src"]
@@ -68,23 +224,24 @@ class FacebookParser:
 
         # Images gallery: a selection of <img> sources excluding sprites
         images: List[str] = []
-        for img in soup.find_all("img"):
+        for img in soup.find_all("img") if "images" in want else ():
             src = img.get("src")
             if src and not any(ext in src for ext in [".gif", "sprite"]):
                 images.append(src)
         images = list(dict.fromkeys(images))[:25]  # unique, limit
 
         # User ID: try URL patterns, data attributes, and common meta tags
-        user_id = self._extract_user_id(base_url) or self._extract_user_id_from_soup(soup)
+        user_id = None
+        if "userId" in want:
+            user_id = self._extract_user_id(base_url) or self._extract_user_id_from_soup(soup)
 
         profile_url = (
-            self._first_meta(soup, OG_URL_KEYS)
-            or base_url
-        )
+            self._first_meta(soup, OG_URL_KEYS) if "profileUrl" in want else None
+        ) or base_url
 
-        user_data = self._extract_work_education(soup)
+        user_data = self._extract_work_education(soup) if "userData" in want else []
 
-        return {
+        return self._project({
             "name": name,
             "profileImage": profile_image,
             "coverImage": cover_image,
@@ -92,11 +249,82 @@ class FacebookParser:
             "userId": user_id,
             "profileUrl": profile_url,
             "userData": user_data,
-        }
+        })
 
     # -------------------- helpers --------------------
 
-    def _first_meta(self, soup: BeautifulSoup, keys: set) -> Optional[str]:
+    def _project(self, record: Dict) -> Dict:
+        if self.fields is None:
+            return record
+        return {k: record[k] for k in self.fields}
+
+    def _parse_head_only(self, html: str, base_url: Optional[str]) -> Optional[Dict]:
+        """
+        Fast path for HEAD_FIELDS projections: parses the document up to </head>. Returns
+        None, so the caller parses the whole document, if there is no </head> or any
+        requested field is missing from it (so results match a full parse).
+        """
+        m = HEAD_END_RE.search(html) if html else None
+        if m is None:
+            return None
+        head = html[:m.end()] + "</html>"
+        if self.engine == "lxml":
+            record = self._parse_profile_html_lxml(head, base_url=base_url)
+        else:
+            record = self._parse_profile_html_bs4(head, base_url=base_url)
+        if any(not record[k] for k in self.fields):
+            return None
+        return record
+
+    def _read_streamed(self, resp, url: str) -> Tuple[str, bool, Optional[Dict]]:
+        """
+        Reads a stream=True response chunk by chunk; returns (text, complete, head record).
+        Reading stops early once the <head> alone answers a HEAD_FIELDS projection (the
+        record parsed from it is returned, so it needn't be parsed again), or at max_bytes.
+        """
+        decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+        parts: List[str] = []
+        received = 0
+        # Only a head-only projection can finish before the end of the document
+        watch_head = self.fields is not None and self._wanted <= HEAD_FIELDS
+        # </head> is searched for in each new piece plus the tail of the text before it,
+        # in case the tag spans chunks; `length` is the decoded length before the piece
+        tail = ""
+        length = 0
+        record = None
+        complete = True
+        try:
+            for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                received += len(chunk)
+                piece = decoder.decode(chunk)
+                parts.append(piece)
+                if watch_head:
+                    window = tail + piece
+                    m = HEAD_END_RE.search(window)
+                    if m is not None:
+                        watch_head = False
+                        head = "".join(parts)[:length - len(tail) + m.end()]
+                        record = self._parse_head_only(head, url)
+                        if record is not None:
+                            METRICS.inc("fetch_early_close_total")
+                            complete = False
+                            break
+                    tail = window[-16:]
+                    length += len(piece)
+                if self.max_bytes is not None and received >= self.max_bytes:
+                    logging.warning("Truncated %s at %d bytes (max_bytes)", url, received)
+                    METRICS.inc("fetch_truncated_total")
+                    complete = False
+                    break
+            if complete:
+                parts.append(decoder.decode(b"", final=True))
+        finally:
+            # Closing a partly read response drops the connection instead of draining the body
+            resp.close()
+            METRICS.inc("bytes_downloaded_total", received)
+        return "".join(parts), complete, record
+
+    def _first_meta(self, soup: "BeautifulSoup", keys: set) -> Optional[str]:
         for k in keys:
             meta = soup.find("meta", property=k) or soup.find("meta", attrs={"name": k})
             if meta and meta.get("content"):
@@ -104,24 +332,9 @@ class FacebookParser:
         return None
 
     def _extract_user_id(self, url: Optional[str]) -> Optional[str]:
-        if not url:
-            return None
-        try:
-            parsed = urlparse(url)
-            # profile.php?id=4
-            qs = parse_qs(parsed.query)
-            if "id" in qs and len(qs["id"]) > 0:
-                return qs["id"][0]
-            # /zuck or /mark.zuckerberg.94 -> cannot guarantee numeric
-            # Return last path segment if numeric-like
-            last = parsed.path.strip("/").split("/")[-1]
-            if last.isdigit():
-                return last
-        except Exception:
-            return None
-        return None
+        return extract_user_id(url)
 
-    def _extract_user_id_from_soup(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_user_id_from_soup(self, soup: "BeautifulSoup") -> Optional[str]:
         # Look for "entity_id":"<digits>"
         m = re.search(r'"entity_id"\s*:\s*"(\d+)"', soup.text)
         if m:
@@ -132,7 +345,7 @@ class FacebookParser:
             return m.group(1)
         return None
 
-    def _extract_work_education(self, soup: BeautifulSoup) -> List[Dict]:
+    def _extract_work_education(self, soup: "BeautifulSoup") -> List[Dict]:
         user_data: List[Dict] = []
         # Simple heuristics: scan list items with known keywords
         for li in soup.find_all(["li", "div", "span"]):
@@ -140,16 +353,198 @@ class FacebookParser:
             if not txt:
                 continue
             lowered = txt.lower()
-            if any(k in lowered for k in ["works at", "worked at", "founder", "ceo", "studied", "education", "university", "college", "high school"]):
-                user_data.append({
-                    "type": "work" if any(k in lowered for k in ["works at", "worked at", "founder", "ceo"]) else "education",
-                    "text": txt,
-                    "icon": None,
-                })
+            if any(k in lowered for k in USER_DATA_KEYWORDS):
+                user_data.append(self._user_data_item(txt, lowered))
             if len(user_data) >= 20:
                 break
         return user_data
 
+    def _user_data_item(self, txt: str, lowered: str) -> Dict:
+        return {
+            "type": "work" if any(k in lowered for k in WORK_KEYWORDS) else "education",
+            "text": txt,
+            "icon": None,
+        }
+
+    # -------------------- lxml engine --------------------
+
+    def _parse_profile_html_lxml(self, html: str, base_url: Optional[str] = None) -> Dict:
+        """
+        Mirrors the BeautifulSoup heuristics above, but gathers every field in one
+        iterwalk over the lxml tree instead of re-scanning the document per field.
+        """
+        metas: Dict[tuple, object] = {}   # ("property"|"name", key) -> first matching <meta>
+        title = None
+        h1 = None
+        covers: List = [None] * 4         # first element matching each cover selector, in selector order
+        images: List[str] = []
+        raw_texts: List[str] = []         # every visible text node, as soup.text would see it
+        texts: List[str] = []             # stripped, non-empty text nodes, as get_text(strip=True) sees them
+        spans: List[List] = []            # [first text index, end text index) per li/div/span, in document order
+        open_spans: List[List] = []      # stack of spans whose element is still open
+        cover_scope = 0                   # open ancestors carrying data-imgperflogname=profileCoverPhoto
+        template_depth = 0
+        want = self._wanted
+        base_user_id = self._extract_user_id(base_url) if "userId" in want else None
+        # Text is only gathered for userData, or for the entity_id scan when the URL has no id
+        need_text = "userData" in want or ("userId" in want and not base_user_id)
+        need_images = "images" in want
+        need_covers = "coverImage" in want
+        need_spans = "userData" in want
+
+        def add_text(value: Optional[str]) -> None:
+            if value and need_text and not template_depth:
+                raw_texts.append(value)
+                stripped = value.strip()
+                if stripped:
+                    texts.append(stripped)
+
+        lxml_etree = lazy_import("lxml.etree")
+        if html and "<![CDATA[" in html:
+            # libxml2's HTML parser drops CDATA sections; html.parser keeps their content as text
+            html = CDATA_RE.sub(lambda m: html_escape(m.group(1), quote=False), html)
+        root = lazy_import("lxml.html").document_fromstring(html) if html and html.strip() else None
+        walk = lxml_etree.iterwalk(root, events=TEXT_WALK_EVENTS) if root is not None else ()
+        for event, el in walk:
+            if event in ("comment", "pi"):
+                # Comments and processing instructions: only their tail is document text
+                add_text(el.tail)
+                continue
+            tag = el.tag
+            if event == "start":
+                if tag == "meta":
+                    for attr in ("property", "name"):
+                        key = (attr, el.get(attr))
+                        if key[1] is not None and key not in metas:
+                            metas[key] = el
+                elif tag == "title" and title is None:
+                    title = el
+                elif tag == "h1" and h1 is None:
+                    h1 = el
+                elif tag in ("img", "image") and (need_images or need_covers):
+                    classes = (el.get("class") or "").split()
+                    if tag == "image" and "cover" in classes and covers[0] is None:
+                        covers[0] = el
+                    if tag == "img":
+                        if "cover" in classes and covers[1] is None:
+                            covers[1] = el
+                        if cover_scope and covers[2] is None:
+                            covers[2] = el
+                        if "cover" in (el.get("alt") or "") and covers[3] is None:
+                            covers[3] = el
+                        src = el.get("src") if need_images else None
+                        if src and not any(ext in src for ext in [".gif", "sprite"]):
+                            images.append(src)
+                if el.get("data-imgperflogname") == "profileCoverPhoto":
+                    cover_scope += 1
+                if need_spans and tag in USER_DATA_TAGS:
+                    span = [len(texts), None]
+                    spans.append(span)
+                    open_spans.append(span)
+                if tag == "template":
+                    template_depth += 1
+                if tag not in NON_TEXT_TAGS:
+                    add_text(el.text)
+            else:
+                if tag == "template":
+                    template_depth -= 1
+                if el.get("data-imgperflogname") == "profileCoverPhoto":
+                    cover_scope -= 1
+                if need_spans and tag in USER_DATA_TAGS:
+                    open_spans.pop()[1] = len(texts)
+                add_text(el.tail)
+
+        def first_meta(keys: set) -> Optional[str]:
+            for k in keys:
+                meta = metas.get(("property", k))
+                if meta is None:
+                    meta = metas.get(("name", k))
+                if meta is not None and meta.get("content"):
+                    return meta.get("content").strip()
+            return None
+
+        name = None
+        if "name" in want:
+            name = first_meta(OG_TITLE_KEYS) or ((title.text or "").strip() if title is not None else None)
+            if not name:
+                name = "".join(self._element_texts(h1)) if h1 is not None else None
+
+        cover_image = None
+        for el in covers:
+            if el is not None and el.get("src"):
+                cover_image = el.get("src")
+                break
+
+        user_id = base_user_id
+        if not user_id and "userId" in want:
+            doc_text = "".join(raw_texts)
+            m = re.search(r'"entity_id"\s*:\s*"(\d+)"', doc_text) or re.search(r'entity_id["\']\s*:\s*["\'](\d+)["\']', doc_text)
+            user_id = m.group(1) if m else None
+
+        return self._project({
+            "name": name,
+            "profileImage": first_meta(OG_IMAGE_KEYS) if "profileImage" in want else None,
+            "coverImage": cover_image,
+            "images": list(dict.fromkeys(images))[:25],
+            "userId": user_id,
+            "profileUrl": (first_meta(OG_URL_KEYS) if "profileUrl" in want else None) or base_url,
+            "userData": self._user_data_from_spans(texts, spans) if need_spans else [],
+        })
+
+    def _element_texts(self, el) -> List[str]:
+        # get_text(strip=True) over a single (small) element, e.g. the first <h1>
+        out: List[str] = []
+        for event, node in lazy_import("lxml.etree").iterwalk(el, events=TEXT_WALK_EVENTS):
+            if event == "start" and node.tag not in NON_TEXT_TAGS and node.text:
+                out.append(node.text.strip())
+            if event != "start" and node is not el and node.tail:
+                out.append(node.tail.strip())
+        return [t for t in out if t]
+
+    def _user_data_from_spans(self, texts: List[str], spans: List[List]) -> List[Dict]:
+        """
+        Keyword test for every li/div/span without materializing each subtree's text:
+        the document text is joined once and each element is a [start, end) window into it,
+        so nested divs cost a bisect per keyword instead of a full get_text().
+        """
+        joined = " ".join(texts)
+        lowered = joined.lower()
+        if len(lowered) != len(joined):
+            # Case folding changed offsets (rare non-ASCII); fall back to per-element lowering
+            lowered = None
+        offsets: List[int] = []
+        pos = 0
+        for t in texts:
+            offsets.append(pos)
+            pos += len(t) + 1
+        offsets.append(pos)
+        hits: Dict[str, List[int]] = {}
+        if lowered is not None:
+            for k in USER_DATA_KEYWORDS:
+                hits[k] = [m.start() for m in re.finditer(re.escape(k), lowered)]
+
+        user_data: List[Dict] = []
+        for first, end in spans:
+            if end is None or end <= first:
+                continue
+            lo, hi = offsets[first], offsets[end] - 1
+            if lowered is not None:
+                matched = False
+                for k, positions in hits.items():
+                    i = bisect_left(positions, lo)
+                    if i < len(positions) and positions[i] + len(k) <= hi:
+                        matched = True
+                        break
+                if not matched:
+                    continue
+            txt = joined[lo:hi]
+            low = txt.lower()
+            if any(k in low for k in USER_DATA_KEYWORDS):
+                user_data.append(self._user_data_item(txt, low))
+                if len(user_data) >= 20:
+                    break
+        return user_data
+
     def _synthesize_offline(self, url: str) -> Dict:
         """
         Deterministic, offline-safe profile record derived from the URL shape.
@@ -161,9 +556,9 @@ class FacebookParser:
         # Fake images derived from a well-formed placeholder service
         base_img = "https://placehold.co/600x400/png"
         name_guess = last.replace(".", " ").replace("-", " ").title() if last and last != "profile.php" else "Facebook User"
-        user_id = self._extract_user_id(url) or str(abs(hash(url)) % 10_000_000)
+        user_id = self._extract_user_id(url) or str(stable_int(url, 10_000_000))
 
-        return {
+        return self._project({
             "name": name_guess,
             "profileImage": f"{base_img}?text={name_guess}+Profile",
             "coverImage": f"{base_img}?text={name_guess}+Cover",
@@ -174,4 +569,4 @@ class FacebookParser:
                 {"type": "work", "text": f"Works at Example Corp ({name_guess})", "icon": None},
                 {"type": "education", "text": "Studied Computer Science at Example University", "icon": None},
             ],
-        }
\ No newline at end of file
+        })
\ No newline at end of file
@@ -0,0 +1,143 @@
+import math
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .lazy_import import lazy_import
+from .metrics import METRICS
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+def make_session(pool_size: int = 10):
+    """
+    A keep-alive requests.Session whose connection pool is sized for `pool_size`
+    concurrent requests, so worker threads reuse sockets instead of reconnecting.
+    """
+    requests = lazy_import("requests")
+    if requests is None:
+        raise RuntimeError("requests not available; cannot create an HTTP session.")
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+# How often a dispatcher with nothing running re-asks a gate that is full with other callers' requests
+GATE_POLL_SECONDS = 0.05
+
+class FetchPool:
+    """
+    Runs a per-URL job (typically FacebookParser.parse_profile_from_url) on a thread pool.
+      - At most `concurrency` jobs run at once, and at most `per_host` of them target the same host.
+      - The per-host cap is applied before a job reaches the pool: a job whose host is at its cap
+        waits in the dispatcher (not in a pool thread), so threads stay free for other hosts.
+        Against a single host, the effective concurrency is min(concurrency, per_host).
+      - Jobs are pulled lazily from the input iterable, at most 4 x `concurrency` at a time
+        (running, waiting for their host, or finished but not yet yielded), so jobs for other
+        hosts can get past a run of jobs for a busy one.
+      - Results are yielded as soon as each job finishes, or in input order with `ordered`.
+      - With a `gate` (rate_control.RequestScheduler), a job is also held back until
+        gate.admit(url) grants its host's rate/concurrency slot, so pool threads never sit
+        in the token bucket; gate.finish(url) returns the slot if the job didn't use it.
+    """
+
+    def __init__(self, concurrency: int = 8, per_host: int = 4, ordered: bool = False, gate=None):
+        self.concurrency = max(1, int(concurrency))
+        self.per_host = max(1, int(per_host))
+        self.ordered = ordered
+        self.gate = gate
+
+    def run(
+        self,
+        jobs: Iterable[Tuple[str, Any]],
+        work: Callable[..., Any],
+        with_tag: bool = False,
+    ) -> Iterator[Tuple[str, Any, Optional[Any], Optional[BaseException]]]:
+        """
+        `jobs` yields (url, tag) pairs; the tag is passed through untouched, and also
+        handed to work as work(url, tag) when `with_tag` is set (else work(url)).
+        Yields (url, tag, result, error) with exactly one of result/error set.
+        """
+        jobs_iter = iter(jobs)
+        max_pending = self.concurrency * 4
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="fetch") as pool:
+            # Pulled jobs in input order, each [url, tag, host, future or None while waiting for a slot]
+            pending: Deque[List[Any]] = deque()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        url, tag = next(jobs_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append([url, tag, (urlparse(url).hostname or "").lower(), None])
+                gate_wait = self._dispatch(pool, pending, work, with_tag)
+                METRICS.set_gauge("fetch_queue_depth", len(pending))
+                if not pending:
+                    return
+                running = [entry[3] for entry in pending if entry[3] is not None and not entry[3].done()]
+                # Wake for the next finished job, or when the gate may admit a held-back one; with
+                # nothing of ours running, only someone else's request can free the gate: poll for it
+                timeout = gate_wait if not math.isinf(gate_wait) else (None if running else GATE_POLL_SECONDS)
+                if self.ordered:
+                    # The oldest job goes out first; others finishing meanwhile free slots for waiting jobs
+                    head = pending[0][3]
+                    if head is None or not head.done():
+                        wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    while pending and pending[0][3] is not None and pending[0][3].done():
+                        yield self._result(pending.popleft())
+                else:
+                    if running or timeout is not None:
+                        wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for entry in [e for e in pending if e[3] is not None and e[3].done()]:
+                        pending.remove(entry)
+                        yield self._result(entry)
+
+    # -------------------- helpers --------------------
+
+    def _dispatch(self, pool: ThreadPoolExecutor, pending: Deque[List[Any]], work: Callable[..., Any], with_tag: bool) -> float:
+        # Submits waiting jobs, oldest first, while both the pool and their host have a free slot
+        # (and the gate admits them); returns the seconds until the gate may admit a held-back job
+        busy: Dict[str, int] = {}
+        for entry in pending:
+            if entry[3] is not None and not entry[3].done():
+                busy[entry[2]] = busy.get(entry[2], 0) + 1
+        running = sum(busy.values())
+        gated: Dict[str, float] = {}  # hosts the gate held back this round; their later jobs wait too
+        for entry in pending:
+            if running >= self.concurrency:
+                break
+            if entry[3] is None and entry[2] not in gated and busy.get(entry[2], 0) < self.per_host:
+                url, tag = entry[0], entry[1]
+                if self.gate is not None:
+                    gate_wait = self.gate.admit(url)
+                    if gate_wait:
+                        gated[entry[2]] = gate_wait
+                        continue
+                entry[3] = pool.submit(self._call, work, (url, tag) if with_tag else (url,))
+                busy[entry[2]] = busy.get(entry[2], 0) + 1
+                running += 1
+        return min(gated.values(), default=math.inf)
+
+    def _call(self, work: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        # Runs in a pool thread; an admitted slot the job never used is returned before the job counts as done
+        try:
+            return work(*args)
+        finally:
+            if self.gate is not None:
+                self.gate.finish(args[0])
+
+    def _result(self, entry: List[Any]) -> Tuple[str, Any, Optional[Any], Optional[BaseException]]:
+        url, tag, _host, fut = entry
+        err = fut.exception()
+        return url, tag, (None if err else fut.result()), err
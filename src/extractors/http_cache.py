@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+def normalize_url(url: str) -> str:
+    """Cache key form of a URL: lower-cased scheme/host, sorted query, no fragment or trailing slash."""
+    parsed = urlparse(url.strip())
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, "", query, ""))
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of fetched profile pages.
+    Each entry is two files named by the sha256 of the normalized URL:
+      - <key>.body: the response text
+      - <key>.json: metadata (url, ETag, Last-Modified, when it was stored/validated, size)
+    Entries younger than `ttl` seconds are served as-is; older ones must be revalidated
+    with a conditional request. File mtimes track recency, and the least recently used
+    entries are evicted once the bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, ttl: float = 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._sizes: Dict[str, int] = self._scan()
+        self._total = sum(self._sizes.values())
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Returns the stored entry (metadata plus "body") or None. Use is_fresh() to decide on revalidation."""
+        key = self._key(url)
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(self._body_path(key), "r", encoding="utf-8") as f:
+                entry["body"] = f.read()
+        except (OSError, ValueError):
+            return None
+        self._touch(key)
+        return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry.get("validatedAt", 0) < self.ttl
+
+    def conditional_headers(self, entry: Dict) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+        return headers
+
+    def put(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        key = self._key(url)
+        data = body.encode("utf-8")
+        now = time.time()
+        meta = {
+            "url": url,
+            "etag": etag,
+            "lastModified": last_modified,
+            "storedAt": now,
+            "validatedAt": now,
+            "size": len(data),
+        }
+        self._write(self._body_path(key), data)
+        self._write(self._meta_path(key), json.dumps(meta).encode("utf-8"))
+        with self._lock:
+            self._total += len(data) - self._sizes.get(key, 0)
+            self._sizes[key] = len(data)
+        self._evict()
+
+    def revalidated(self, url: str, entry: Dict) -> None:
+        """Records a 304 Not Modified: the stored body is good for another TTL."""
+        meta = {k: v for k, v in entry.items() if k != "body"}
+        meta["validatedAt"] = time.time()
+        self._write(self._meta_path(self._key(url)), json.dumps(meta).encode("utf-8"))
+
+    # -------------------- helpers --------------------
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _touch(self, key: str) -> None:
+        try:
+            os.utime(self._body_path(key))
+        except OSError:
+            pass
+
+    def _scan(self) -> Dict[str, int]:
+        sizes: Dict[str, int] = {}
+        for fname in os.listdir(self.cache_dir):
+            if fname.endswith(".body"):
+                try:
+                    sizes[fname[:-5]] = os.path.getsize(os.path.join(self.cache_dir, fname))
+                except OSError:
+                    continue
+        return sizes
+
+    def _evict(self) -> None:
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return
+            by_age = []
+            for key in self._sizes:
+                try:
+                    by_age.append((os.path.getmtime(self._body_path(key)), key))
+                except OSError:
+                    by_age.append((0.0, key))
+            by_age.sort()
+            # Evict down to a low watermark so a full cache doesn't re-sort on every put
+            target = int(self.max_bytes * 0.9)
+            for _mtime, key in by_age:
+                if self._total <= target:
+                    break
+                for path in (self._body_path(key), self._meta_path(key)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._total -= self._sizes.pop(key, 0)
+                logging.debug("Evicted cache entry %s", key)
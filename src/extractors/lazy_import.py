@@ -0,0 +1,24 @@
+import importlib
+import threading
+from typing import Any, Dict
+
+_MODULES: Dict[str, Any] = {}
+_LOCK = threading.Lock()
+
+def lazy_import(name: str) -> Any:
+    """
+    Imports module `name` on first use and caches it; None if it is not installed.
+    Heavy third-party modules (bs4, lxml, requests) go through here so that importing
+    the extractors, and starting main.py, doesn't pay for them until they are needed.
+    """
+    try:
+        return _MODULES[name]
+    except KeyError:
+        pass
+    with _LOCK:
+        if name not in _MODULES:
+            try:
+                _MODULES[name] = importlib.import_module(name)
+            except Exception:  # pragma: no cover
+                _MODULES[name] = None
+        return _MODULES[name]
@@ -0,0 +1,7 @@
+# The process-wide METRICS registry, for the extractors' relative imports (from .metrics import METRICS).
+# telemetry is a sibling package: found directly when src/ is on sys.path (main.py, tests), or
+# relative to this package when it is imported as src.extractors.
+try:
+    from telemetry.metrics import METRICS  # noqa: F401
+except ImportError:  # pragma: no cover
+    from ..telemetry.metrics import METRICS  # noqa: F401
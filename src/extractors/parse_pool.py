@@ -0,0 +1,202 @@
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .facebook_parser import FacebookParser
+from .metrics import METRICS
+
+# Parser owned by each worker process, built once by the pool initializer
+_WORKER_PARSER: Optional[FacebookParser] = None
+
+# Smallest document that exercises a parser (and its lazily imported parse engine)
+WARM_UP_HTML = "<html><head><title>warm-up</title></head><body></body></html>"
+
+def _init_worker(engine: str, fields: Optional[Tuple[str, ...]] = None) -> None:
+    global _WORKER_PARSER
+    _WORKER_PARSER = FacebookParser(online=False, engine=engine, fields=fields)
+
+def _start_method() -> str:
+    # A forked child inherits every lock held by another thread at fork time, held forever
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+def _parse_batch(batch: List[Tuple[str, Optional[str]]]) -> List[Tuple[Optional[Dict], Optional[str], float]]:
+    # Errors travel back as strings (parser exceptions are not guaranteed to pickle), and
+    # parse times travel back so the parent's metrics see work done in worker processes
+    out: List[Tuple[Optional[Dict], Optional[str], float]] = []
+    for html, base_url in batch:
+        start = time.perf_counter()
+        try:
+            out.append((_WORKER_PARSER.parse_profile_html(html, base_url=base_url), None, time.perf_counter() - start))
+        except Exception as e:
+            out.append((None, f"{type(e).__name__}: {e}", time.perf_counter() - start))
+    return out
+
+class ParseError(Exception):
+    """A document failed to parse in a worker process."""
+
+class ParsePool:
+    """
+    CPU-bound parse stage, decoupled from network I/O. HTML documents are submitted with
+    an opaque tag and come back as (tag, record, error) from ready()/drain().
+      - workers <= 1, or the first `inline_below` documents of a run, are parsed in-process,
+        so small jobs never pay for starting worker processes
+      - beyond that, documents go to a ProcessPoolExecutor in batches of `batch_size`
+        to amortize pickling/IPC; a partial batch is sent early whenever workers are idle
+      - with `ordered`, results come out in submission order; otherwise as batches finish
+      - at most `max_inflight` batches (default 2 x workers) are queued or running; past
+        that, submit() waits for one to finish, so fetched HTML can't pile up in memory
+        when parsing is slower than fetching
+      - `fields` is the FacebookParser projection used in-process and in every worker
+      - workers are started with forkserver (spawn where that's unavailable), never a bare
+        fork: the pool starts mid-run, while fetch threads may hold locks such as METRICS'
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        engine: str = "lxml",
+        batch_size: int = 16,
+        ordered: bool = False,
+        inline_below: int = 32,
+        fields: Optional[Iterable[str]] = None,
+        max_inflight: Optional[int] = None,
+    ):
+        self.workers = max(0, int(workers))
+        self.max_inflight = max(1, int(max_inflight or 2 * self.workers))
+        self.engine = engine
+        self.batch_size = max(1, int(batch_size))
+        self.ordered = ordered
+        self.inline_below = max(0, int(inline_below))
+        self._parser = FacebookParser(online=False, engine=engine, fields=fields)
+        self.fields = self._parser.fields
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._submitted = 0
+        self._batch: List[Tuple[str, Optional[str]]] = []
+        self._batch_tags: List[Any] = []
+        # Each entry: (tags, future) for a worker batch, or (tags, results) parsed inline
+        self._inflight: Deque[Tuple[List[Any], Any]] = deque()
+
+    def submit(self, html: str, base_url: Optional[str], tag: Any) -> None:
+        self._submitted += 1
+        if self.workers <= 1 or self._submitted <= self.inline_below:
+            self._inflight.append(([tag], [self._parse_inline(html, base_url)]))
+            return
+        self._batch.append((html, base_url))
+        self._batch_tags.append(tag)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def ready(self) -> Iterator[Tuple[Any, Optional[Dict], Optional[Exception]]]:
+        """Yields every result that is already available, without blocking."""
+        if self._batch and self._busy_workers() < self.workers:
+            self._flush()
+        if self.ordered:
+            while self._inflight and self._is_done(self._inflight[0][1]):
+                yield from self._unpack(*self._inflight.popleft())
+        else:
+            for entry in [e for e in self._inflight if self._is_done(e[1])]:
+                self._inflight.remove(entry)
+                yield from self._unpack(*entry)
+
+    def drain(self) -> Iterator[Tuple[Any, Optional[Dict], Optional[Exception]]]:
+        """Sends any partial batch and yields all outstanding results, waiting as needed."""
+        self._flush()
+        while self._inflight:
+            yield from self._unpack(*self._inflight.popleft())
+
+    def warm_up(self) -> None:
+        """
+        Starts the worker processes now and has each one parse a tiny document, so the
+        first real batch doesn't pay for process start-up and parser imports.
+        """
+        self._parser.parse_profile_html(WARM_UP_HTML)
+        if self.workers > 1:
+            self._start_executor()
+            futures = [self._executor.submit(_parse_batch, [(WARM_UP_HTML, None)]) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -------------------- helpers --------------------
+
+    def _parse_inline(self, html: str, base_url: Optional[str]) -> Tuple[Optional[Dict], Optional[str], None]:
+        # The in-process parser records its own parse time, hence no duration here
+        try:
+            return self._parser.parse_profile_html(html, base_url=base_url), None, None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}", None
+
+    def _flush(self) -> None:
+        if not self._batch:
+            return
+        self._start_executor()
+        # Backpressure: finished batches hold only records; unfinished ones still hold their HTML
+        busy = [item for _tags, item in self._inflight if not self._is_done(item)]
+        while len(busy) >= self.max_inflight:
+            with METRICS.timer("parse_backpressure_seconds"):
+                wait(busy, return_when=FIRST_COMPLETED)
+            busy = [item for item in busy if not item.done()]
+        future = self._executor.submit(_parse_batch, self._batch)
+        self._inflight.append((self._batch_tags, future))
+        self._batch, self._batch_tags = [], []
+        METRICS.set_gauge("parse_queue_depth", sum(len(tags) for tags, _item in self._inflight))
+
+    def _start_executor(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(_start_method()),
+                initializer=_init_worker,
+                initargs=(self.engine, self.fields),
+            )
+
+    def _busy_workers(self) -> int:
+        return sum(1 for _tags, item in self._inflight if not self._is_done(item))
+
+    def _is_done(self, item: Any) -> bool:
+        return isinstance(item, list) or item.done()
+
+    def _unpack(self, tags: List[Any], item: Any) -> Iterator[Tuple[Any, Optional[Dict], Optional[Exception]]]:
+        try:
+            results = item if isinstance(item, list) else item.result()
+        except Exception as e:  # the worker process itself died
+            results = [(None, f"{type(e).__name__}: {e}", None)] * len(tags)
+        for tag, (record, err, seconds) in zip(tags, results):
+            if seconds is not None:
+                METRICS.observe("parse_seconds", seconds, labels={"engine": self.engine})
+            yield tag, record, (ParseError(err) if err else None)
+
+class ReorderBuffer:
+    """
+    Puts results that finish out of order back into sequence order: put(seq, item) for
+    seq = 0, 1, 2, ... (each exactly once, in any order) returns the items that are now
+    next in line, oldest first. Items wait here only while an earlier one is outstanding.
+    """
+
+    def __init__(self):
+        self._next = 0
+        self._held: Dict[int, Any] = {}
+
+    def put(self, seq: int, item: Any) -> List[Any]:
+        self._held[seq] = item
+        out = []
+        while self._next in self._held:
+            out.append(self._held.pop(self._next))
+            self._next += 1
+        METRICS.set_gauge("reorder_held", len(self._held))
+        return out
+
+    def __len__(self) -> int:
+        return len(self._held)
@@ -2,8 +2,15 @@ import logging
 import re
 from typing import Dict, List
 
+from .metrics import METRICS
+from .stable_hash import stable_int
 from .utils_scroll import ScrollPaginator
 
+def slugify(name: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9]+", ".", name.strip().lower())
+    slug = re.sub(r"\.+", ".", slug).strip(".")
+    return slug or "user"
+
 class ProfileMatcher:
     """
     Turns a human name into candidate public profile URLs.
@@ -12,11 +19,18 @@ class ProfileMatcher:
     and parse links, but that is intentionally avoided here to keep the tool runnable.
     """
 
-    def __init__(self, online: bool = False, scrolls_amount: int = 1):
+    def __init__(self, online: bool = False, scrolls_amount: int = 1, prefetch_pages: int = 0):
         self.online = online
         self.scrolls_amount = max(1, int(scrolls_amount))
+        self.prefetch_pages = max(0, int(prefetch_pages))
 
     def search_profiles_by_name(self, name: str, limit: int = 3) -> List[Dict]:
+        with METRICS.timer("search_seconds", labels={"mode": "online" if self.online else "offline"}):
+            candidates = self._search(name, limit)
+        METRICS.inc("search_candidates_total", len(candidates))
+        return candidates
+
+    def _search(self, name: str, limit: int) -> List[Dict]:
         name = name.strip()
         if not name:
             return []
@@ -32,28 +46,33 @@ class ProfileMatcher:
             ]
             return candidates[:limit]
 
-        # Online mode stub with paginator (extendable)
-        paginator = ScrollPaginator(fetch=lambda page: self._online_fetch_stub(name, page))
-        pages = paginator.collect_pages(self.scrolls_amount)
+        # Online mode stub with paginator (extendable). Pages are pulled lazily and the
+        # paginator stops (cancelling prefetches) as soon as `limit` candidates are found.
+        paginator = ScrollPaginator(
+            fetch=lambda page: self._online_fetch_stub(name, page),
+            prefetch=self.prefetch_pages,
+        )
         dedup = {}
-        for page in pages:
-            for url in page:
-                dedup[url] = {"name": name, "profileUrl": url}
+        pages = paginator.iter_pages(self.scrolls_amount)
+        try:
+            for page in pages:
+                for url in page:
+                    dedup[url] = {"name": name, "profileUrl": url}
+                    if len(dedup) >= limit:
+                        break
                 if len(dedup) >= limit:
                     break
-            if len(dedup) >= limit:
-                break
+        finally:
+            pages.close()
         return list(dedup.values())
 
     # -------------------- helpers --------------------
 
     def _slugify(self, name: str) -> str:
-        slug = re.sub(r"[^a-zA-Z0-9]+", ".", name.strip().lower())
-        slug = re.sub(r"\.+", ".", slug).strip(".")
-        return slug or "user"
+        return slugify(name)
 
     def _stable_id(self, name: str) -> int:
-        return abs(hash(f"fb::{name}")) % 100_000_000
+        return stable_int(f"fb::{name}", 100_000_000)
 
     def _online_fetch_stub(self, name: str, page: int) -> List[str]:
         # This stub intentionally avoids network usage. It produces plausible variations per page.
@@ -0,0 +1,340 @@
+import logging
+import math
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from .lazy_import import lazy_import
+from .metrics import METRICS
+
+# Statuses that mean "slow down" (shrink the host's rate) vs. ones that are merely retried
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# settings.json "rateControl" keys -> RequestScheduler arguments
+SETTINGS_KEYS = {
+    "initialRate": "initial_rate",
+    "minRate": "min_rate",
+    "maxRate": "max_rate",
+    "rateIncrease": "rate_increase",
+    "burst": "burst",
+    "initialConcurrency": "initial_concurrency",
+    "maxConcurrency": "max_concurrency",
+    "decreaseFactor": "decrease_factor",
+    "latencyFactor": "latency_factor",
+    "maxRetries": "max_retries",
+    "retryBudget": "retry_budget",
+    "backoffBaseSeconds": "backoff_base",
+    "backoffMaxSeconds": "backoff_max",
+    "maxRetryAfterSeconds": "max_retry_after",
+}
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Retry-After as seconds from now: either delta-seconds or an HTTP date. None if absent or unparsable."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+def retry_exceptions() -> Tuple[type, ...]:
+    """Connection errors worth retrying: requests' ConnectionError/Timeout, or OSError without requests."""
+    requests = lazy_import("requests")
+    return (requests.ConnectionError, requests.Timeout) if requests is not None else (OSError,)
+
+class HostLimiter:
+    """
+    Pacing for one host:
+      - a token bucket refilled at `rate` requests/second, holding up to `burst` tokens
+      - an AIMD concurrency limit: +1/limit per healthy response (about +1 per round of
+        requests), times `decrease_factor` on 429/503 or when smoothed latency exceeds
+        `latency_factor` x the host's baseline; the rate follows the same rule
+      - a pause until a Retry-After deadline, during which nothing is sent
+    Decreases are spaced at least one smoothed latency apart, so a burst of failures from
+    requests that were already in flight counts as one congestion signal.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        initial_rate: float,
+        min_rate: float,
+        max_rate: float,
+        rate_increase: float,
+        burst: float,
+        initial_concurrency: int,
+        max_concurrency: int,
+        decrease_factor: float,
+        latency_factor: float,
+    ):
+        self.host = host
+        self.rate = float(initial_rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.rate_increase = float(rate_increase)
+        self.burst = max(1.0, float(burst))
+        self.limit = float(max(1, initial_concurrency))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.decrease_factor = float(decrease_factor)
+        self.latency_factor = float(latency_factor)
+        self.inflight = 0
+        self.paused_until = 0.0
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._latency: Optional[float] = None   # EWMA of response latency
+        self._baseline: Optional[float] = None  # slow-moving floor of the latency
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Blocks until a request to this host may be sent."""
+        with self._cond:
+            while True:
+                timeout = self._take(time.monotonic())
+                if not timeout:
+                    return
+                self._cond.wait(None if math.isinf(timeout) else timeout)
+
+    def try_acquire(self) -> float:
+        """
+        acquire() without blocking: 0.0 once a request may be sent, else the seconds until
+        one might be (math.inf while the concurrency limit is reached: until a release()).
+        """
+        with self._cond:
+            return self._take(time.monotonic())
+
+    def cancel(self) -> None:
+        """Gives back a slot taken by acquire()/try_acquire() that no request was sent on."""
+        with self._cond:
+            self.inflight -= 1
+            self._tokens = min(self.burst, self._tokens + 1)
+            self._cond.notify_all()
+
+    def release(self, latency: Optional[float], throttled: bool = False, retry_after: Optional[float] = None) -> None:
+        """Reports the outcome of a request sent after acquire(); `latency` is None for failed requests."""
+        with self._cond:
+            self.inflight -= 1
+            now = time.monotonic()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            if throttled:
+                self._decrease(now, "throttled")
+            elif latency is not None:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                if self._baseline is None or latency < self._baseline:
+                    self._baseline = latency
+                else:
+                    self._baseline += (latency - self._baseline) * 0.01
+                if self._latency > self._baseline * self.latency_factor:
+                    self._decrease(now, "latency")
+                else:
+                    self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+                    self.rate = min(self.max_rate, self.rate + self.rate_increase / max(self.rate, 1.0))
+            METRICS.set_gauge("host_rate", round(self.rate, 3), labels={"host": self.host})
+            METRICS.set_gauge("host_concurrency_limit", int(self.limit), labels={"host": self.host})
+            self._cond.notify_all()
+
+    # -------------------- helpers --------------------
+
+    def _take(self, now: float) -> float:
+        # Takes a token and a concurrency slot (0.0), or says how long until that may be possible
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.inflight >= int(self.limit):
+            return math.inf
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        self._tokens -= 1
+        self.inflight += 1
+        return 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def _decrease(self, now: float, reason: str) -> None:
+        if now - self._last_decrease < max(1.0, self._latency or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit * self.decrease_factor)
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = min(self._tokens, 1.0)
+        # The raised latency is the new normal only if it persists; restart the average
+        self._latency = None
+        METRICS.inc("rate_decreases_total", labels={"host": self.host, "reason": reason})
+        logging.info("Slowing down %s (%s): %.2f req/s, %d concurrent", self.host, reason, self.rate, int(self.limit))
+
+class RetryBudget:
+    """Retries left for the whole job, shared by all threads; None means unlimited."""
+
+    def __init__(self, total: Optional[int]):
+        self.remaining = None if total is None else max(0, int(total))
+        self._lock = threading.Lock()
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.remaining is None:
+                return True
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+class RequestScheduler:
+    """
+    Polite front door for every online fetch. request(url, send) paces the call through
+    the url's HostLimiter and retries 429/5xx responses and connection errors:
+      - up to `max_retries` times per request, while the job-wide `retry_budget` lasts
+      - after max(Retry-After, full-jitter exponential backoff), Retry-After capped at `max_retry_after`
+    The final response is returned as-is (the caller decides whether a status is an error);
+    a final connection error is raised.
+    A dispatcher (FetchPool) can take the first attempt's slot up front with admit(url), so
+    its threads only run requests that may be sent; retries still wait in request().
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 20.0,
+        rate_increase: float = 1.0,
+        burst: float = 4,
+        initial_concurrency: int = 2,
+        max_concurrency: int = 8,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 3.0,
+        max_retries: int = 4,
+        retry_budget: Optional[int] = 500,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60.0,
+        max_retry_after: float = 300.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1.")
+        if initial_rate <= 0 or min_rate <= 0 or max_rate < min_rate:
+            raise ValueError("Rates must be positive with min_rate <= max_rate.")
+        self._host_args = dict(
+            initial_rate=min(max(initial_rate, min_rate), max_rate),
+            min_rate=min_rate,
+            max_rate=max_rate,
+            rate_increase=rate_increase,
+            burst=burst,
+            initial_concurrency=initial_concurrency,
+            max_concurrency=max_concurrency,
+            decrease_factor=decrease_factor,
+            latency_factor=latency_factor,
+        )
+        self.max_retries = max(0, int(max_retries))
+        self.budget = RetryBudget(retry_budget)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.max_retry_after = float(max_retry_after)
+        self._sleep = sleep
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._admitted: Dict[str, int] = {}  # url -> slots taken by admit() that request(url) hasn't used yet
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "RequestScheduler":
+        """Builds a scheduler from the settings.json "rateControl" object (camelCase keys)."""
+        unknown = set(settings) - set(SETTINGS_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown rateControl setting(s): {', '.join(sorted(unknown))}")
+        return cls(**{SETTINGS_KEYS[k]: v for k, v in settings.items()})
+
+    def limiter(self, url: str) -> HostLimiter:
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = self._hosts[host] = HostLimiter(host, **self._host_args)
+            return limiter
+
+    def admit(self, url: str) -> float:
+        """
+        Non-blocking pacing for the next request(url): 0.0 once a slot on the url's host is
+        taken for it, else the seconds until one might free up (math.inf: until a request ends).
+        """
+        wait = self.limiter(url).try_acquire()
+        if not wait:
+            with self._lock:
+                self._admitted[url] = self._admitted.get(url, 0) + 1
+        return wait
+
+    def finish(self, url: str) -> None:
+        """Gives back a slot admit() took for `url` if no request used it (e.g. a fresh cache hit)."""
+        if self._use_admitted(url):
+            self.limiter(url).cancel()
+
+    def request(self, url: str, send: Callable[[], Any]) -> Any:
+        limiter = self.limiter(url)
+        attempt = 0
+        while True:
+            if attempt or not self._use_admitted(url):
+                limiter.acquire()
+            start = time.monotonic()
+            try:
+                resp = send()
+            except retry_exceptions() as e:
+                limiter.release(None)
+                if not self._may_retry(attempt):
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning("Retrying %s in %.1fs after %s", url, delay, type(e).__name__)
+            except BaseException:
+                # Anything else (bad URL, redirect loop, broken body, Ctrl-C) still frees the slot
+                limiter.release(None)
+                raise
+            else:
+                status = getattr(resp, "status_code", 200)
+                retry_after = None
+                if status in RETRY_STATUSES:
+                    retry_after = parse_retry_after(getattr(resp, "headers", {}).get("Retry-After"))
+                    if retry_after is not None:
+                        retry_after = min(retry_after, self.max_retry_after)
+                limiter.release(time.monotonic() - start, throttled=status in THROTTLE_STATUSES, retry_after=retry_after)
+                if status not in RETRY_STATUSES or not self._may_retry(attempt):
+                    return resp
+                delay = max(retry_after or 0.0, self._backoff(attempt))
+                logging.warning("Retrying %s in %.1fs after HTTP %s", url, delay, status)
+                close = getattr(resp, "close", None)
+                if close is not None:
+                    close()
+            METRICS.inc("fetch_retries_total")
+            attempt += 1
+            self._sleep(delay)
+
+    # -------------------- helpers --------------------
+
+    def _use_admitted(self, url: str) -> bool:
+        with self._lock:
+            count = self._admitted.get(url, 0)
+            if not count:
+                return False
+            if count == 1:
+                del self._admitted[url]
+            else:
+                self._admitted[url] = count - 1
+            return True
+
+    def _may_retry(self, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if not self.budget.try_spend():
+            METRICS.inc("retry_budget_exhausted_total")
+            return False
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
@@ -0,0 +1,49 @@
+from typing import Any, Iterable, Iterator, Tuple
+
+from .profile_matcher import slugify
+from .stable_hash import ConsistentHashRing, stable_hash64
+from .url_canonicalizer import canonicalize_profile_url
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """'i/N' -> (i, N) with 0 <= i < N."""
+    try:
+        index_s, count_s = spec.split("/")
+        index, count = int(index_s), int(count_s)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}'; expected i/N, e.g. 0/4") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}'; need 0 <= i < N")
+    return index, count
+
+def input_shard_key(kind: str, value: Any) -> str:
+    """Canonical key of an input item, so URL variants of one profile land on the same shard."""
+    if kind == "profileUrl":
+        return canonicalize_profile_url(value)[0]
+    if kind == "name":
+        return "name:" + slugify(value)
+    if kind == "embeddedHtml":
+        base = value.get("baseUrl")
+        # Without a URL a page is known by its content (its length alone would pile same-sized pages on one shard)
+        return canonicalize_profile_url(base)[0] if base else f"html:{stable_hash64(value.get('html', '')):016x}"
+    return f"{kind}:{value}"
+
+class ShardFilter:
+    """
+    Keeps the input items owned by shard `index` of `count`, assigned by consistent
+    hashing of their canonical keys. Every node computes the same assignment on its own,
+    so a job can be split across a fleet without a coordinator.
+    """
+
+    def __init__(self, index: int, count: int, vnodes: int = 128):
+        self.index = index
+        self.count = count
+        self._node = str(index)
+        self._ring = ConsistentHashRing([str(i) for i in range(count)], vnodes=vnodes)
+
+    def owns(self, kind: str, value: Any) -> bool:
+        return self.count == 1 or self._ring.node_for(input_shard_key(kind, value)) == self._node
+
+    def filter(self, items: Iterable[Tuple[str, Any]]) -> Iterator[Tuple[str, Any]]:
+        for kind, value in items:
+            if self.owns(kind, value):
+                yield kind, value
@@ -0,0 +1,36 @@
+import hashlib
+from bisect import bisect_right
+from typing import Dict, List, Sequence
+
+def stable_hash64(text: str) -> int:
+    """
+    64-bit hash of `text` that is identical in every process, run and machine
+    (unlike the built-in hash(), which is salted per process via PYTHONHASHSEED).
+    """
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+def stable_int(text: str, modulo: int) -> int:
+    return stable_hash64(text) % modulo
+
+class ConsistentHashRing:
+    """
+    Maps keys to nodes on a hash ring with `vnodes` virtual points per node. Adding or
+    removing a node only moves the keys on its arcs (~1/N of them), so shard assignments
+    stay stable when a fleet is resized.
+    """
+
+    def __init__(self, nodes: Sequence[str], vnodes: int = 128):
+        if not nodes:
+            raise ValueError("ConsistentHashRing needs at least one node.")
+        self.nodes = list(nodes)
+        self.vnodes = max(1, int(vnodes))
+        points: Dict[int, str] = {}
+        for node in self.nodes:
+            for v in range(self.vnodes):
+                points[stable_hash64(f"{node}#{v}")] = node
+        self._points: List[int] = sorted(points)
+        self._owners: List[str] = [points[p] for p in self._points]
+
+    def node_for(self, key: str) -> str:
+        i = bisect_right(self._points, stable_hash64(key))
+        return self._owners[i % len(self._points)]
@@ -0,0 +1,73 @@
+import unicodedata
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from .http_cache import normalize_url
+
+CANONICAL_HOST = "www.facebook.com"
+FACEBOOK_DOMAINS = ("facebook.com", "fb.com")
+# First path segments that are sections of the site rather than profile vanity names
+NON_PROFILE_SEGMENTS = {
+    "profile.php", "people", "pages", "pg", "groups", "events", "watch", "photo.php",
+    "photos", "permalink.php", "story.php", "search", "login", "home.php", "hashtag",
+}
+# Second path segments that are tabs of a vanity profile (/<name>/about); deeper paths are content
+PROFILE_TABS = {
+    "about", "photos", "friends", "followers", "following", "videos", "reels", "likes",
+    "music", "map", "sports", "books", "reviews", "groups", "events", "places",
+}
+
+def is_facebook_host(host: str) -> bool:
+    host = host.lower().split(":")[0]
+    return any(host == d or host.endswith("." + d) for d in FACEBOOK_DOMAINS)
+
+def canonicalize_profile_url(url: str) -> Tuple[str, str]:
+    """
+    Returns (key, canonical_url) for a profile URL, so that variants of the same profile
+    collapse before anything is fetched. The key is meant for deduplication only; callers
+    fetch the URL they were given.
+      - m./mbasic./web./locale hosts, fb.com, http vs https -> https://www.facebook.com
+      - query strings, fragments, trailing slashes and profile tabs (/about, /photos) dropped
+      - profile.php?id=N and /people/<name>/N -> key "id:N"
+      - vanity names -> key "vanity:<name>", case-folded (any script, not just ASCII)
+    Other Facebook paths (groups, posts, photos, ...) and URLs outside Facebook fall back
+    to key "url:<normalized url>".
+    """
+    raw = url.strip()
+    if "://" not in raw:
+        raw = "https://" + raw
+    parsed = urlparse(raw)
+    if not is_facebook_host(parsed.netloc):
+        return "url:" + normalize_url(raw), url
+
+    segments = [unquote(seg) for seg in parsed.path.split("/") if seg]
+    user_id = _profile_id(segments, parsed.query)
+    if user_id:
+        return f"id:{user_id}", f"https://{CANONICAL_HOST}/profile.php?id={user_id}"
+
+    is_profile_path = len(segments) == 1 or (len(segments) == 2 and segments[1].lower() in PROFILE_TABS)
+    if is_profile_path and segments[0].lower() not in NON_PROFILE_SEGMENTS:
+        vanity = unicodedata.normalize("NFC", segments[0]).casefold()
+        return f"vanity:{vanity}", f"https://{CANONICAL_HOST}/{quote(vanity, safe='.')}"
+    return "url:" + normalize_url(raw), url
+
+def record_aliases(record: dict) -> Tuple[str, ...]:
+    """Dedup keys a parsed record is known by: its userId and the canonical key of its profileUrl."""
+    keys = []
+    user_id = record.get("userId")
+    if user_id and str(user_id).isdigit():
+        keys.append(f"id:{user_id}")
+    if record.get("profileUrl"):
+        keys.append(canonicalize_profile_url(record["profileUrl"])[0])
+    return tuple(dict.fromkeys(keys))
+
+# -------------------- helpers --------------------
+
+def _profile_id(segments: List[str], query: str) -> Optional[str]:
+    # Numeric ids only count where they name a profile: profile.php?id=N or /people/<name>/N
+    if segments == ["profile.php"]:
+        user_id = (parse_qs(query).get("id") or [""])[0]
+        return user_id if user_id.isdigit() else None
+    if len(segments) == 3 and segments[0].lower() == "people" and segments[2].isdigit():
+        return segments[2]
+    return None
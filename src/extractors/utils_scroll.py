@@ -1,16 +1,148 @@
-from typing import Callable, List, Any
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Hashable, Iterator, List, Optional, Set
+
+from .metrics import METRICS
+
+class _StopRules:
+    """Shared early-stop logic: an empty page, or a page whose items were all seen before."""
+
+    def __init__(self, stop_on_empty: bool, stop_on_duplicates: bool, key: Optional[Callable[[Any], Hashable]]):
+        self.stop_on_empty = stop_on_empty
+        self.stop_on_duplicates = stop_on_duplicates
+        self.key = key or (lambda item: item)
+        self._seen: Set[Hashable] = set()
+
+    def is_last(self, page: Any) -> bool:
+        if page is None:
+            return self.stop_on_empty
+        try:
+            items = list(page)
+        except TypeError:
+            return False  # opaque page objects: no early stop
+        if not items:
+            return self.stop_on_empty
+        if not self.stop_on_duplicates:
+            return False
+        try:
+            keys = [self.key(item) for item in items]
+            fresh = [k for k in keys if k not in self._seen]
+        except TypeError:
+            return False  # unhashable items
+        self._seen.update(fresh)
+        return not fresh
 
 class ScrollPaginator:
     """
     A small utility that mimics infinite-scroll pagination by repeatedly
     calling a provided fetch(page_index) function.
+      - iter_pages() is lazy: pages are fetched only as the consumer asks for them, and
+        up to `prefetch` pages ahead are fetched concurrently on a thread pool
+      - when the consumer stops iterating, prefetches that have not started are cancelled
+      - iteration ends early on an empty page or a page made only of already-seen items
     """
 
-    def __init__(self, fetch: Callable[[int], Any]):
+    def __init__(
+        self,
+        fetch: Callable[[int], Any],
+        prefetch: int = 0,
+        stop_on_empty: bool = True,
+        stop_on_duplicates: bool = True,
+        key: Optional[Callable[[Any], Hashable]] = None,
+    ):
         self.fetch = fetch
+        self.prefetch = max(0, int(prefetch))
+        self.stop_on_empty = stop_on_empty
+        self.stop_on_duplicates = stop_on_duplicates
+        self.key = key
 
     def collect_pages(self, scrolls: int) -> List[Any]:
-        pages: List[Any] = []
-        for i in range(max(1, int(scrolls))):
-            pages.append(self.fetch(i))
-        return pages
\ No newline at end of file
+        return list(self.iter_pages(scrolls))
+
+    def iter_pages(self, scrolls: int) -> Iterator[Any]:
+        total = max(1, int(scrolls))
+        rules = _StopRules(self.stop_on_empty, self.stop_on_duplicates, self.key)
+        if self.prefetch == 0:
+            for i in range(total):
+                page = self._fetch_page(i)
+                if rules.is_last(page):
+                    return
+                yield page
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix="scroll")
+        pending: Deque = deque()
+        next_index = 0
+        try:
+            while True:
+                # Keep the current page plus `prefetch` pages ahead in flight
+                while next_index < total and len(pending) < self.prefetch + 1:
+                    pending.append(pool.submit(self._fetch_page, next_index))
+                    next_index += 1
+                if not pending:
+                    return
+                page = pending.popleft().result()
+                if rules.is_last(page):
+                    return
+                yield page
+        finally:
+            for fut in pending:
+                fut.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_page(self, index: int) -> Any:
+        with METRICS.timer("scroll_page_seconds"):
+            page = self.fetch(index)
+        METRICS.inc("scroll_pages_total")
+        return page
+
+class AsyncScrollPaginator:
+    """
+    asyncio counterpart of ScrollPaginator for an `async def fetch(page_index)`:
+    same laziness, `prefetch` pages ahead as concurrent tasks, cancellation of pending
+    tasks when the consumer stops, and the same early-stop rules.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], Awaitable[Any]],
+        prefetch: int = 0,
+        stop_on_empty: bool = True,
+        stop_on_duplicates: bool = True,
+        key: Optional[Callable[[Any], Hashable]] = None,
+    ):
+        self.fetch = fetch
+        self.prefetch = max(0, int(prefetch))
+        self.stop_on_empty = stop_on_empty
+        self.stop_on_duplicates = stop_on_duplicates
+        self.key = key
+
+    async def collect_pages(self, scrolls: int) -> List[Any]:
+        return [page async for page in self.iter_pages(scrolls)]
+
+    async def iter_pages(self, scrolls: int) -> AsyncIterator[Any]:
+        total = max(1, int(scrolls))
+        rules = _StopRules(self.stop_on_empty, self.stop_on_duplicates, self.key)
+        pending: Deque[asyncio.Task] = deque()
+        next_index = 0
+        try:
+            while True:
+                while next_index < total and len(pending) < self.prefetch + 1:
+                    pending.append(asyncio.ensure_future(self._fetch_page(next_index)))
+                    next_index += 1
+                if not pending:
+                    return
+                page = await pending.popleft()
+                if rules.is_last(page):
+                    return
+                yield page
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_page(self, index: int) -> Any:
+        with METRICS.timer("scroll_page_seconds"):
+            page = await self.fetch(index)
+        METRICS.inc("scroll_pages_total")
+        return page
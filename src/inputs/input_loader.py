@@ -0,0 +1,135 @@
+import csv
+import json
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from telemetry.metrics import METRICS
+
+# (kind, value) items produced by every loader:
+#   ("profileUrl", "<url>"), ("name", "<full name>"), ("embeddedHtml", {"html": ..., "baseUrl": ...})
+InputItem = Tuple[str, Any]
+
+INPUT_FORMATS = ("json", "ndjson", "csv")
+HEADER_CELLS = {"name", "names", "url", "urls", "profileurl", "profile_url", "profileurls"}
+
+class InputStream:
+    """
+    Lazily iterates the work items in an input file. `options` holds run-level
+    settings found in the file (only the legacy JSON document carries any, e.g. perNameLimit).
+      - json:   the inputs.example.json document (loaded whole; it is a single JSON value)
+      - ndjson: one JSON value per line: a bare string (name or URL), or an object with
+                "profileUrl", "name", or "html"/"baseUrl"
+      - csv:    one name or URL per row (first column); an optional header row is skipped
+    """
+
+    def __init__(self, path: str, fmt: str = "auto"):
+        self.path = path
+        self.fmt = detect_format(path) if fmt == "auto" else fmt
+        if self.fmt not in INPUT_FORMATS:
+            raise ValueError(f"Unknown input format '{self.fmt}'; expected one of {', '.join(INPUT_FORMATS)}.")
+        self.options: Dict[str, Any] = {}
+        self._doc: Optional[Dict[str, Any]] = None
+        if self.fmt == "json":
+            with open(path, "r", encoding="utf-8") as f:
+                self._doc = json.load(f)
+            self.options = {k: v for k, v in self._doc.items() if k not in ("profileUrls", "names", "embeddedHtmlProfiles")}
+
+    def __iter__(self) -> Iterator[InputItem]:
+        if self.fmt == "json":
+            return self._iter_document()
+        if self.fmt == "ndjson":
+            return self._iter_ndjson()
+        return self._iter_csv()
+
+    # -------------------- readers --------------------
+
+    def _iter_document(self) -> Iterator[InputItem]:
+        doc = self._doc or {}
+        for url in doc.get("profileUrls", []):
+            yield "profileUrl", with_scheme(url)
+        for name in doc.get("names", []):
+            yield "name", name
+        for html_doc in doc.get("embeddedHtmlProfiles", []):
+            yield "embeddedHtml", html_doc
+
+    def _iter_ndjson(self) -> Iterator[InputItem]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    value = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{self.path}:{lineno}: invalid JSON line: {e}") from None
+                if isinstance(value, str):
+                    if value.strip():
+                        yield classify(value)
+                elif isinstance(value, dict) and "html" in value:
+                    yield "embeddedHtml", value
+                elif isinstance(value, dict) and value.get("profileUrl"):
+                    yield "profileUrl", with_scheme(value["profileUrl"])
+                elif isinstance(value, dict) and value.get("name"):
+                    yield "name", value["name"]
+                else:
+                    raise ValueError(f"{self.path}:{lineno}: expected a string or an object with profileUrl, name or html")
+
+    def _iter_csv(self) -> Iterator[InputItem]:
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            for rownum, row in enumerate(csv.reader(f)):
+                cell = next((c.strip() for c in row if c.strip()), "")
+                if not cell:
+                    continue
+                if rownum == 0 and cell.lower() in HEADER_CELLS:
+                    continue
+                yield classify(cell)
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext in (".csv", ".txt"):
+        return "csv"
+    return "json"
+
+def classify(value: str) -> InputItem:
+    value = value.strip()
+    lowered = value.lower()
+    if lowered.startswith(("http://", "https://")) or "facebook.com/" in lowered:
+        return "profileUrl", with_scheme(value)
+    return "name", value
+
+def with_scheme(url: str) -> str:
+    """'www.facebook.com/zuck' -> 'https://www.facebook.com/zuck'; URLs with a scheme are left alone."""
+    url = url.strip()
+    return url if "://" in url else "https://" + url.lstrip("/")
+
+def prefetch(items: Iterable[Any], maxsize: int = 1000) -> Iterator[Any]:
+    """
+    Reads `items` on a background thread into a bounded queue. File parsing overlaps with
+    downstream work, but once `maxsize` items are buffered the reader blocks: the consumer
+    (the fetch/parse stages) sets the pace and memory stays bounded.
+    """
+    buf: "queue.Queue" = queue.Queue(maxsize=max(1, int(maxsize)))
+    done = object()
+
+    def reader() -> None:
+        try:
+            for item in items:
+                buf.put((item, None))
+        except BaseException as e:  # surfaced to the consumer below
+            buf.put((done, e))
+            return
+        buf.put((done, None))
+
+    threading.Thread(target=reader, name="input-prefetch", daemon=True).start()
+    while True:
+        METRICS.set_gauge("input_queue_depth", buf.qsize())
+        item, err = buf.get()
+        if item is done:
+            if err is not None:
+                raise err
+            return
+        yield item
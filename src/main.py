@@ -1,50 +1,192 @@
 import argparse
+import itertools
 import json
 import logging
 import os
+import secrets
 from datetime import datetime
-from typing import Any, Dict, List
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Local imports via relative path; this file is executed directly so PYTHONPATH includes src/.
-from extractors.facebook_parser import FacebookParser
+# Modules only one mode needs (bulk matching, the API server, profiling) are imported by
+# that mode, and the extractors load bs4/lxml/requests on first use, so startup stays cheap.
+from extractors.dedup_index import DedupIndex
+from extractors.facebook_parser import FacebookParser, normalize_fields
+from extractors.fetch_pool import FetchPool, make_session
+from extractors.http_cache import ResponseCache
+from extractors.parse_pool import ParsePool, ReorderBuffer
 from extractors.profile_matcher import ProfileMatcher
-from outputs.export_manager import ExportManager
+from extractors.rate_control import RequestScheduler
+from extractors.sharding import ShardFilter, parse_shard_spec
+from extractors.url_canonicalizer import canonicalize_profile_url, record_aliases
+from inputs.input_loader import INPUT_FORMATS, InputStream, prefetch
+from outputs.export_manager import STREAM_FORMATS, ExportManager
+from outputs.fingerprint_store import DELETED, UNCHANGED, FingerprintStore, html_hash, record_hash
+from outputs.job_store import DONE_STATES, DUPLICATE, EXPORTED, FAILED, FETCHED, PARSED, JobStore
+from outputs.records import ProfileRecord
+from outputs.sharded_sink import COMPRESSIONS
+from outputs.shard_merge import expand_paths, merge_records, read_records
+from telemetry.metrics import METRICS, MetricsReporter
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config", "settings.json")
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+JOB_DB_NAME = "jobs.sqlite3"
+FINGERPRINT_DB_NAME = "fingerprints.sqlite3"
 
 def load_settings(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def load_inputs(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def new_run_id() -> str:
+    """UTC timestamp plus a random suffix, so runs started in the same second get distinct ids and file names."""
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}-{secrets.token_hex(3)}"
 
 def ensure_dir(path: str) -> None:
     if not os.path.isdir(path):
         os.makedirs(path, exist_ok=True)
 
-def build_result_record(parsed: Dict[str, Any]) -> Dict[str, Any]:
-    # Normalize fields and keep a consistent schema
-    return {
-        "name": parsed.get("name"),
-        "profileImage": parsed.get("profileImage"),
-        "coverImage": parsed.get("coverImage"),
-        "images": parsed.get("images", []),
-        "userId": parsed.get("userId"),
-        "profileUrl": parsed.get("profileUrl"),
-        "userData": parsed.get("userData", []),
-        "_fetchedAt": datetime.utcnow().isoformat() + "Z",
-        "_source": parsed.get("_source", "unknown"),
-    }
+def build_result_record(parsed: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> ProfileRecord:
+    # Normalize fields and keep a consistent schema (or just the projected `fields`, plus _fetchedAt/_source)
+    return ProfileRecord(parsed, source=parsed.get("_source", "unknown"), fields=fields)
 
-def main():
+def record_key(record: Dict[str, Any]) -> str:
+    # Dedup key: profileUrl, else the userId, else (records projected without either) the content itself
+    if record.get("profileUrl"):
+        return record["profileUrl"]
+    if record.get("userId"):
+        return f"id:{record['userId']}"
+    return f"record:{record_hash(record)}"
+
+def parse_formats(spec: str) -> List[str]:
+    """'JSONL, csv' -> ["jsonl", "csv"]; unknown formats are an error rather than silently producing no file."""
+    formats = list(dict.fromkeys(f.strip().lower() for f in spec.split(",") if f.strip()))
+    unknown = [f for f in formats if f not in STREAM_FORMATS]
+    if unknown or not formats:
+        raise ValueError(f"Unknown output format(s) '{spec}'; expected any of {', '.join(STREAM_FORMATS)}.")
+    return formats
+
+def page_key(url: Optional[str], page_hash: Optional[str]) -> str:
+    # Same canonical key the prefetch dedup uses; pages without a URL are known by their content
+    return canonicalize_profile_url(url)[0] if url else f"html:{page_hash}"
+
+def iter_fetch_jobs(
+    items: Iterable[Tuple[str, Any]],
+    matcher: ProfileMatcher,
+    per_name_limit: int,
+    on_embedded: Callable[[Dict[str, Any], int], None],
+    store: JobStore,
+    resuming: bool = False,
+    index: Optional[DedupIndex] = None,
+) -> Iterator[Tuple[str, Tuple[str, int]]]:
+    """
+    Turns input items into (url, (source, task_id)) fetch jobs, one at a time as the fetch
+    stage asks for more work: profile URLs pass through, names are searched for candidates,
+    and embedded HTML documents are handed to `on_embedded` (they need no fetch).
+    Every item is checkpointed in `store`; when resuming, finished items are skipped and
+    names that were already searched replay their unfinished candidates instead.
+    With an `index`, profiles whose canonical key was already seen are never fetched twice;
+    the URL fetched is always the one given.
+    """
+    def admit(url: str, task_id: int) -> Optional[str]:
+        if index is None:
+            return url
+        key = canonicalize_profile_url(url)[0]
+        if not index.add(key):
+            logging.debug("Skipping duplicate profile %s (%s)", url, key)
+            METRICS.inc("duplicates_total", labels={"stage": "prefetch"})
+            store.set_state(task_id, DUPLICATE)
+            return None
+        return url
+
+    for seq, (kind, value) in enumerate(items):
+        prior: Optional[Tuple[int, str]] = store.input_task(seq) if resuming else None
+        done = prior is not None and prior[1] in DONE_STATES
+        if kind == "profileUrl":
+            if done:
+                continue
+            task_id = prior[0] if prior else store.add_input(seq, kind, value)
+            url = admit(value, task_id)
+            if url:
+                yield url, ("profileUrl", task_id)
+        elif kind == "name":
+            if done:
+                for cand_id, url, state in store.candidates(prior[0]):
+                    if state not in DONE_STATES:
+                        url = admit(url, cand_id)
+                        if url:
+                            yield url, ("nameSearch", cand_id)
+                continue
+            task_id = prior[0] if prior else store.add_input(seq, kind, value)
+            try:
+                candidates = matcher.search_profiles_by_name(value, limit=per_name_limit)
+            except Exception as e:
+                logging.exception("Search failed for name '%s': %s", value, e)
+                METRICS.inc("errors_total", labels={"stage": "search"})
+                store.set_state(task_id, FAILED, str(e))
+                continue
+            logging.info("Found %d candidates for '%s'", len(candidates), value)
+            cand_ids = [store.add_candidate(task_id, c["profileUrl"]) for c in candidates]
+            # A name is "parsed" once its candidates are recorded; they carry their own state
+            store.set_state(task_id, PARSED)
+            for cand_id, c in zip(cand_ids, candidates):
+                url = admit(c["profileUrl"], cand_id)
+                if url:
+                    yield url, ("nameSearch", cand_id)
+        elif kind == "embeddedHtml":
+            if done:
+                continue
+            task_id = prior[0] if prior else store.add_input(seq, kind, value.get("baseUrl"))
+            on_embedded(value, task_id)
+
+def build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Facebook User Search Scraper (public profiles only).")
     parser.add_argument(
         "--inputs",
         default=os.path.join(DATA_DIR, "inputs.example.json"),
-        help="Path to inputs JSON. Defaults to data/inputs.example.json",
+        help="Path to inputs: a JSON document, NDJSON (.ndjson/.jsonl) or CSV/text (one name or URL per line). Defaults to data/inputs.example.json",
+    )
+    parser.add_argument(
+        "--dedup-memory-mb",
+        type=float,
+        default=256,
+        help="Memory budget of the pre-fetch dedup index before it spills. Defaults to 256.",
+    )
+    parser.add_argument(
+        "--dedup-spill",
+        default="sqlite",
+        choices=["sqlite", "bloom"],
+        help="Where the dedup index goes past its budget: exact disk-backed set (sqlite) or Bloom filter (bloom). Defaults to sqlite.",
+    )
+    parser.add_argument(
+        "--dedup-capacity",
+        type=int,
+        default=10_000_000,
+        help="Expected number of distinct profiles; sizes the Bloom filter's hash count. Defaults to 10000000.",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="JOB_ID",
+        default=None,
+        help="Resume an interrupted run from the job store in --output-dir, skipping finished inputs.",
+    )
+    parser.add_argument(
+        "--input-format",
+        default="auto",
+        choices=["auto"] + list(INPUT_FORMATS),
+        help="Input file format. Defaults to auto (by file extension).",
+    )
+    parser.add_argument(
+        "--input-buffer",
+        type=int,
+        default=1000,
+        help="Maximum input items read ahead of the fetch stage. Defaults to 1000.",
+    )
+    parser.add_argument(
+        "--per-name-limit",
+        type=int,
+        default=None,
+        help="Candidates fetched per searched name. Defaults to the inputs' perNameLimit, else 3.",
     )
     parser.add_argument(
         "--settings",
@@ -59,93 +201,620 @@ def main():
     parser.add_argument(
         "--formats",
         default="json",
-        help="Comma-separated output formats: json,csv,xml. Defaults to json.",
+        help="Comma-separated output formats: json,jsonl,csv,xml. Defaults to json.",
     )
     parser.add_argument(
         "--online",
         action="store_true",
         help="Enable online mode (may attempt to fetch public pages). Default is offline-safe.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--engine",
+        default="lxml",
+        choices=["bs4", "lxml"],
+        help="HTML parse engine: lxml (single-pass, fast) or bs4 (BeautifulSoup html.parser). Defaults to lxml.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Number of profile fetches in flight at once. Defaults to 8.",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=4,
+        help="Maximum in-flight requests to a single host. Defaults to 4. Jobs over this cap wait without holding a "
+        "--concurrency slot, so against one host (the usual case) at most min(--concurrency, --per-host) fetches run; "
+        "raise both together to fetch faster.",
+    )
+    parser.add_argument(
+        "--no-rate-control",
+        action="store_true",
+        help="Online: send requests as fast as --concurrency/--per-host allow, with no pacing, backoff or retries.",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Worker processes for HTML parsing; 0 or 1 parses in-process. Defaults to 0 (one per CPU for --serve).",
+    )
+    parser.add_argument(
+        "--parse-batch",
+        type=int,
+        default=16,
+        help="Documents sent to a parse worker per batch. Defaults to 16.",
+    )
+    parser.add_argument(
+        "--ordered",
+        action="store_true",
+        help="Emit records in input order instead of as soon as each one is ready.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the on-disk HTTP response cache (online mode). Disabled when omitted.",
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=None,
+        help="Size bound for cached response bodies; least recently used entries are evicted. Defaults to settings cacheMaxBytes.",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=None,
+        help="Seconds a cached page is served without revalidation. Defaults to settings cacheTtlSeconds.",
+    )
+    parser.add_argument(
+        "--fields",
+        default=None,
+        help="Comma-separated record fields to extract and export (e.g. name,userId,profileUrl); others are never computed. Defaults to all.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Online: read response bodies in chunks and hang up once the requested --fields are found (e.g. after <head>).",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=None,
+        help="Online: stop reading a profile page after this many bytes and parse what arrived (implies --stream).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Write only records that are new, changed or deleted since the previous run (<name>.delta.<fmt>) plus a manifest; unchanged pages are not re-parsed. Implies --ordered, so duplicate inputs resolve the same way every run.",
+    )
+    parser.add_argument(
+        "--fingerprint-db",
+        default=None,
+        help="Fingerprint database that --incremental compares against and updates. Defaults to <output-dir>/fingerprints[.shard-I-of-N].sqlite3.",
+    )
+    parser.add_argument(
+        "--rotate-records",
+        type=int,
+        default=None,
+        help="Split each output into shards of at most this many records (<name>.part-NNNNN.<fmt>) listed in <name>.shards.json.",
+    )
+    parser.add_argument(
+        "--rotate-mb",
+        type=float,
+        default=None,
+        help="Start a new output shard once the current one holds this many megabytes.",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default=None,
+        help="Compress each finished output shard (zstd needs the zstandard package); implies sharded output.",
+    )
+    parser.add_argument(
+        "--compress-workers",
+        type=int,
+        default=2,
+        help="Threads compressing and checksumming finished shards while scraping continues.",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        default=None,
+        help="Process only the inputs owned by shard I of N (0-based), assigned by consistent hashing of canonical profile keys.",
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        metavar="PATH",
+        default=None,
+        help="Instead of scraping, merge shard outputs (.jsonl/.json files or globs) into --output-dir, dropping duplicates.",
+    )
+    parser.add_argument(
+        "--match",
+        metavar="CRM_FILE",
+        default=None,
+        help="Instead of scraping, match the rows of a CRM file (.csv/.jsonl/.json with name, userId, profileUrl, employer, school) against --match-against.",
+    )
+    parser.add_argument(
+        "--match-against",
+        nargs="+",
+        metavar="PATH",
+        default=None,
+        help="Scraped outputs (.jsonl/.json files or globs) that --match indexes.",
+    )
+    parser.add_argument(
+        "--match-top-k",
+        type=int,
+        default=3,
+        help="Matches written per CRM row. Defaults to 3.",
+    )
+    parser.add_argument(
+        "--match-min-score",
+        type=float,
+        default=0.5,
+        help="Lowest match score (0-1) written. Defaults to 0.5.",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Instead of scraping, serve parse/search/export as a local HTTP JSON API with a warm parse pool (see service/api_server.py).",
+    )
+    parser.add_argument(
+        "--serve-host",
+        default="127.0.0.1",
+        help="Address --serve listens on. Defaults to 127.0.0.1.",
+    )
+    parser.add_argument(
+        "--serve-port",
+        type=int,
+        default=8080,
+        help="Port --serve listens on. Defaults to 8080.",
+    )
+    parser.add_argument(
+        "--serve-batch",
+        type=int,
+        default=32,
+        help="Most documents --serve parses per micro-batch. Defaults to 32.",
+    )
+    parser.add_argument(
+        "--serve-wait-ms",
+        type=float,
+        default=5.0,
+        help="How long --serve holds a micro-batch open for more concurrent requests. Defaults to 5 ms.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Write pipeline metrics (latency histograms, bytes, records/sec, errors, queue depths) as JSON to this path.",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between --metrics-file updates. Defaults to 10.",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve metrics in Prometheus text format on 127.0.0.1:<port>/metrics while running.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        default=None,
+        help="Run under cProfile and tracemalloc and write the reports to DIR.",
+    )
+    return parser
+
+def main():
+    args = build_arg_parser().parse_args()
 
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s | %(levelname)s | %(message)s",
     )
 
-    settings = load_settings(args.settings)
-    inputs = load_inputs(args.inputs)
-    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    reporter = None
+    if args.metrics_file or args.metrics_port is not None:
+        reporter = MetricsReporter(METRICS, path=args.metrics_file, interval=args.metrics_interval, port=args.metrics_port).start()
+    try:
+        if args.match and not args.match_against:
+            raise SystemExit("--match requires --match-against.")
+        task = serve if args.serve else match if args.match else merge if args.merge else run
+        if args.profile:
+            from telemetry.profiling import run_profiled
+
+            run_profiled(lambda: task(args), args.profile)
+        else:
+            task(args)
+    finally:
+        if reporter is not None:
+            reporter.stop()
+
+def build_parser(args: argparse.Namespace, settings: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> FacebookParser:
+    # The fetching side of the pipeline: keep-alive session, optional response cache and per-host rate control
+    session = make_session(pool_size=args.concurrency) if args.online else None
+    cache = None
+    if args.cache_dir:
+        cache = ResponseCache(
+            args.cache_dir,
+            max_bytes=args.cache_max_bytes if args.cache_max_bytes is not None else settings.get("cacheMaxBytes", 512 * 1024 * 1024),
+            ttl=args.cache_ttl if args.cache_ttl is not None else settings.get("cacheTtlSeconds", 24 * 3600),
+        )
+    # Per-host pacing (token bucket + AIMD) with retries, tuned by settings "rateControl"
+    scheduler = RequestScheduler.from_settings(settings.get("rateControl", {})) if args.online and not args.no_rate_control else None
+    return FacebookParser(
+        online=args.online,
+        timeout=settings.get("fetchTimeoutSeconds", 15),
+        engine=args.engine,
+        session=session,
+        cache=cache,
+        fields=fields,
+        stream=args.stream,
+        max_bytes=args.max_bytes,
+        scheduler=scheduler,
+    )
+
+def build_matcher(args: argparse.Namespace, settings: Dict[str, Any]) -> ProfileMatcher:
+    return ProfileMatcher(
+        online=args.online,
+        scrolls_amount=settings.get("scrollsAmount", 1),
+        prefetch_pages=settings.get("scrollPrefetch", 0),
+    )
 
+def run(args: argparse.Namespace) -> int:
+    """One scrape job as configured by the CLI arguments; returns the number of records written."""
+    settings = load_settings(args.settings)
     ensure_dir(args.output_dir)
 
+    # Every run is checkpointed; a resumed run reuses its original inputs, formats and file names
+    store = JobStore(os.path.join(args.output_dir, JOB_DB_NAME))
+    if args.resume:
+        job = store.load_job(args.resume)
+        logging.info("Resuming job %s (%s)", args.resume, ", ".join(f"{k}={v}" for k, v in sorted(store.counts().items())))
+    else:
+        job_id = new_run_id()
+        job = {
+            "inputs": os.path.abspath(args.inputs),
+            "inputFormat": args.input_format,
+            "formats": parse_formats(args.formats),
+            "baseName": f"facebook_users_{job_id}",
+            "perNameLimit": args.per_name_limit,
+            "shard": args.shard,
+            "fields": normalize_fields(args.fields),
+            "rotate": None,
+        }
+        if args.rotate_records or args.rotate_mb or args.compress:
+            job["rotate"] = {
+                "records": args.rotate_records,
+                "bytes": int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None,
+                "compression": args.compress,
+            }
+        shard_suffix = ""
+        if args.shard:
+            shard_index, shard_count = parse_shard_spec(args.shard)
+            shard_suffix = f".shard-{shard_index}-of-{shard_count}"
+            job["baseName"] += shard_suffix
+        # A shard only sees its own keys, so each shard keeps its own fingerprints
+        default_db = os.path.join(args.output_dir, FINGERPRINT_DB_NAME.replace(".sqlite3", f"{shard_suffix}.sqlite3"))
+        job["fingerprints"] = os.path.abspath(args.fingerprint_db or default_db) if args.incremental else None
+        store.create_job(job_id, job)
+        logging.info("Job id: %s (continue an interrupted run with --resume %s)", job_id, job_id)
+
+    inputs = InputStream(job["inputs"], fmt=job["inputFormat"])
+    per_name_limit = job["perNameLimit"] if job["perNameLimit"] is not None else inputs.options.get("perNameLimit", 3)
+    formats = job["formats"]
+    base_name = job["baseName"]
+    fields = job.get("fields")
+    # profileUrl is always extracted (it is the dedup key) even when it is projected away
+    parse_fields = sorted(set(fields) | {"profileUrl"}) if fields else None
+    shard = ShardFilter(*parse_shard_spec(job["shard"])) if job.get("shard") else None
+
     logging.info("Starting scraper. Mode=%s | Scrolls=%s", "online" if args.online else "offline", settings.get("scrollsAmount"))
+    if shard:
+        logging.info("Shard %d of %d", shard.index, shard.count)
 
-    fb_parser = FacebookParser(online=args.online)
-    matcher = ProfileMatcher(online=args.online, scrolls_amount=settings.get("scrollsAmount", 1))
-    exporter = ExportManager(output_dir=args.output_dir)
+    fb_parser = build_parser(args, settings, parse_fields)
+    matcher = build_matcher(args, settings)
+    exporter = ExportManager(output_dir=args.output_dir, fields=fields)
+    # Rate control paces jobs before they are handed to a fetch thread, not inside one
+    pool = FetchPool(concurrency=args.concurrency, per_host=args.per_host, ordered=args.ordered, gate=fb_parser.scheduler)
+    parse_pool = ParsePool(workers=args.parse_workers, engine=args.engine, batch_size=args.parse_batch, ordered=args.ordered, fields=parse_fields)
+    index = DedupIndex(
+        memory_budget=int(args.dedup_memory_mb * 1024 * 1024),
+        spill=args.dedup_spill,
+        directory=args.output_dir,
+        capacity=args.dedup_capacity,
+    )
+
+    fingerprints = FingerprintStore(job["fingerprints"], run_id=store.job_id) if job.get("fingerprints") else None
+
+    # Records are written to every output as they are produced, deduplicated on the fly by the job store;
+    # with --incremental only the changes since the previous run are written
+    xml_tags = {"xml": {"root_tag": "users", "item_tag": "user"}}
+    # With --rotate-*/--compress each output becomes a series of shards plus a manifest
+    rotate = job.get("rotate")
+    if rotate and fingerprints:
+        logging.warning("Delta files are not sharded; ignoring --rotate-records/--rotate-mb/--compress with --incremental")
+    delta = exporter.open_delta(base_name, formats, store.job_id, writer_kwargs=xml_tags) if fingerprints else None
+    sharded = None
+    if rotate and not delta:
+        sharded = exporter.open_sharded(
+            base_name,
+            formats,
+            max_records=rotate["records"],
+            max_bytes=rotate["bytes"],
+            compression=rotate["compression"],
+            workers=args.compress_workers,
+            writer_kwargs=xml_tags,
+        )
+    if delta:
+        writers = []
+    elif sharded:
+        writers = sharded.sinks
+    else:
+        writers = [exporter.open_writer(fmt, f"{base_name}.{fmt}", **xml_tags.get(fmt, {})) for fmt in formats]
+    totals = {"written": 0}
+
+    def output(record: Dict[str, Any]) -> None:
+        if delta is not None:
+            delta.write(record, record["_change"])
+            if record["_change"] == UNCHANGED:
+                return
+        for writer in writers:
+            writer.write(record)
+        totals["written"] += 1
+
+    def emit(
+        parsed: Dict[str, Any], source: str, task_id: int, page: str, page_hash: Optional[str], key: Optional[str] = None
+    ) -> None:
+        parsed["_source"] = source
+        record = build_result_record(parsed, fields)
+        key = key or record_key(parsed)
+        if fingerprints is not None:
+            # Kept on the checkpointed record so a resumed run replays the same delta
+            record["_change"] = fingerprints.change_of(key, record)
+        # A fetched vanity URL reveals the numeric id (and vice versa); later variants are skipped before fetching
+        for alias in record_aliases(parsed):
+            index.add(alias)
+        if store.add_record(key, record, task_id):
+            if fingerprints is not None:
+                fingerprints.update(key, record, page_key=page, page_hash=page_hash)
+            output(record)
+            METRICS.inc("records_total")
+        else:
+            METRICS.inc("duplicates_total", labels={"stage": "record"})
+        store.set_state(task_id, EXPORTED)
+
+    # Every unit of work (a fetch job or an embedded document) takes the next input sequence
+    # number; with --ordered its outcome is applied only once all earlier ones have been.
+    # --incremental settles in order too: when two inputs resolve to the same profile (an
+    # embedded page and its URL), the earlier input must win every run, or the delta flaps
+    sequence = itertools.count()
+    reorder = ReorderBuffer() if args.ordered or args.incremental else None
+
+    def settle(seq: int, action: Callable[[], None]) -> None:
+        for ready_action in reorder.put(seq, action) if reorder is not None else [action]:
+            ready_action()
+
+    def parse_or_reuse(html: str, url: Optional[str], source: str, task_id: int, seq: int) -> None:
+        page_hash = html_hash(html) if fingerprints is not None else None
+        if fingerprints is not None:
+            stored = fingerprints.unchanged_record(page_key(url, page_hash), page_hash)
+            if stored is not None:
+                # Same bytes as last run: reuse the stored record, under its stored key, instead of parsing
+                METRICS.inc("parse_skipped_total")
+                key, record = stored
+                settle(seq, partial(emit, record, source, task_id, page_key(url, page_hash), page_hash, key=key))
+                return
+        parse_pool.submit(html, url, (source, task_id, url, page_hash, seq))
+
+    def handle_parsed(tag: Tuple[str, int, str, Optional[str], int], parsed: Optional[Dict[str, Any]], err: Optional[Exception]) -> None:
+        source, task_id, url, page_hash, _seq = tag
+        if err is not None:
+            if fingerprints is not None:
+                fingerprints.mark_page_seen(page_key(url, page_hash))
+            if source == "nameSearch":
+                logging.warning("Candidate parse failed for %s: %s", url, err)
+            else:
+                logging.error("Failed parsing %s: %s", url, err)
+            METRICS.inc("errors_total", labels={"stage": "parse"})
+            store.set_state(task_id, FAILED, str(err))
+            return
+        emit(parsed, source, task_id, page_key(url, page_hash), page_hash)
+        logging.info("Parsed profile: %s", parsed.get("name") or url)
+
+    def parse_embedded(html_doc: Dict[str, Any], task_id: int) -> None:
+        parse_or_reuse(html_doc.get("html", ""), html_doc.get("baseUrl"), "embeddedHtml", task_id, next(sequence))
+
+    def handle_fetch_error(url: str, source: str, task_id: int, err: BaseException) -> None:
+        if source == "profileUrl":
+            logging.error("Failed fetching profile URL %s: %s", url, err, exc_info=err)
+        else:
+            logging.warning("Candidate fetch failed for %s: %s", url, err)
+        METRICS.inc("errors_total", labels={"stage": "fetch"})
+        store.set_state(task_id, FAILED, str(err))
+        if fingerprints is not None:
+            # A failed fetch says nothing about the profile; don't report it deleted
+            fingerprints.mark_page_seen(page_key(url, None))
+
+    def fetch(url: str, tag: Tuple[str, int, int]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        # Network stage only: returns (html, None), or (None, record) for offline synthesized profiles
+        if not fb_parser.online:
+            return None, fb_parser.parse_profile_from_url(url)
+        html = fb_parser.fetch_html(url)
+        store.set_state(tag[1], FETCHED)
+        # A page read only up to </head> (--stream with a head-only --fields) was parsed while fetching
+        record = fb_parser.take_head_record(url, html)
+        return (None, record) if record is not None else (html, None)
+
+    status = "failed"
+    try:
+        if args.resume:
+            # Output files are rewritten from the checkpointed records before new work is appended
+            for record in store.iter_records():
+                output(record)
+
+        # Input items stream through a bounded read-ahead buffer; profile URLs and
+        # name-search candidates are fetched concurrently, embedded HTML is parsed inline.
+        # With --shard, items owned by other shards are dropped before they reach the pipeline
+        items = prefetch(shard.filter(inputs) if shard else inputs, maxsize=args.input_buffer)
+        # Sequence numbers are drawn as jobs are pulled, interleaved with embedded documents in input order
+        jobs = (
+            (url, (*tag, next(sequence)))
+            for url, tag in iter_fetch_jobs(items, matcher, per_name_limit, parse_embedded, store, resuming=bool(args.resume), index=index)
+        )
+        for url, (source, task_id, seq), result, err in pool.run(jobs, fetch, with_tag=True):
+            if err is not None:
+                settle(seq, partial(handle_fetch_error, url, source, task_id, err))
+            elif result[1] is not None:
+                settle(seq, partial(handle_parsed, (source, task_id, url, None, seq), result[1], None))
+            else:
+                # Raw HTML goes to the parse stage (unless unchanged); finished parses are picked up between fetches
+                parse_or_reuse(result[0], url, source, task_id, seq)
+            for tag, parsed, parse_err in parse_pool.ready():
+                settle(tag[-1], partial(handle_parsed, tag, parsed, parse_err))
+        for tag, parsed, parse_err in parse_pool.drain():
+            settle(tag[-1], partial(handle_parsed, tag, parsed, parse_err))
+        if fingerprints is not None:
+            # Only a complete run knows which profiles disappeared
+            for _key, record in fingerprints.deleted():
+                delta.write(record, DELETED)
+            fingerprints.forget_deleted()
+        status = "done"
+    except KeyboardInterrupt:
+        status = "interrupted"
+        logging.warning("Interrupted; resume with --resume %s", store.job_id)
+        raise
+    finally:
+        # Close even on errors/Ctrl-C so every file on disk is a complete document
+        for writer in writers:
+            writer.close()
+        if delta is not None:
+            manifest = delta.close(complete=status == "done")
+            logging.info("Incremental export: %s (manifest %s)", ", ".join(f"{k}={v}" for k, v in delta.counts.items()), manifest)
+        if sharded is not None:
+            manifest = sharded.close(complete=status == "done")
+            logging.info("Sharded export: %d shards (manifest %s)", len(sharded.manifest.shards), manifest)
+        if fingerprints is not None:
+            fingerprints.close()
+        store.finish_job(status)
+        store.close()
+        index.close()
+        parse_pool.close()
 
-    results: List[Dict[str, Any]] = []
-
-    # 1) Direct profile URLs
-    for url in inputs.get("profileUrls", []):
-        try:
-            parsed = fb_parser.parse_profile_from_url(url)
-            parsed["_source"] = "profileUrl"
-            results.append(build_result_record(parsed))
-            logging.info("Parsed profile: %s", parsed.get("name") or url)
-        except Exception as e:
-            logging.exception("Failed parsing profile URL %s: %s", url, e)
-
-    # 2) Names to search -> best matches
-    for name in inputs.get("names", []):
-        try:
-            candidates = matcher.search_profiles_by_name(name, limit=inputs.get("perNameLimit", 3))
-            logging.info("Found %d candidates for '%s'", len(candidates), name)
-            for c in candidates:
-                try:
-                    parsed = fb_parser.parse_profile_from_url(c["profileUrl"])
-                    parsed["_source"] = "nameSearch"
-                    results.append(build_result_record(parsed))
-                except Exception as e:
-                    logging.warning("Candidate parse failed for %s: %s", c.get("profileUrl"), e)
-        except Exception as e:
-            logging.exception("Search failed for name '%s': %s", name, e)
-
-    # 3) Optional embedded HTML documents (offline)
-    for html_doc in inputs.get("embeddedHtmlProfiles", []):
-        try:
-            parsed = fb_parser.parse_profile_html(html_doc.get("html", ""), base_url=html_doc.get("baseUrl"))
-            parsed["_source"] = "embeddedHtml"
-            results.append(build_result_record(parsed))
-            logging.info("Parsed embedded HTML for baseUrl=%s", html_doc.get("baseUrl"))
-        except Exception as e:
-            logging.exception("Failed parsing embedded HTML: %s", e)
-
-    if not results:
+    if not totals["written"]:
         logging.warning("No results produced. Check inputs or enable --online for live fetches.")
 
-    # Deduplicate by profileUrl or userId
-    seen = set()
-    deduped: List[Dict[str, Any]] = []
-    for r in results:
-        key = r.get("profileUrl") or f"id:{r.get('userId')}"
-        if key and key not in seen:
-            seen.add(key)
-            deduped.append(r)
-
-    # Export
-    ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    base_name = f"facebook_users_{ts}"
-
-    if "json" in formats:
-        exporter.export_json(deduped, f"{base_name}.json")
-    if "csv" in formats:
-        exporter.export_csv(deduped, f"{base_name}.csv")
-    if "xml" in formats:
-        exporter.export_xml(deduped, f"{base_name}.xml", root_tag="users", item_tag="user")
-
-    logging.info("Done. Wrote %d records to %s in formats: %s", len(deduped), args.output_dir, ",".join(formats))
+    logging.info("Done. Wrote %d records to %s in formats: %s", totals["written"], args.output_dir, ",".join(formats))
+    return totals["written"]
+
+def merge(args: argparse.Namespace) -> int:
+    """Combines the outputs of a sharded job (--merge) into one set of files; returns the number of records written."""
+    ensure_dir(args.output_dir)
+    paths = expand_paths(args.merge)
+    formats = parse_formats(args.formats)
+    base_name = f"facebook_users_merged_{new_run_id()}"
+    logging.info("Merging %d shard outputs: %s", len(paths), ", ".join(paths))
+
+    exporter = ExportManager(output_dir=args.output_dir, fields=normalize_fields(args.fields))
+    index = DedupIndex(
+        memory_budget=int(args.dedup_memory_mb * 1024 * 1024),
+        spill=args.dedup_spill,
+        directory=args.output_dir,
+        capacity=args.dedup_capacity,
+    )
+    writers = [
+        exporter.open_writer(fmt, f"{base_name}.{fmt}", **({"root_tag": "users", "item_tag": "user"} if fmt == "xml" else {}))
+        for fmt in formats
+    ]
+    written = 0
+    try:
+        for record in merge_records(paths, lambda r: [record_key(r), *record_aliases(r)], index):
+            for writer in writers:
+                writer.write(record)
+            written += 1
+    finally:
+        for writer in writers:
+            writer.close()
+        index.close()
+
+    logging.info("Done. Merged %d records to %s in formats: %s", written, args.output_dir, ",".join(formats))
+    return written
+
+def match(args: argparse.Namespace) -> int:
+    """Bulk-matches the CRM rows of --match against the scraped profiles of --match-against; returns the number of matches written."""
+    from extractors.bulk_matcher import MATCH_COLUMNS, MatchIndex, read_crm_rows
+
+    ensure_dir(args.output_dir)
+    paths = expand_paths(args.match_against)
+    formats = parse_formats(args.formats)
+    base_name = f"crm_matches_{new_run_id()}"
+
+    index = MatchIndex()
+    for path in paths:
+        index.add_many(read_records(path))
+    logging.info("Indexed %d profiles from %d files (%s scoring)", len(index), len(paths), "vectorized" if index.vectorized else "pure-Python")
+
+    exporter = ExportManager(output_dir=args.output_dir)
+    writers = [
+        exporter.open_writer(fmt, f"{base_name}.{fmt}", **(
+            {"root_tag": "matches", "item_tag": "match"} if fmt == "xml" else {"fieldnames": MATCH_COLUMNS} if fmt == "csv" else {}
+        ))
+        for fmt in formats
+    ]
+    rows = written = 0
+    try:
+        for row, matches in index.match_many(read_crm_rows(args.match), k=args.match_top_k, min_score=args.match_min_score):
+            rows += 1
+            for rank, m in enumerate(matches, start=1):
+                profile = index.profiles[m.pop("profile")]
+                out = {"crmId": row["id"], "rank": rank, **m, **profile}
+                for writer in writers:
+                    writer.write(out)
+                written += 1
+    finally:
+        for writer in writers:
+            writer.close()
+
+    logging.info("Done. Wrote %d matches for %d CRM rows to %s in formats: %s", written, rows, args.output_dir, ",".join(formats))
+    return written
+
+def serve(args: argparse.Namespace) -> int:
+    """Runs the HTTP API (--serve) until interrupted; returns 0."""
+    from service.api_server import ApiServer, MicroBatcher
+
+    settings = load_settings(args.settings)
+    # One warm worker per CPU unless --parse-workers says otherwise (1 parses in-process)
+    workers = args.parse_workers if args.parse_workers > 0 else max(2, os.cpu_count() or 1)
+    parse_pool = ParsePool(
+        workers=workers,
+        engine=args.engine,
+        batch_size=max(1, -(-args.serve_batch // workers)),
+        inline_below=0,
+    )
+    parse_pool.warm_up()
+    batcher = MicroBatcher(parse_pool, max_batch=args.serve_batch, max_wait=args.serve_wait_ms / 1000).start()
+    server = ApiServer(
+        build_parser(args, settings),
+        build_matcher(args, settings),
+        batcher,
+        host=args.serve_host,
+        port=args.serve_port,
+        fetch_workers=args.concurrency,
+    )
+    logging.info("Serving on http://%s:%d (%s, %d parse workers)", server.host, server.port, "online" if args.online else "offline", workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        batcher.close()
+        parse_pool.close()
+    return 0
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
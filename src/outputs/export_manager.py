@@ -1,20 +1,282 @@
+import abc
 import csv
 import json
 import os
-from typing import Any, Dict, Iterable, List
-from xml.etree.ElementTree import Element, SubElement, ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional
+from xml.etree.ElementTree import Element, SubElement, ElementTree, tostring
+from xml.sax.saxutils import escape
+
+from outputs.records import ProfileRecord
+from outputs.sharded_sink import ShardedExport, ShardedSink, ShardManifest, check_compression
+from telemetry.metrics import METRICS
+
+# Record schema in export order; streaming writers use it instead of pre-scanning all items.
+PREFERRED_KEYS = ["name", "profileUrl", "userId", "profileImage", "coverImage", "images", "userData", "_fetchedAt", "_source"]
+
+STREAM_FORMATS = ("json", "jsonl", "csv", "xml")
+
+def projected_keys(fields: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """Export columns for a field projection: the requested record fields plus the _fetchedAt/_source bookkeeping keys."""
+    if not fields:
+        return None
+    wanted = set(fields)
+    return [k for k in PREFERRED_KEYS if k in wanted or k.startswith("_")]
+
+class StreamWriter(abc.ABC):
+    """
+    Base class for record-at-a-time writers. Records are serialized and handed to the
+    file as they arrive, so memory stays constant regardless of how many are written.
+    Use as a context manager, or call close() to finish the document. With `fields`,
+    only those keys of each record are written. ProfileRecords are written as they are,
+    with the same output as their dict form.
+    """
+
+    def __init__(self, path: str, fields: Optional[List[str]] = None):
+        self.path = path
+        self.fields = fields
+        self.count = 0
+        self._f = self._open(path)
+        self._begin()
+
+    format_name = "stream"
+
+    def write(self, item: Dict[str, Any]) -> None:
+        if self.fields is not None:
+            if isinstance(item, ProfileRecord):
+                item = item.project(self.fields)
+            else:
+                item = {k: item[k] for k in self.fields if k in item}
+        self._write_item(item)
+        self.count += 1
+        METRICS.inc("records_exported_total", labels={"format": self.format_name})
+
+    def write_many(self, items: Iterable[Dict[str, Any]]) -> None:
+        for it in items:
+            self.write(it)
+
+    def bytes_written(self) -> int:
+        """Bytes handed to the file so far; may trail the document by up to one text buffer."""
+        return self._f.buffer.tell() if self._f is not None else os.path.getsize(self.path)
+
+    def close(self) -> str:
+        if self._f is not None:
+            self._end()
+            self._f.close()
+            self._f = None
+        return self.path
+
+    def __enter__(self) -> "StreamWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -------------------- hooks --------------------
+
+    def _open(self, path: str):
+        return open(path, "w", encoding="utf-8")
+
+    def _begin(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def _write_item(self, item: Dict[str, Any]) -> None:
+        """Serializes one (already projected) record to the file."""
+
+    def _end(self) -> None:
+        pass
+
+class JsonLinesWriter(StreamWriter):
+    """One compact JSON object per line."""
+
+    format_name = "jsonl"
+
+    def _write_item(self, item: Dict[str, Any]) -> None:
+        self._f.write(dump_json(item))
+        self._f.write("\n")
+
+class JsonArrayWriter(StreamWriter):
+    """A JSON array formatted exactly like json.dump(items, indent=2), written item by item."""
+
+    format_name = "json"
+
+    def _write_item(self, item: Dict[str, Any]) -> None:
+        self._f.write("[\n  " if self.count == 0 else ",\n  ")
+        self._f.write(dump_json(item, indent=2).replace("\n", "\n  "))
+
+    def _end(self) -> None:
+        self._f.write("[]" if self.count == 0 else "\n]")
+
+class CsvStreamWriter(StreamWriter):
+    """CSV over a fixed column list (PREFERRED_KEYS by default); keys outside it are dropped."""
+
+    format_name = "csv"
+
+    def __init__(self, path: str, fieldnames: Optional[List[str]] = None, fields: Optional[List[str]] = None):
+        self.fieldnames = list(fieldnames or fields or PREFERRED_KEYS)
+        super().__init__(path, fields=fields)
+
+    def _open(self, path: str):
+        return open(path, "w", encoding="utf-8", newline="")
+
+    def _begin(self) -> None:
+        self._writer = csv.DictWriter(self._f, fieldnames=self.fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def _write_item(self, item: Dict[str, Any]) -> None:
+        self._writer.writerow(_csv_row(item, self.fieldnames))
+
+class XmlStreamWriter(StreamWriter):
+    """The same document ExportManager.export_xml builds, serialized one item element at a time."""
+
+    format_name = "xml"
+
+    def __init__(self, path: str, root_tag: str = "items", item_tag: str = "item", fields: Optional[List[str]] = None):
+        self.root_tag = root_tag
+        self.item_tag = item_tag
+        super().__init__(path, fields=fields)
+
+    def _begin(self) -> None:
+        self._f.write(f"<?xml version='1.0' encoding='utf-8'?>\n<{escape(self.root_tag)}>")
+
+    def _write_item(self, item: Dict[str, Any]) -> None:
+        node = Element(self.item_tag)
+        append_dict(node, item)
+        self._f.write(tostring(node, encoding="unicode"))
+
+    def _end(self) -> None:
+        self._f.write(f"</{escape(self.root_tag)}>")
+
+class DeltaExport:
+    """
+    Incremental export of one run: only new, changed and deleted records reach the
+    writers, each tagged with "_change"; unchanged records are just counted.
+    close() writes a manifest (run id, counts per change type, files) next to the deltas.
+    """
+
+    def __init__(self, writers: List[StreamWriter], manifest_path: str, run_id: str):
+        self.writers = writers
+        self.manifest_path = manifest_path
+        self.run_id = run_id
+        self.counts: Dict[str, int] = {"new": 0, "changed": 0, "deleted": 0, "unchanged": 0}
+
+    def write(self, record: Dict[str, Any], change: str) -> None:
+        self.counts[change] = self.counts.get(change, 0) + 1
+        if change == "unchanged":
+            return
+        item = record.copy()
+        item["_change"] = change
+        for writer in self.writers:
+            writer.write(item)
+
+    def close(self, complete: bool = True) -> str:
+        """Finishes the delta files; `complete` is False when the run was cut short (no deletions known)."""
+        for writer in self.writers:
+            writer.close()
+        manifest = {
+            "runId": self.run_id,
+            "createdAt": datetime.utcnow().isoformat() + "Z",
+            "complete": complete,
+            "counts": self.counts,
+            "files": [
+                {"format": w.format_name, "path": os.path.basename(w.path), "records": w.count}
+                for w in self.writers
+            ],
+        }
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return self.manifest_path
 
 class ExportManager:
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, fields: Optional[Iterable[str]] = None):
         self.output_dir = output_dir
+        # Field projection (see FacebookParser fields=); None exports records as they are
+        self.fields = projected_keys(fields)
+
+    def open_writer(self, fmt: str, filename: str, **kwargs: Any) -> StreamWriter:
+        """
+        Streaming writer for one of STREAM_FORMATS. For "xml", root_tag/item_tag may be
+        passed; for "csv", fieldnames.
+        """
+        path = os.path.join(self.output_dir, filename)
+        kwargs.setdefault("fields", self.fields)
+        if fmt == "jsonl":
+            return JsonLinesWriter(path, **kwargs)
+        if fmt == "json":
+            return JsonArrayWriter(path, **kwargs)
+        if fmt == "csv":
+            return CsvStreamWriter(path, **kwargs)
+        if fmt == "xml":
+            return XmlStreamWriter(path, **kwargs)
+        raise ValueError(f"Unknown export format '{fmt}'; expected one of {', '.join(STREAM_FORMATS)}.")
+
+    def open_delta(
+        self,
+        base_name: str,
+        formats: Iterable[str],
+        run_id: str,
+        writer_kwargs: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> DeltaExport:
+        """
+        Incremental export mode: <base_name>.delta.<fmt> per format plus <base_name>.manifest.json.
+        `writer_kwargs` maps a format to extra open_writer() arguments (e.g. xml tags).
+        """
+        columns = (self.fields or PREFERRED_KEYS) + ["_change"]
+        writers = []
+        for fmt in formats:
+            kwargs = dict((writer_kwargs or {}).get(fmt, {}))
+            kwargs["fields"] = columns if self.fields else None
+            if fmt == "csv":
+                kwargs.setdefault("fieldnames", columns)
+            writers.append(self.open_writer(fmt, f"{base_name}.delta.{fmt}", **kwargs))
+        return DeltaExport(writers, os.path.join(self.output_dir, f"{base_name}.manifest.json"), run_id)
+
+    def open_sharded(
+        self,
+        base_name: str,
+        formats: Iterable[str],
+        max_records: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        compression: Optional[str] = None,
+        workers: int = 2,
+        writer_kwargs: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> ShardedExport:
+        """
+        Sharded export mode: <base_name>.part-NNNNN.<fmt>[.gz|.zst] per format, rotated by
+        `max_records` / `max_bytes`, plus <base_name>.shards.json. Shards are compressed on
+        a pool of `workers` threads shared by all formats.
+        """
+        check_compression(compression)
+        manifest = ShardManifest(os.path.join(self.output_dir, f"{base_name}.shards.json"), base_name, compression)
+        executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="shard-compress")
+        sinks = []
+        for fmt in formats:
+            opener = partial(self.open_writer, fmt, **(writer_kwargs or {}).get(fmt, {}))
+            sinks.append(ShardedSink(
+                opener, base_name, fmt, manifest, executor,
+                max_records=max_records, max_bytes=max_bytes, compression=compression,
+                max_pending=max(2, 2 * int(workers)),
+            ))
+        return ShardedExport(sinks, manifest, executor)
+
+    def export_jsonl(self, items: Iterable[Dict[str, Any]], filename: str) -> str:
+        with self.open_writer("jsonl", filename) as writer:
+            writer.write_many(items)
+        return writer.path
 
     def export_json(self, items: List[Dict[str, Any]], filename: str) -> str:
+        items = self._project(items)
         path = os.path.join(self.output_dir, filename)
         with open(path, "w", encoding="utf-8") as f:
             json.dump(items, f, indent=2, ensure_ascii=False)
+        METRICS.inc("records_exported_total", len(items), labels={"format": "json"})
         return path
 
     def export_csv(self, items: List[Dict[str, Any]], filename: str) -> str:
+        items = self._project(items)
         path = os.path.join(self.output_dir, filename)
         # Flatten top-level keys; lists/dicts converted to JSON strings
         keys = self._collect_keys(items)
@@ -22,49 +284,78 @@ class ExportManager:
             writer = csv.DictWriter(f, fieldnames=keys)
             writer.writeheader()
             for it in items:
-                row = {k: (json.dumps(it.get(k)) if isinstance(it.get(k), (list, dict)) else it.get(k)) for k in keys}
-                writer.writerow(row)
+                writer.writerow(_csv_row(it, keys))
+        METRICS.inc("records_exported_total", len(items), labels={"format": "csv"})
         return path
 
     def export_xml(self, items: List[Dict[str, Any]], filename: str, root_tag: str = "items", item_tag: str = "item") -> str:
+        items = self._project(items)
         path = os.path.join(self.output_dir, filename)
         root = Element(root_tag)
         for it in items:
             node = SubElement(root, item_tag)
             self._append_dict(node, it)
         ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+        METRICS.inc("records_exported_total", len(items), labels={"format": "xml"})
         return path
 
     # -------------------- helpers --------------------
 
+    def _project(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        items = [it.to_dict() if isinstance(it, ProfileRecord) else it for it in items]
+        if self.fields is None:
+            return items
+        return [{k: it[k] for k in self.fields if k in it} for it in items]
+
     def _collect_keys(self, items: Iterable[Dict[str, Any]]) -> List[str]:
         keys = set()
         for it in items:
             keys.update(list(it.keys()))
         # Stable order with important keys first
-        preferred = ["name", "profileUrl", "userId", "profileImage", "coverImage", "images", "userData", "_fetchedAt", "_source"]
-        ordered = [k for k in preferred if k in keys] + sorted(k for k in keys if k not in preferred)
+        ordered = [k for k in PREFERRED_KEYS if k in keys] + sorted(k for k in keys if k not in PREFERRED_KEYS)
         return ordered
 
     def _append_dict(self, parent: Element, data: Dict[str, Any]) -> None:
-        for k, v in data.items():
-            if isinstance(v, dict):
-                node = SubElement(parent, k)
-                self._append_dict(node, v)
-            elif isinstance(v, list):
-                arr = SubElement(parent, k)
-                for item in v:
-                    child = SubElement(arr, "item")
-                    if isinstance(item, (dict, list)):
-                        # nested structure
-                        if isinstance(item, dict):
-                            self._append_dict(child, item)
-                        else:
-                            for sub in item:
-                                sub_el = SubElement(child, "item")
-                                sub_el.text = str(sub)
+        append_dict(parent, data)
+
+# -------------------- serialization helpers --------------------
+
+def dump_json(item: Dict[str, Any], indent: Optional[int] = None) -> str:
+    """json.dumps(item, indent=indent, ensure_ascii=False), also for a ProfileRecord (serialized field by field)."""
+    if not isinstance(item, ProfileRecord):
+        return json.dumps(item, indent=indent, ensure_ascii=False)
+    parts = [
+        json.dumps(k, ensure_ascii=False) + ": " + json.dumps(v, indent=indent, ensure_ascii=False)
+        for k, v in item.items()
+    ]
+    if indent is None:
+        return "{" + ", ".join(parts) + "}"
+    pad = " " * indent
+    return "{\n" + pad + (",\n" + pad).join(p.replace("\n", "\n" + pad) for p in parts) + "\n}"
+
+def _csv_row(item: Dict[str, Any], keys: List[str]) -> Dict[str, Any]:
+    # Lists/tuples/dicts become JSON strings
+    return {k: (json.dumps(item.get(k)) if isinstance(item.get(k), (list, tuple, dict)) else item.get(k)) for k in keys}
+
+def append_dict(parent: Element, data: Dict[str, Any]) -> None:
+    for k, v in data.items():
+        if isinstance(v, dict):
+            node = SubElement(parent, k)
+            append_dict(node, v)
+        elif isinstance(v, (list, tuple)):
+            arr = SubElement(parent, k)
+            for item in v:
+                child = SubElement(arr, "item")
+                if isinstance(item, (dict, list, tuple)):
+                    # nested structure
+                    if isinstance(item, dict):
+                        append_dict(child, item)
                     else:
-                        child.text = str(item)
-            else:
-                node = SubElement(parent, k)
-                node.text = "" if v is None else str(v)
\ No newline at end of file
+                        for sub in item:
+                            sub_el = SubElement(child, "item")
+                            sub_el.text = str(sub)
+                else:
+                    child.text = str(item)
+        else:
+            node = SubElement(parent, k)
+            node.text = "" if v is None else str(v)
\ No newline at end of file
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+DELETED = "deleted"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    key         TEXT PRIMARY KEY,
+    page_key    TEXT,
+    html_hash   TEXT,
+    record_hash TEXT NOT NULL,
+    record      TEXT NOT NULL,
+    seen_run    TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_by_run ON fingerprints (seen_run);
+CREATE INDEX IF NOT EXISTS fingerprints_by_page ON fingerprints (page_key, html_hash);
+"""
+
+def html_hash(html: Optional[str]) -> Optional[str]:
+    if html is None:
+        return None
+    return hashlib.sha256(html.encode("utf-8", "surrogatepass")).hexdigest()
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """Hash of a record's content; bookkeeping keys (_fetchedAt, _source, ...) are left out."""
+    content = {k: v for k, v in record.items() if not k.startswith("_")}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class FingerprintStore:
+    """
+    SQLite memory of what every profile looked like on the last run, for scheduled re-scrapes.
+    One row per record dedup key with:
+      - page_key:    the canonical key of the page the record came from (known before parsing)
+      - html_hash:   sha256 of that raw page; an identical page is not parsed again
+      - record_hash: sha256 of the normalized record; decides new / changed / unchanged
+      - record:      the last record, served when the page is unchanged and for deletions
+      - seen_run:    the last run that saw the key; keys a finished run did not see are deleted
+    Writes are batched like JobStore's. Safe to share between threads.
+    """
+
+    def __init__(self, path: str, run_id: str, commit_every: int = 200, commit_interval: float = 2.0):
+        self.path = path
+        self.run_id = run_id
+        self.commit_every = max(1, int(commit_every))
+        self.commit_interval = float(commit_interval)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._dirty = 0
+        self._last_commit = time.monotonic()
+
+    def unchanged_record(self, page_key: str, page_hash: Optional[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        (key, stored record) if the page at `page_key` hashes to `page_hash` again (so it
+        needn't be parsed), else None. The key is returned as stored because a projected
+        record (--fields) may no longer carry the fields it was derived from.
+        """
+        if page_hash is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, record FROM fingerprints WHERE page_key = ? AND html_hash = ? LIMIT 1", (page_key, page_hash)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def change_of(self, key: str, record: Dict[str, Any]) -> str:
+        """NEW, CHANGED or UNCHANGED for `record` against the stored version of `key` (read-only)."""
+        with self._lock:
+            row = self._conn.execute("SELECT record_hash FROM fingerprints WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return NEW
+        return UNCHANGED if row[0] == record_hash(record) else CHANGED
+
+    def update(self, key: str, record: Dict[str, Any], page_key: Optional[str] = None, page_hash: Optional[str] = None) -> None:
+        """Stores this run's version of `key` (and the page it was parsed from) and marks it seen."""
+        self._write(
+            "INSERT OR REPLACE INTO fingerprints (key, page_key, html_hash, record_hash, record, seen_run, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, page_key, page_hash, record_hash(record), json.dumps(dict(record.items()), ensure_ascii=False), self.run_id, time.time()),
+        )
+
+    def mark_page_seen(self, page_key: str) -> None:
+        """Keeps the records of a page alive without new content (e.g. its fetch failed this time)."""
+        self._write("UPDATE fingerprints SET seen_run = ? WHERE page_key = ?", (self.run_id, page_key))
+
+    def deleted(self, batch_size: int = 1000) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(key, last record) for every key this run did not see; call only after a complete run."""
+        with self._lock:
+            self._conn.commit()
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, record FROM fingerprints WHERE seen_run != ? AND key > ? ORDER BY key LIMIT ?",
+                    (self.run_id, last, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for key, record in rows:
+                last = key
+                yield key, json.loads(record)
+
+    def forget_deleted(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM fingerprints WHERE seen_run != ?", (self.run_id,))
+            self._conn.commit()
+        return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    # -------------------- helpers --------------------
+
+    def _write(self, sql: str, params: Tuple) -> sqlite3.Cursor:
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            self._dirty += 1
+            if self._dirty >= self.commit_every or time.monotonic() - self._last_commit >= self.commit_interval:
+                self._conn.commit()
+                self._dirty = 0
+                self._last_commit = time.monotonic()
+            return cur
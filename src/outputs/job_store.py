@@ -0,0 +1,180 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+PENDING = "pending"
+FETCHED = "fetched"
+PARSED = "parsed"
+EXPORTED = "exported"
+FAILED = "failed"
+DUPLICATE = "duplicate"
+
+# Inputs in these states are not redone on --resume
+DONE_STATES = {PARSED, EXPORTED, DUPLICATE}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    status      TEXT NOT NULL,
+    params      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id      TEXT NOT NULL,
+    seq         INTEGER,
+    parent_id   INTEGER,
+    kind        TEXT NOT NULL,
+    value       TEXT,
+    state       TEXT NOT NULL,
+    error       TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS tasks_by_seq ON tasks (job_id, seq) WHERE seq IS NOT NULL;
+CREATE INDEX IF NOT EXISTS tasks_by_parent ON tasks (parent_id) WHERE parent_id IS NOT NULL;
+CREATE TABLE IF NOT EXISTS records (
+    job_id      TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    task_id     INTEGER,
+    record      TEXT NOT NULL,
+    PRIMARY KEY (job_id, key)
+);
+"""
+
+class JobStore:
+    """
+    SQLite checkpoint store for scrape runs (one database file can hold many jobs).
+      - jobs:    one row per run, with the parameters needed to resume it
+      - tasks:   one row per input item (seq = position in the input stream) and per
+                 name-search candidate (parent_id = the name's task), with its state:
+                 pending -> fetched -> parsed -> exported, or failed / duplicate
+      - records: every parsed record, unique per dedup key
+    Writes are batched into a transaction committed every `commit_every` operations or
+    `commit_interval` seconds, and on close(). Safe to share between threads.
+    """
+
+    def __init__(self, path: str, commit_every: int = 200, commit_interval: float = 2.0):
+        self.path = path
+        self.commit_every = max(1, int(commit_every))
+        self.commit_interval = float(commit_interval)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._dirty = 0
+        self._last_commit = time.monotonic()
+        self.job_id: Optional[str] = None
+
+    # -------------------- jobs --------------------
+
+    def create_job(self, job_id: str, params: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, created_at, updated_at, status, params) VALUES (?, ?, ?, ?, ?)",
+                (job_id, now, now, "running", json.dumps(params)),
+            )
+            self._conn.commit()
+        self.job_id = job_id
+
+    def load_job(self, job_id: str) -> Dict[str, Any]:
+        """Selects an existing job for resuming; returns its stored parameters."""
+        with self._lock:
+            row = self._conn.execute("SELECT params FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"No job '{job_id}' in {self.path}")
+            self._conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+            self._conn.commit()
+        self.job_id = job_id
+        return json.loads(row[0])
+
+    def finish_job(self, status: str = "done") -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?", (status, time.time(), self.job_id))
+            self._conn.commit()
+            self._dirty = 0
+
+    # -------------------- tasks --------------------
+
+    def input_task(self, seq: int) -> Optional[Tuple[int, str]]:
+        """(task_id, state) for the input item at stream position `seq`, if it was seen before."""
+        with self._lock:
+            row = self._conn.execute("SELECT id, state FROM tasks WHERE job_id = ? AND seq = ?", (self.job_id, seq)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def add_input(self, seq: int, kind: str, value: Optional[str]) -> int:
+        return self._insert_task(seq, None, kind, value)
+
+    def add_candidate(self, parent_id: int, url: str) -> int:
+        return self._insert_task(None, parent_id, "candidate", url)
+
+    def candidates(self, parent_id: int) -> Iterator[Tuple[int, str, str]]:
+        """(task_id, url, state) for every candidate recorded under a name search task."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, value, state FROM tasks WHERE parent_id = ? ORDER BY id", (parent_id,)
+            ).fetchall()
+        return iter(rows)
+
+    def set_state(self, task_id: int, state: str, error: Optional[str] = None) -> None:
+        self._write("UPDATE tasks SET state = ?, error = ? WHERE id = ?", (state, error, task_id))
+
+    # -------------------- records --------------------
+
+    def add_record(self, key: str, record: Dict[str, Any], task_id: Optional[int] = None) -> bool:
+        """Stores a parsed record; returns False if this job already has one with the same key."""
+        cur = self._write(
+            "INSERT OR IGNORE INTO records (job_id, key, task_id, record) VALUES (?, ?, ?, ?)",
+            (self.job_id, key, task_id, json.dumps(dict(record.items()), ensure_ascii=False)),
+        )
+        return cur.rowcount == 1
+
+    def iter_records(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Every stored record of the current job, in insertion order, fetched in batches."""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, record FROM records WHERE job_id = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (self.job_id, last, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for rowid, record in rows:
+                last = rowid
+                yield json.loads(record)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY state", (self.job_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    # -------------------- helpers --------------------
+
+    def _insert_task(self, seq: Optional[int], parent_id: Optional[int], kind: str, value: Optional[str]) -> int:
+        cur = self._write(
+            "INSERT INTO tasks (job_id, seq, parent_id, kind, value, state) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.job_id, seq, parent_id, kind, value, PENDING),
+        )
+        return cur.lastrowid
+
+    def _write(self, sql: str, params: Tuple) -> sqlite3.Cursor:
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            self._dirty += 1
+            if self._dirty >= self.commit_every or time.monotonic() - self._last_commit >= self.commit_interval:
+                self._conn.commit()
+                self._dirty = 0
+                self._last_commit = time.monotonic()
+            return cur
@@ -0,0 +1,170 @@
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Record fields in export order (bookkeeping keys _fetchedAt and _source follow them)
+RECORD_KEYS = ("name", "profileImage", "coverImage", "images", "userId", "profileUrl", "userData")
+USER_DATA_KEYS = ("type", "text", "icon")
+
+_MISSING = object()
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _user_data_tuple(entry: Any) -> Tuple:
+    if isinstance(entry, dict):
+        return (_intern(entry.get("type")), entry.get("text"), _intern(entry.get("icon")))
+    return tuple(entry)
+
+class ProfileRecord:
+    """
+    Memory-compact export record, read like the dict build_result_record used to return.
+      - one __slots__ object instead of a per-record dict of repeated keys
+      - images as a tuple; userData as a tuple of (type, text, icon) tuples with the
+        enum-like type/icon strings interned, shown as dicts only while being read
+      - _source interned; _fetchedAt kept as an epoch float and formatted on read (records
+        rebuilt from their dict form keep the original string)
+      - `fields`: the projected keys (a shared, interned tuple), None for all of them
+      - anything else assigned (e.g. _change) goes to a small `extra` dict
+    Supports get/[]/in/keys/items/to_dict; ExportManager writes it without building a dict.
+    """
+
+    __slots__ = RECORD_KEYS + ("fetched_at", "source", "fields", "extra")
+
+    _field_sets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def __init__(
+        self,
+        values: Dict[str, Any],
+        source: str = "unknown",
+        fetched_at: Union[None, float, str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ):
+        self.fields = self._shared_fields(fields)
+        for key in RECORD_KEYS:
+            setattr(self, key, None)
+        for key in self.fields or RECORD_KEYS:
+            value = values.get(key)
+            if key == "images":
+                value = tuple(value or ())
+            elif key == "userData":
+                value = tuple(_user_data_tuple(e) for e in value or ())
+            setattr(self, key, value)
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self.source = _intern(source)
+        self.extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProfileRecord":
+        """Rebuilds a record from its to_dict() form (e.g. a checkpointed or exported record)."""
+        present = tuple(k for k in RECORD_KEYS if k in data)
+        record = cls(
+            data,
+            source=data.get("_source", "unknown"),
+            fetched_at=data.get("_fetchedAt"),
+            fields=None if len(present) == len(RECORD_KEYS) else present,
+        )
+        for key, value in data.items():
+            if key not in RECORD_KEYS and key not in ("_fetchedAt", "_source"):
+                record[key] = value
+        return record
+
+    # -------------------- mapping interface --------------------
+
+    def keys(self) -> List[str]:
+        return [k for k, _v in self.items()]
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in self.fields or RECORD_KEYS:
+            yield key, self._value(key)
+        yield "_fetchedAt", self.fetched_at_iso
+        yield "_source", self.source
+        if self.extra:
+            yield from self.extra.items()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in RECORD_KEYS and (self.fields is None or key in self.fields):
+            setattr(self, key, value)
+        elif key == "_source":
+            self.source = _intern(value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ProfileRecord):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ProfileRecord({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: (list(v) if isinstance(v, tuple) else v) for k, v in self.items()}
+
+    def copy(self) -> "ProfileRecord":
+        clone = object.__new__(ProfileRecord)
+        for slot in ProfileRecord.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        clone.extra = dict(self.extra) if self.extra else None
+        return clone
+
+    def project(self, fields: Iterable[str]) -> "ProfileRecord":
+        """A copy limited to `fields`, record keys in the order given; extra keys are kept if listed."""
+        fields = list(fields)
+        wanted = set(fields)
+        clone = self.copy()
+        clone.fields = self._shared_fields(k for k in fields if k in RECORD_KEYS and k in self)
+        if clone.extra:
+            clone.extra = {k: v for k, v in clone.extra.items() if k in wanted} or None
+        return clone
+
+    @property
+    def fetched_at_iso(self) -> str:
+        if isinstance(self.fetched_at, str):
+            return self.fetched_at
+        return datetime.utcfromtimestamp(self.fetched_at).isoformat() + "Z"
+
+    # -------------------- helpers --------------------
+
+    @classmethod
+    def _shared_fields(cls, fields: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+        # Every record of a run shares one tuple object for its projection
+        if fields is None:
+            return None
+        key = tuple(k for k in fields if k in RECORD_KEYS)
+        return cls._field_sets.setdefault(key, key)
+
+    def _value(self, key: str) -> Any:
+        value = getattr(self, key)
+        if key == "userData":
+            return tuple(dict(zip(USER_DATA_KEYS, entry)) for entry in value)
+        return value
+
+    def _lookup(self, key: str) -> Any:
+        if key in RECORD_KEYS:
+            return self._value(key) if self.fields is None or key in self.fields else _MISSING
+        if key == "_fetchedAt":
+            return self.fetched_at_iso
+        if key == "_source":
+            return self.source
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        return _MISSING
@@ -0,0 +1,53 @@
+import glob
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from outputs.sharded_sink import COMPRESSED_SUFFIXES, open_shard
+
+# Formats a shard output can be merged from (CSV flattens lists, so it can't be read back losslessly)
+MERGE_FORMATS = ("jsonl", "json")
+
+def expand_paths(patterns: Iterable[str]) -> List[str]:
+    """Shell-style globs and plain paths -> sorted, de-duplicated file list."""
+    paths: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        paths.extend(p for p in matches if p not in paths)
+    return paths
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of one shard output file: JSON Lines, or a JSON array as written by the exporter (optionally .gz/.zst)."""
+    name = path.lower()
+    for suffix in COMPRESSED_SUFFIXES.values():
+        name = name[:-len(suffix)] if name.endswith(suffix) else name
+    ext = os.path.splitext(name)[1].lstrip(".")
+    if ext in ("jsonl", "ndjson"):
+        with open_shard(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif ext == "json":
+        with open_shard(path) as f:
+            yield from json.load(f)
+    else:
+        raise ValueError(f"Cannot merge '{path}'; supported formats: {', '.join(MERGE_FORMATS)}")
+
+def merge_records(
+    paths: Iterable[str],
+    keys: Callable[[Dict[str, Any]], Iterable[str]],
+    seen: Any,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streams the records of every shard output, in file order, dropping records that
+    share any dedup key with one already yielded. Shards split inputs, not profiles, so
+    the same profile can still surface on two nodes (e.g. via a name search on one and
+    its URL on another).
+      - keys(record): every dedup key of a record (dedup key plus canonical aliases)
+      - seen: a key set whose add() returns True for new keys (e.g. a DedupIndex)
+    """
+    for path in paths:
+        for record in read_records(path):
+            fresh = [seen.add(k) for k in dict.fromkeys(keys(record))]
+            if all(fresh):
+                yield record
@@ -0,0 +1,216 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from extractors.lazy_import import lazy_import
+from telemetry.metrics import METRICS
+
+COMPRESSIONS = ("gzip", "zstd")
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+COPY_CHUNK = 1024 * 1024
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def check_compression(compression: Optional[str]) -> None:
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'; expected one of {', '.join(COMPRESSIONS)}.")
+    if compression == "zstd" and lazy_import("zstandard") is None:
+        raise ValueError("zstd compression requires the zstandard package.")
+
+def compress_file(path: str, compression: str, level: Optional[int] = None) -> str:
+    """Compresses `path` to <path>.gz / <path>.zst, removes the original and returns the new path."""
+    check_compression(compression)
+    out = path + COMPRESSED_SUFFIXES[compression]
+    with open(path, "rb") as src:
+        if compression == "gzip":
+            with gzip.open(out, "wb", compresslevel=6 if level is None else level) as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK)
+        else:
+            with open(out, "wb") as raw:
+                lazy_import("zstandard").ZstdCompressor(level=3 if level is None else level).copy_stream(src, raw)
+    os.remove(path)
+    return out
+
+def open_shard(path: str):
+    """Opens an output file for reading as text, decompressing .gz / .zst shards on the fly."""
+    if path.lower().endswith(COMPRESSED_SUFFIXES["gzip"]):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.lower().endswith(COMPRESSED_SUFFIXES["zstd"]):
+        check_compression("zstd")
+        return lazy_import("zstandard").open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+class ShardManifest:
+    """
+    <base_name>.shards.json next to the shards: one entry per finished shard (format,
+    index, path, records, bytes, rawBytes, sha256 of the file as written). It is rewritten
+    atomically each time a shard lands, so loaders can ingest shards while the run is
+    still going. "complete" becomes true when the export is closed after a finished run.
+    """
+
+    def __init__(self, path: str, base_name: str, compression: Optional[str]):
+        self.path = path
+        self.base_name = base_name
+        self.compression = compression
+        self.shards: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._write(complete=False)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.shards.append(entry)
+            self._write(complete=False)
+
+    def close(self, complete: bool = True) -> str:
+        with self._lock:
+            self._write(complete=complete)
+        return self.path
+
+    # -------------------- helpers --------------------
+
+    def _write(self, complete: bool) -> None:
+        doc = {
+            "baseName": self.base_name,
+            "updatedAt": datetime.utcnow().isoformat() + "Z",
+            "complete": complete,
+            "compression": self.compression,
+            "shards": sorted(self.shards, key=lambda s: (s["format"], s["index"])),
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        os.replace(tmp, self.path)
+
+class ShardedSink:
+    """
+    Record-at-a-time writer for one format that splits its output into shard files
+    <base_name>.part-00000.<fmt>, part-00001, ... opened by `open_writer(filename)`:
+      - a shard is finished after `max_records` records or once it holds `max_bytes`
+        bytes, whichever comes first (None: no limit)
+      - every shard is a complete document of its format (JSON array, CSV with header, XML root)
+      - finished shards are compressed and checksummed on `executor` while the next one
+        is written; past `max_pending` unfinished shards, writing waits for the oldest
+      - each shard is added to `manifest` once it is final
+    Offers the StreamWriter interface (write/write_many/close, count, format_name, path).
+    """
+
+    def __init__(
+        self,
+        open_writer: Callable[[str], Any],
+        base_name: str,
+        fmt: str,
+        manifest: ShardManifest,
+        executor: ThreadPoolExecutor,
+        max_records: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        compression: Optional[str] = None,
+        max_pending: int = 4,
+    ):
+        check_compression(compression)
+        self._open_writer = open_writer
+        self.base_name = base_name
+        self.format_name = fmt
+        self.manifest = manifest
+        self.path = manifest.path
+        self.executor = executor
+        self.max_records = int(max_records) if max_records else None
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.compression = compression
+        self.max_pending = max(1, int(max_pending))
+        self.count = 0
+        self.shards = 0
+        self._writer = None
+        self._pending: Deque[Future] = deque()
+        self._closed = False
+
+    def write(self, item: Dict[str, Any]) -> None:
+        if self._writer is None:
+            self._writer = self._open_writer(f"{self.base_name}.part-{self.shards:05d}.{self.format_name}")
+        self._writer.write(item)
+        self.count += 1
+        if (self.max_records and self._writer.count >= self.max_records) or (
+            self.max_bytes and self._writer.bytes_written() >= self.max_bytes
+        ):
+            self._finish_shard()
+
+    def write_many(self, items) -> None:
+        for it in items:
+            self.write(it)
+
+    def close(self) -> str:
+        """Finishes the last shard and waits until every shard of this sink is in the manifest."""
+        if not self._closed:
+            self._closed = True
+            if self._writer is not None or self.shards == 0:
+                # A run without records still gets one (empty) shard per format
+                if self._writer is None:
+                    self._writer = self._open_writer(f"{self.base_name}.part-{self.shards:05d}.{self.format_name}")
+                self._finish_shard()
+            while self._pending:
+                self._pending.popleft().result()
+        return self.path
+
+    def __enter__(self) -> "ShardedSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -------------------- helpers --------------------
+
+    def _finish_shard(self) -> None:
+        writer, self._writer = self._writer, None
+        path = writer.close()
+        index = self.shards
+        self.shards += 1
+        self._pending.append(self.executor.submit(self._seal, path, index, writer.count))
+        METRICS.set_gauge("shards_pending", len(self._pending), labels={"format": self.format_name})
+        # Backpressure: don't let finished-but-uncompressed shards pile up on disk
+        while len(self._pending) > self.max_pending or (self._pending and self._pending[0].done()):
+            self._pending.popleft().result()
+
+    def _seal(self, path: str, index: int, records: int) -> Dict[str, Any]:
+        raw_bytes = os.path.getsize(path)
+        if self.compression:
+            with METRICS.timer("shard_compress_seconds", labels={"compression": self.compression}):
+                path = compress_file(path, self.compression)
+        entry = {
+            "format": self.format_name,
+            "index": index,
+            "path": os.path.basename(path),
+            "records": records,
+            "bytes": os.path.getsize(path),
+            "rawBytes": raw_bytes,
+            "sha256": file_sha256(path),
+        }
+        self.manifest.add(entry)
+        METRICS.inc("shards_written_total", labels={"format": self.format_name})
+        return entry
+
+class ShardedExport:
+    """The ShardedSinks of one run (one per format), their manifest and the shared compression pool."""
+
+    def __init__(self, sinks: List[ShardedSink], manifest: ShardManifest, executor: ThreadPoolExecutor):
+        self.sinks = sinks
+        self.manifest = manifest
+        self.executor = executor
+
+    def close(self, complete: bool = True) -> str:
+        try:
+            for sink in self.sinks:
+                sink.close()
+        finally:
+            self.executor.shutdown(wait=True)
+        return self.manifest.close(complete=complete)
@@ -0,0 +1,302 @@
+import json
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from extractors.facebook_parser import FacebookParser, normalize_fields
+from extractors.parse_pool import ParsePool
+from extractors.profile_matcher import ProfileMatcher
+from outputs.export_manager import STREAM_FORMATS, ExportManager
+from outputs.records import ProfileRecord
+from telemetry.metrics import METRICS
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+    "xml": "application/xml",
+}
+
+class MicroBatcher:
+    """
+    Gathers parse jobs from concurrent request threads into micro-batches for one warm
+    ParsePool. A batch goes out once `max_batch` jobs are waiting, or `max_wait` seconds
+    after the first of them arrived. Jobs that arrive while a batch is being parsed make
+    up the next one. Only the batcher's own thread touches the pool.
+    """
+
+    def __init__(self, pool: ParsePool, max_batch: int = 32, max_wait: float = 0.005):
+        self.pool = pool
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self._queue: List[Tuple[str, Optional[str], Future]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="parse-batcher", daemon=True)
+
+    def start(self) -> "MicroBatcher":
+        self._thread.start()
+        return self
+
+    def submit(self, html: str, base_url: Optional[str] = None) -> Future:
+        """Queues one document; the future resolves to the parsed dict or raises ParseError."""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed.")
+            self._queue.append((html, base_url, future))
+            self._cond.notify()
+        return future
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    # -------------------- helpers --------------------
+
+    def _next_batch(self) -> List[Tuple[str, Optional[str], Future]]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return  # closed and drained
+            METRICS.observe("serve_batch_size", len(batch))
+            for html, base_url, future in batch:
+                self.pool.submit(html, base_url, future)
+            try:
+                for future, record, err in self.pool.drain():
+                    if err is not None:
+                        future.set_exception(err)
+                    else:
+                        future.set_result(record)
+            except Exception as e:  # pragma: no cover
+                for _html, _url, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+class ApiServer:
+    """
+    Local HTTP/JSON API over a warm parser, matcher and parse pool, for callers that
+    make many small enrichment calls and can't afford a process start per call:
+      - POST /parse   {"html", "url"?} | {"url"} | {"items": [those]}, "fields"?
+                      -> {"records": [...]}; an item that fails carries {"error"} instead
+      - POST /search  {"name", "limit"?} | {"names": [...], "limit"?} -> {"results": [[...], ...]}
+      - POST /export  {"records": [...], "format": json|jsonl|csv|xml, "fields"?} -> the document
+      - GET  /health  and  GET /metrics (Prometheus text)
+    Bad requests get 400 with {"error"}. URL-only items are synthesized by `parser` when
+    offline; online, they are fetched concurrently on a pool of `fetch_workers` threads
+    shared by all requests, and each page goes to the batcher as soon as it arrives.
+    HTML is parsed by the batcher's warm pool.
+    """
+
+    def __init__(
+        self,
+        parser: FacebookParser,
+        matcher: ProfileMatcher,
+        batcher: MicroBatcher,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        timeout: float = 60.0,
+        fetch_workers: int = 8,
+    ):
+        self.parser = parser
+        self.matcher = matcher
+        self.batcher = batcher
+        self.timeout = timeout
+        self.started = time.time()
+        self._fetcher = ThreadPoolExecutor(max_workers=max(1, int(fetch_workers)), thread_name_prefix="api-fetch")
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self.host, self.port = self._httpd.server_address[:2]
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def start(self) -> "ApiServer":
+        """Serves from a background thread (serve_forever() blocks the caller instead)."""
+        threading.Thread(target=self._httpd.serve_forever, name="api-http", daemon=True).start()
+        return self
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._fetcher.shutdown(wait=True, cancel_futures=True)
+
+    # -------------------- endpoints --------------------
+
+    def parse(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        fields = normalize_fields(body.get("fields"))
+        items = body["items"] if "items" in body else [body]
+        if not isinstance(items, list):
+            raise ValueError('"items" must be a list.')
+        # Submit everything first, so one request's items share micro-batches
+        pending = [self._start_item(item) for item in items]
+        return {"records": [self._finish_item(p, fields) for p in pending]}
+
+    def search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        limit = int(body.get("limit", 3))
+        if "names" in body:
+            return {"results": [self.matcher.search_profiles_by_name(str(n), limit=limit) for n in body["names"]]}
+        if not body.get("name"):
+            raise ValueError('"name" or "names" is required.')
+        return {"results": [self.matcher.search_profiles_by_name(str(body["name"]), limit=limit)]}
+
+    def export(self, body: Dict[str, Any]) -> Tuple[str, bytes]:
+        fmt = str(body.get("format", "json")).lower()
+        if fmt not in STREAM_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'; expected one of {', '.join(STREAM_FORMATS)}.")
+        records = body.get("records")
+        if not isinstance(records, list):
+            raise ValueError('"records" must be a list.')
+        with tempfile.TemporaryDirectory(prefix="api-export-") as tmp:
+            exporter = ExportManager(tmp, fields=normalize_fields(body.get("fields")))
+            with exporter.open_writer(fmt, f"export.{fmt}") as writer:
+                writer.write_many(records)
+            with open(writer.path, "rb") as f:
+                return CONTENT_TYPES[fmt], f.read()
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "uptimeSeconds": round(time.time() - self.started, 3),
+            "online": self.parser.online,
+            "parseWorkers": self.batcher.pool.workers,
+        }
+
+    # -------------------- helpers --------------------
+
+    def _start_item(self, item: Any) -> Tuple[str, Any]:
+        # (source, future or finished record or error) for one parse item
+        if not isinstance(item, dict):
+            return "error", ValueError("Each item must be an object.")
+        url = item.get("url")
+        if item.get("html") is not None:
+            return "embeddedHtml", self.batcher.submit(str(item["html"]), url)
+        if not url:
+            return "error", ValueError('Each item needs "html" or "url".')
+        try:
+            if not self.parser.online:
+                return "profileUrl", self.parser.parse_profile_from_url(url)
+            return "profileUrl", self._fetch_and_parse(url)
+        except Exception as e:
+            return "error", e
+
+    def _fetch_and_parse(self, url: str) -> Future:
+        # Fetch on the shared pool, then hand the page to the batcher; the request thread only waits
+        parsed: Future = Future()
+
+        def fetched(fetch: Future) -> None:
+            try:
+                _chain(self.batcher.submit(fetch.result(), url), parsed)
+            except Exception as e:
+                parsed.set_exception(e)
+
+        self._fetcher.submit(self.parser.fetch_html, url).add_done_callback(fetched)
+        return parsed
+
+    def _finish_item(self, pending: Tuple[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+        source, value = pending
+        try:
+            if isinstance(value, Exception):
+                raise value
+            parsed = value.result(self.timeout) if isinstance(value, Future) else value
+        except Exception as e:
+            METRICS.inc("errors_total", labels={"stage": "api"})
+            return {"error": f"{type(e).__name__}: {e}"}
+        return ProfileRecord(parsed, source=source, fields=fields).to_dict()
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path.startswith("/health"):
+                    self._respond(200, api.health())
+                elif self.path.startswith("/metrics"):
+                    self._send(200, "text/plain; version=0.0.4", METRICS.to_prometheus().encode("utf-8"))
+                else:
+                    self._respond(404, {"error": f"Unknown path {self.path}"})
+
+            def do_POST(self):
+                start = time.perf_counter()
+                endpoint = self.path.split("?")[0].strip("/")
+                status = 200
+                try:
+                    body = self._read_json()
+                    if endpoint == "parse":
+                        self._respond(200, api.parse(body))
+                    elif endpoint == "search":
+                        self._respond(200, api.search(body))
+                    elif endpoint == "export":
+                        self._send(200, *api.export(body))
+                    else:
+                        status = 404
+                        self._respond(404, {"error": f"Unknown path {self.path}"})
+                except (ValueError, KeyError, TypeError) as e:
+                    status = 400
+                    self._respond(400, {"error": str(e)})
+                except Exception as e:
+                    status = 500
+                    logging.exception("API %s failed", self.path)
+                    self._respond(500, {"error": f"{type(e).__name__}: {e}"})
+                METRICS.inc("api_requests_total", labels={"endpoint": endpoint, "status": str(status)})
+                METRICS.observe("api_seconds", time.perf_counter() - start, labels={"endpoint": endpoint})
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY_BYTES:
+                    self.close_connection = True  # the unread body can't be skipped
+                    raise ValueError(f"Request body over {MAX_BODY_BYTES} bytes.")
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(body, dict):
+                    raise ValueError("Request body must be a JSON object.")
+                return body
+
+            def _respond(self, status: int, payload: Dict[str, Any]) -> None:
+                self._send(status, "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+            def _send(self, status: int, content_type: str, body: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def _chain(source: Future, target: Future) -> None:
+    """Resolves `target` with the outcome of `source` once it is done."""
+    def copy(done: Future) -> None:
+        err = done.exception()
+        if err is not None:
+            target.set_exception(err)
+        else:
+            target.set_result(done.result())
+    source.add_done_callback(copy)
@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from http.server import ThreadingHTTPServer
+
+# Seconds; suits both sub-millisecond parses and multi-second fetches
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style, plus count/sum/max."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound if bound != float("inf") else self.max
+        return self.max
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms keyed by name and labels.
+    The pipeline modules record into the process-wide `METRICS`; main.py decides whether
+    and where it is reported (JSON file and/or Prometheus text endpoint).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, labels: Optional[Dict[str, str]] = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable view; counters also get a per-second rate over the process lifetime."""
+        with self._lock:
+            elapsed = max(1e-9, time.time() - self.started)
+            out: Dict = {"timestamp": time.time(), "uptimeSeconds": elapsed, "counters": [], "gauges": [], "histograms": []}
+            for name, series in sorted(self._counters.items()):
+                for key, value in series.items():
+                    out["counters"].append({"name": name, "labels": dict(key), "value": value, "perSecond": value / elapsed})
+            for name, series in sorted(self._gauges.items()):
+                for key, value in series.items():
+                    out["gauges"].append({"name": name, "labels": dict(key), "value": value})
+            for name, series in sorted(self._histograms.items()):
+                for key, h in series.items():
+                    out["histograms"].append({
+                        "name": name,
+                        "labels": dict(key),
+                        "count": h.count,
+                        "sum": h.sum,
+                        "max": h.max,
+                        "mean": h.sum / h.count if h.count else None,
+                        "p50": h.quantile(0.5),
+                        "p90": h.quantile(0.9),
+                        "p99": h.quantile(0.99),
+                        "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], h.counts)),
+                    })
+            return out
+
+    def to_prometheus(self, prefix: str = "fbscraper_") -> str:
+        lines: List[str] = []
+
+        def fmt(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = key + extra
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{escape_label_value(v)}"' for k, v in pairs) + "}"
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {prefix}{name} counter")
+                lines.extend(f"{prefix}{name}{fmt(k)} {v}" for k, v in series.items())
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {prefix}{name} gauge")
+                lines.extend(f"{prefix}{name}{fmt(k)} {v}" for k, v in series.items())
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for k, h in series.items():
+                    cumulative = 0
+                    for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{prefix}{name}_bucket{fmt(k, (('le', le),))} {cumulative}")
+                    lines.append(f"{prefix}{name}_sum{fmt(k)} {h.sum}")
+                    lines.append(f"{prefix}{name}_count{fmt(k)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+def escape_label_value(value: str) -> str:
+    """Label value for the Prometheus text format: backslash, double quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+METRICS = MetricsRegistry()
+
+class MetricsReporter:
+    """
+    Periodically writes METRICS snapshots as JSON to `path` (atomically replaced), and/or
+    serves the Prometheus text format on http://127.0.0.1:`port`/metrics.
+    """
+
+    def __init__(self, registry: MetricsRegistry = METRICS, path: Optional[str] = None, interval: float = 10.0, port: Optional[int] = None):
+        self.registry = registry
+        self.path = path
+        self.interval = max(0.1, float(interval))
+        self.port = port
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._httpd: Optional["ThreadingHTTPServer"] = None
+
+    def start(self) -> "MetricsReporter":
+        if self.path:
+            self._thread = threading.Thread(target=self._loop, name="metrics-writer", daemon=True)
+            self._thread.start()
+        if self.port is not None:
+            # Imported here: http.server is only needed when serving, not by every CLI run
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = registry.to_prometheus().encode("utf-8")
+                    self.send_response(200 if self.path.startswith("/metrics") else 404)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._httpd = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+            threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.path:
+            self.write()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def write(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.registry.snapshot(), f, indent=2)
+        os.replace(tmp, self.path)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
@@ -0,0 +1,39 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tracemalloc
+from typing import Any, Callable
+
+def run_profiled(fn: Callable[[], Any], out_dir: str, top: int = 50) -> Any:
+    """
+    Runs fn under cProfile and tracemalloc, then writes to `out_dir`:
+      - profile.pstats   raw cProfile data (load with pstats or snakeviz)
+      - profile.txt      top `top` functions by cumulative time
+      - memory.txt       peak traced memory and the top `top` allocation sites
+    Reports are written even if fn raises.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    tracemalloc.start(25)
+    profiler.enable()
+    try:
+        return fn()
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profiler.dump_stats(os.path.join(out_dir, "profile.pstats"))
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+        with open(os.path.join(out_dir, "profile.txt"), "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+
+        with open(os.path.join(out_dir, "memory.txt"), "w", encoding="utf-8") as f:
+            f.write(f"current: {current / 1024 / 1024:.1f} MiB\npeak: {peak / 1024 / 1024:.1f} MiB\n\n")
+            for stat in snapshot.statistics("lineno")[:top]:
+                f.write(f"{stat}\n")
+        logging.info("Profiling reports written to %s (peak traced memory %.1f MiB)", out_dir, peak / 1024 / 1024)
@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.request import Request, urlopen
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.facebook_parser import FacebookParser  # noqa: E402
+from extractors.parse_pool import ParsePool  # noqa: E402
+from extractors.profile_matcher import ProfileMatcher  # noqa: E402
+from service.api_server import ApiServer, MicroBatcher  # noqa: E402
+
+HTML = '<html><head><meta property="og:title" content="Jane Doe"></head><body><li>Works at Example</li></body></html>'
+
+class RecordingPool:
+    """ParsePool stand-in that records the size of every batch it drains."""
+
+    def __init__(self):
+        self.workers = 0
+        self.batches = []
+        self._pending = []
+
+    def submit(self, html, base_url, tag):
+        self._pending.append((tag, {"name": html}))
+
+    def drain(self):
+        self.batches.append(len(self._pending))
+        time.sleep(0.05)
+        pending, self._pending = self._pending, []
+        for tag, record in pending:
+            yield tag, record, None
+
+class SlowOnlineParser(FacebookParser):
+    """Online parser whose fetches take 0.2 s each, without touching the network."""
+
+    def __init__(self):
+        super().__init__(online=True, engine="lxml")
+
+    def fetch_html(self, url):
+        time.sleep(0.2)
+        if url.endswith("/missing"):
+            raise IOError("404 Not Found")
+        return HTML.replace("Jane Doe", url.rsplit("/", 1)[-1])
+
+def _post(server, path, payload):
+    req = Request(f"http://{server.host}:{server.port}{path}", data=json.dumps(payload).encode("utf-8"), method="POST")
+    with urlopen(req, timeout=10) as resp:
+        return resp.status, resp.headers["Content-Type"], resp.read()
+
+def test_micro_batches_concurrent_submissions():
+    pool = RecordingPool()
+    batcher = MicroBatcher(pool, max_batch=8, max_wait=0.1).start()
+    try:
+        results = [None] * 20
+        def call(i):
+            results[i] = batcher.submit(f"doc {i}").result(5)
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        batcher.close()
+    assert results == [{"name": f"doc {i}"} for i in range(20)]
+    assert sum(pool.batches) == 20 and max(pool.batches) == 8 and len(pool.batches) <= 4
+
+def test_parse_search_and_export_endpoints():
+    pool = ParsePool(workers=0, engine="lxml", inline_below=0)
+    batcher = MicroBatcher(pool, max_wait=0.001).start()
+    server = ApiServer(FacebookParser(online=False), ProfileMatcher(online=False), batcher, port=0).start()
+    try:
+        status, _ctype, body = _post(server, "/parse", {
+            "items": [{"html": HTML, "url": "https://www.facebook.com/profile.php?id=7"}, {"url": "https://www.facebook.com/zuck"}, {}],
+            "fields": ["name", "userId", "userData"],
+        })
+        records = json.loads(body)["records"]
+        assert status == 200 and records[0]["name"] == "Jane Doe" and records[0]["userId"] == "7"
+        assert records[0]["userData"][0]["type"] == "work" and "images" not in records[0]
+        assert records[1]["_source"] == "profileUrl" and "error" in records[2]
+
+        _status, _ctype, body = _post(server, "/search", {"name": "Ada Lovelace", "limit": 2})
+        assert len(json.loads(body)["results"][0]) == 2
+
+        _status, ctype, body = _post(server, "/export", {"records": records[:2], "format": "csv", "fields": ["name"]})
+        assert ctype == "text/csv" and body.decode("utf-8").splitlines()[0] == "name,_fetchedAt,_source"
+
+        try:
+            _post(server, "/export", {"records": [], "format": "yaml"})
+            assert False, "expected HTTP 400"
+        except Exception as e:
+            assert getattr(e, "code", None) == 400
+    finally:
+        server.close()
+        batcher.close()
+
+def test_url_items_are_fetched_concurrently():
+    batcher = MicroBatcher(ParsePool(workers=0, engine="lxml", inline_below=0), max_wait=0.001).start()
+    server = ApiServer(SlowOnlineParser(), ProfileMatcher(online=False), batcher, port=0, fetch_workers=8).start()
+    try:
+        urls = [f"https://www.facebook.com/user{i}" for i in range(6)] + ["https://www.facebook.com/missing"]
+        start = time.perf_counter()
+        _status, _ctype, body = _post(server, "/parse", {"items": [{"url": u} for u in urls], "fields": ["name"]})
+        # Seven 0.2 s fetches one after another would take 1.4 s
+        assert time.perf_counter() - start < 0.8
+        records = json.loads(body)["records"]
+        assert [r.get("name") for r in records[:6]] == [f"user{i}" for i in range(6)]
+        assert "404" in records[6]["error"]
+    finally:
+        server.close()
+        batcher.close()
+
+def test_cli_startup_skips_heavy_imports():
+    code = "import main, sys; print(sorted(m for m in ('bs4', 'lxml', 'requests', 'numpy') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors import bulk_matcher  # noqa: E402
+from extractors.bulk_matcher import MatchIndex, read_crm_rows  # noqa: E402
+from telemetry.metrics import METRICS  # noqa: E402
+
+FIRST = ["John", "Jane", "Ada", "Mark", "Zoë", "Maria", "Ahmed", "Olga", "Pierre", "Wei"]
+LAST = ["Smith", "Doe", "Lovelace", "Garcia", "Khan", "Petrova", "Dubois", "O'Brien", "Nakamura", "Silva"]
+EMPLOYERS = ["Acme", "Globex", "Initech", "Umbrella", "Hooli"]
+
+def _profiles():
+    out = []
+    for i in range(600):
+        out.append({
+            "name": f"{FIRST[i % 10]} {LAST[(i // 10) % 10]}{'' if i < 100 else i}",
+            "userId": str(1000 + i),
+            "profileUrl": f"https://www.facebook.com/profile.php?id={1000 + i}",
+            "userData": [{"type": "work", "text": f"Works at {EMPLOYERS[i % 5]} Corp", "icon": None}],
+        })
+    return out
+
+def test_fuzzy_name_employer_and_id_matches():
+    index = MatchIndex()
+    index.add_many(_profiles())
+    # "Zoë O'Brien" is profile 74, at Hooli; a typo and the missing accent still find her first
+    best = index.match({"name": "Zoe OBrian", "employer": "Hooli"}, k=3)
+    assert index.profiles[best[0]["profile"]]["name"] == "Zoë O'Brien"
+    assert best[0]["affiliationScore"] == 0.5 and best[0]["score"] > best[1]["score"]
+    (top,) = index.match({"name": "Ada Smith", "employer": "Initech Corp"}, k=1)
+    assert top["score"] == 1.0 and index.profiles[top["profile"]]["userId"] == "1002"
+    by_id = index.match({"name": "Someone Else", "profileUrl": "https://m.facebook.com/profile.php?id=1005&ref=x"}, k=1)
+    assert by_id[0]["idMatch"] and index.profiles[by_id[0]["profile"]]["userId"] == "1005"
+    assert index.match({"name": "Qqq Xxx"}, k=3, min_score=0.5) == []
+    # Non-ASCII vanity URLs are distinct profiles, not one shared id key
+    index.add({"name": "Алексей Иванов", "profileUrl": "https://www.facebook.com/Алексей.Иванов"})
+    assert not any(m["idMatch"] for m in index.match({"name": "Zhang Wei", "profileUrl": "https://facebook.com/张伟"}, k=3))
+    (vanity,) = index.match({"name": "A. Ivanov", "profileUrl": "https://m.facebook.com/алексей.иванов/"}, k=1)
+    assert vanity["idMatch"] and index.profiles[vanity["profile"]]["name"] == "Алексей Иванов"
+
+def test_blocking_scores_a_fraction_of_the_profiles():
+    index = MatchIndex(max_block=50, max_candidates=40)
+    index.add_many(_profiles())
+    METRICS.reset()
+    for name in ("John Smith", "Maria Khan", "Pierre Silva"):
+        assert index.match({"name": name}, k=1)[0]["nameScore"] == 1.0
+    scored = [c["value"] for c in METRICS.snapshot()["counters"] if c["name"] == "match_candidates_total"]
+    assert scored and scored[0] <= 3 * 40 < 3 * len(index)
+
+@pytest.mark.skipif(bulk_matcher.np is None, reason="numpy not installed")
+def test_vectorized_and_python_scoring_agree(tmp_path):
+    crm = tmp_path / "crm.csv"
+    crm.write_text(
+        "id,name,employer,userId\n"
+        + "".join(f"c{i},{FIRST[i % 10]} {LAST[(i * 7) % 10]}x,{EMPLOYERS[i % 4]},\n" for i in range(60))
+        + ",Wei Nakamura,,1042\n",
+        encoding="utf-8",
+    )
+    fast, slow = MatchIndex(max_block=30, vectorized=True), MatchIndex(max_block=30, vectorized=False)
+    for index in (fast, slow):
+        index.add_many(_profiles())
+    rows = list(read_crm_rows(str(crm)))
+    assert rows[-1]["id"] == "61" and rows[0]["userId"] is None
+    for row in rows:
+        assert fast.match(row, k=5, min_score=0.2) == slow.match(row, k=5, min_score=0.2)
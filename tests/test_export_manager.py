@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from main import build_arg_parser, merge, parse_formats  # noqa: E402
+from outputs.export_manager import ExportManager, StreamWriter  # noqa: E402
+
+ITEMS = [
+    {
+        "name": "Jane Doe",
+        "profileUrl": "https://www.facebook.com/jane.doe",
+        "userId": "1",
+        "images": ["https://example.com/a.jpg"],
+        "userData": [{"type": "work", "text": "Works at <Example> & Co", "icon": None}],
+        "_source": "profileUrl",
+    },
+    {"name": "Ünïcode", "profileUrl": None, "userId": "2", "images": [], "userData": [], "_source": "nameSearch"},
+]
+
+def test_streaming_writers_match_batch_exports(tmp_path):
+    exporter = ExportManager(str(tmp_path))
+    exporter.export_json(ITEMS, "batch.json")
+    exporter.export_xml(ITEMS, "batch.xml", root_tag="users", item_tag="user")
+    with exporter.open_writer("json", "stream.json") as w:
+        w.write_many(ITEMS)
+    with exporter.open_writer("xml", "stream.xml", root_tag="users", item_tag="user") as w:
+        w.write_many(ITEMS)
+    for ext in ("json", "xml"):
+        assert (tmp_path / f"stream.{ext}").read_text(encoding="utf-8") == (tmp_path / f"batch.{ext}").read_text(encoding="utf-8")
+
+    with exporter.open_writer("json", "empty.json"):
+        pass
+    assert json.loads((tmp_path / "empty.json").read_text(encoding="utf-8")) == []
+
+def test_jsonl_and_fixed_schema_csv(tmp_path):
+    exporter = ExportManager(str(tmp_path))
+    path = exporter.export_jsonl(ITEMS, "out.jsonl")
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == ITEMS
+
+    with exporter.open_writer("csv", "out.csv") as w:
+        w.write_many(ITEMS + [{"name": "Extra", "unknownKey": "dropped"}])
+        assert w.count == 3
+    lines = (tmp_path / "out.csv").read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "name,profileUrl,userId,profileImage,coverImage,images,userData,_fetchedAt,_source"
+    assert len(lines) == 4 and "dropped" not in lines[3]
+
+def test_field_projection(tmp_path):
+    exporter = ExportManager(str(tmp_path), fields=["userId", "name"])
+    with exporter.open_writer("csv", "out.csv") as w:
+        w.write_many(ITEMS)
+    assert (tmp_path / "out.csv").read_text(encoding="utf-8").splitlines()[0] == "name,userId,_fetchedAt,_source"
+    path = exporter.export_jsonl(ITEMS, "out.jsonl")
+    with open(path, encoding="utf-8") as f:
+        assert json.loads(f.readline()) == {"name": "Jane Doe", "userId": "1", "_source": "profileUrl"}
+
+def test_format_names_are_case_insensitive_and_unknown_ones_rejected(tmp_path):
+    assert parse_formats("JSONL, Csv,jsonl") == ["jsonl", "csv"]
+    for bad in ("jsonl,yaml", " , "):
+        with pytest.raises(ValueError):
+            parse_formats(bad)
+    shard = tmp_path / "shard.jsonl"
+    shard.write_text("".join(json.dumps(item) + "\n" for item in ITEMS), encoding="utf-8")
+    args = build_arg_parser().parse_args(["--merge", str(shard), "--output-dir", str(tmp_path / "out"), "--formats", "JSONL"])
+    assert merge(args) == 2 and len(list((tmp_path / "out").glob("*.jsonl"))) == 1
+
+def test_merge_keeps_records_projected_without_key_fields(tmp_path):
+    # A run with --fields name,images has neither profileUrl nor userId to dedup on
+    shard = tmp_path / "shard.jsonl"
+    records = [{"name": f"User {i}", "images": [], "_fetchedAt": str(i)} for i in range(5)]
+    shard.write_text("".join(json.dumps(r) + "\n" for r in records + records[:2]), encoding="utf-8")
+    args = build_arg_parser().parse_args(["--merge", str(shard), "--output-dir", str(tmp_path / "out"), "--formats", "jsonl"])
+    assert merge(args) == 5
+
+def test_stream_writer_subclasses_must_implement_write_item(tmp_path):
+    class NoItems(StreamWriter):
+        pass
+
+    with pytest.raises(TypeError):
+        NoItems(str(tmp_path / "x.out"))
+    assert not (tmp_path / "x.out").exists()
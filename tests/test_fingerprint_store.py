@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from main import build_arg_parser, run  # noqa: E402
+from outputs.export_manager import ExportManager  # noqa: E402
+from outputs.fingerprint_store import CHANGED, DELETED, NEW, UNCHANGED, FingerprintStore, html_hash  # noqa: E402
+
+def test_changes_across_runs(tmp_path):
+    db = str(tmp_path / "fp.sqlite3")
+    jane = {"name": "Jane", "userId": "1", "_fetchedAt": "t1"}
+    bob = {"name": "Bob", "userId": "2", "_fetchedAt": "t1"}
+
+    first = FingerprintStore(db, run_id="r1")
+    for key, record in (("id:1", jane), ("id:2", bob)):
+        assert first.change_of(key, record) == NEW
+        first.update(key, record, page_key=key, page_hash=html_hash(f"<html>{key}</html>"))
+    assert list(first.deleted()) == []
+    first.close()
+
+    second = FingerprintStore(db, run_id="r2")
+    # Same page bytes: the stored record is reused without parsing
+    key, stored = second.unchanged_record("id:1", html_hash("<html>id:1</html>"))
+    assert key == "id:1" and stored["name"] == "Jane"
+    assert second.unchanged_record("id:1", html_hash("<html>edited</html>")) is None
+    # Bookkeeping keys don't count as changes; content does
+    assert second.change_of("id:1", dict(jane, _fetchedAt="t2")) == UNCHANGED
+    assert second.change_of("id:1", dict(jane, name="Jane Doe")) == CHANGED
+    second.update("id:1", dict(jane, name="Jane Doe"))
+    assert [key for key, _record in second.deleted()] == ["id:2"]
+    assert second.forget_deleted() == 1
+    second.close()
+
+def test_delta_export_writes_changes_and_manifest(tmp_path):
+    exporter = ExportManager(str(tmp_path))
+    delta = exporter.open_delta("run", ["jsonl", "csv"], run_id="r2")
+    delta.write({"name": "Jane", "userId": "1"}, CHANGED)
+    delta.write({"name": "Same", "userId": "3"}, UNCHANGED)
+    delta.write({"name": "Bob", "userId": "2"}, DELETED)
+    delta.close()
+
+    with open(tmp_path / "run.delta.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["_change"] for line in f] == [CHANGED, DELETED]
+    assert (tmp_path / "run.delta.csv").read_text(encoding="utf-8").splitlines()[0].endswith(",_change")
+    manifest = json.loads((tmp_path / "run.manifest.json").read_text(encoding="utf-8"))
+    assert manifest["counts"] == {"new": 0, "changed": 1, "deleted": 1, "unchanged": 1}
+    assert {f["path"]: f["records"] for f in manifest["files"]} == {"run.delta.jsonl": 2, "run.delta.csv": 2}
+
+def test_reused_records_keep_their_key_under_a_field_projection(tmp_path):
+    # Unchanged embedded pages reuse their stored record, which lacks profileUrl/userId
+    # with --fields name; the key it is compared under must not change
+    inputs = tmp_path / "inputs.ndjson"
+    inputs.write_text("".join(
+        json.dumps({"html": f'<html><head><meta property="og:title" content="User {i}"/></head></html>',
+                    "baseUrl": f"https://www.facebook.com/profile.php?id={i}"}) + "\n"
+        for i in range(3)
+    ), encoding="utf-8")
+    db = str(tmp_path / "fp.sqlite3")
+    for out in ("first", "second"):
+        run(build_arg_parser().parse_args(
+            ["--inputs", str(inputs), "--output-dir", str(tmp_path / out), "--incremental", "--fingerprint-db", db, "--fields", "name"]
+        ))
+    (manifest,) = (tmp_path / "second").glob("*.manifest.json")
+    assert json.loads(manifest.read_text(encoding="utf-8"))["counts"] == {"new": 0, "changed": 0, "deleted": 0, "unchanged": 3}
+
+def test_mixed_inputs_for_one_profile_resolve_in_input_order(tmp_path):
+    # Each profile arrives twice: as a URL to fetch and, right after it, as an embedded page
+    inputs = tmp_path / "inputs.ndjson"
+    lines = []
+    for i in range(4):
+        url = f"https://www.facebook.com/profile.php?id={i}"
+        lines.append(json.dumps(url))
+        lines.append(json.dumps({"html": f'<html><head><meta property="og:title" content="Embedded {i}"/></head></html>', "baseUrl": url}))
+    inputs.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    db = str(tmp_path / "fp.sqlite3")
+    for out in ("first", "second", "third"):
+        run(build_arg_parser().parse_args(
+            ["--inputs", str(inputs), "--output-dir", str(tmp_path / out), "--incremental", "--fingerprint-db", db,
+             "--concurrency", "2", "--formats", "jsonl"]
+        ))
+    for out, counts in (("first", {"new": 4}), ("third", {"unchanged": 4})):
+        (manifest,) = (tmp_path / out).glob("*.manifest.json")
+        assert json.loads(manifest.read_text(encoding="utf-8"))["counts"] == {"new": 0, "changed": 0, "deleted": 0, "unchanged": 0, **counts}
+    (delta,) = (tmp_path / "first").glob("*.delta.jsonl")
+    records = [json.loads(line) for line in delta.read_text(encoding="utf-8").splitlines()]
+    assert [(r["userId"], r["_source"]) for r in records] == [(str(i), "profileUrl") for i in range(4)]
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.facebook_parser import FacebookParser  # noqa: E402
+from extractors.http_cache import ResponseCache, normalize_url  # noqa: E402
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+def test_normalize_url_ignores_noise():
+    assert normalize_url("HTTPS://WWW.Facebook.com/jane.doe/#about") == normalize_url("https://www.facebook.com/jane.doe")
+    assert normalize_url("https://x.com/p?b=2&a=1") == normalize_url("https://x.com/p?a=1&b=2")
+
+def test_cache_round_trip_and_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=250)
+    cache.put("https://x.com/a", "a" * 100, etag='"1"')
+    time.sleep(0.01)
+    cache.put("https://x.com/b", "b" * 100)
+    time.sleep(0.01)
+    assert cache.get("https://x.com/a")["body"] == "a" * 100  # refreshes a's recency
+    cache.put("https://x.com/c", "c" * 100)
+    assert cache.get("https://x.com/b") is None
+    assert cache.get("https://x.com/a")["etag"] == '"1"'
+    # Entries survive a restart
+    assert ResponseCache(str(tmp_path), max_bytes=250).get("https://x.com/c")["body"] == "c" * 100
+
+def test_parser_revalidates_stale_entries(tmp_path):
+    html = '<html><head><meta property="og:title" content="Jane"/></head></html>'
+    cache = ResponseCache(str(tmp_path), ttl=0)
+    session = FakeSession([
+        FakeResponse(200, html, {"ETag": '"v1"'}),
+        FakeResponse(304),
+    ])
+    parser = FacebookParser(online=True, session=session, cache=cache)
+    assert parser.parse_profile_from_url("https://www.facebook.com/jane")["name"] == "Jane"
+    assert parser.parse_profile_from_url("https://www.facebook.com/jane/")["name"] == "Jane"
+    assert session.calls[1]["If-None-Match"] == '"v1"'
+
+    fresh = FacebookParser(online=True, session=FakeSession([]), cache=ResponseCache(str(tmp_path), ttl=3600))
+    assert fresh.parse_profile_from_url("https://www.facebook.com/jane")["name"] == "Jane"
+
+class FakeStreamResponse(FakeResponse):
+    def __init__(self, text, chunk_size=64):
+        super().__init__(200, text)
+        self.encoding = "utf-8"
+        self.chunks_read = 0
+        self.closed = False
+        self._chunk = chunk_size
+
+    def iter_content(self, chunk_size=None):
+        for i in range(0, len(self.content), self._chunk):
+            self.chunks_read += 1
+            yield self.content[i:i + self._chunk]
+
+    def close(self):
+        self.closed = True
+
+class FakeStreamSession(FakeSession):
+    def get(self, url, headers=None, timeout=None, stream=False):
+        assert stream
+        return super().get(url, headers=headers, timeout=timeout)
+
+def test_streamed_fetch_closes_early_and_caps_bytes(tmp_path):
+    html = (
+        '<html><head><meta property="og:title" content="Jané"/>'
+        '<meta property="og:url" content="https://www.facebook.com/profile.php?id=42"/></head>'
+        "<body>" + "<p>filler</p>" * 5000 + "</body></html>"
+    )
+    resp = FakeStreamResponse(html, chunk_size=136)  # </head> is bytes 133-140
+    cache = ResponseCache(str(tmp_path))
+    parser = FacebookParser(online=True, session=FakeStreamSession([resp]), cache=cache, fields="name,profileUrl", stream=True)
+    head_parses = []
+    parse_head_only = parser._parse_head_only
+    parser._parse_head_only = lambda head, url: head_parses.append(head) or parse_head_only(head, url)
+    rec = parser.parse_profile_from_url("https://www.facebook.com/profile.php?id=42")
+    assert rec == {"name": "Jané", "profileUrl": "https://www.facebook.com/profile.php?id=42"}
+    # </head> straddles two chunks; the head is found anyway and parsed once, while fetching
+    assert len(head_parses) == 1 and head_parses[0].endswith("</head>")
+    assert resp.closed and resp.chunks_read < 5
+    assert cache.get("https://www.facebook.com/profile.php?id=42") is None  # partial bodies are not cached
+
+    capped = FakeStreamResponse(html)
+    parser = FacebookParser(online=True, session=FakeStreamSession([capped]), max_bytes=1024)
+    assert parser.parse_profile_from_url("https://www.facebook.com/x")["name"] == "Jané"
+    assert capped.chunks_read == 1024 // 64
+
+    whole = FakeStreamResponse(html)
+    parser = FacebookParser(online=True, session=FakeStreamSession([whole]), cache=cache, stream=True)
+    assert parser.fetch_html("https://www.facebook.com/y") == html
+    assert cache.get("https://www.facebook.com/y")["body"] == html
@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import threading
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from inputs.input_loader import InputStream, prefetch  # noqa: E402
+
+def test_legacy_json_document_keeps_order_and_options():
+    stream = InputStream(os.path.join(ROOT, "data", "inputs.example.json"))
+    kinds = [kind for kind, _ in stream]
+    assert kinds == ["profileUrl", "profileUrl", "name", "name", "embeddedHtml"]
+    assert stream.options["perNameLimit"] == 2
+
+def test_ndjson_and_csv_are_classified(tmp_path):
+    nd = tmp_path / "in.ndjson"
+    nd.write_text("\n".join([
+        json.dumps("Ada Lovelace"),
+        json.dumps("https://www.facebook.com/zuck"),
+        json.dumps({"name": "Grace Hopper"}),
+        json.dumps({"html": "<html></html>", "baseUrl": "https://www.facebook.com/4"}),
+        json.dumps({"profileUrl": "m.facebook.com/ada"}),
+        "",
+    ]), encoding="utf-8")
+    items = list(InputStream(str(nd)))
+    assert [k for k, _ in items] == ["name", "profileUrl", "name", "embeddedHtml", "profileUrl"]
+    # Scheme-less URLs are fetchable (and exported) as https URLs
+    assert items[1][1] == "https://www.facebook.com/zuck" and items[4][1] == "https://m.facebook.com/ada"
+
+    cs = tmp_path / "in.csv"
+    cs.write_text("name\nAda Lovelace\n\nwww.facebook.com/profile.php?id=4\n", encoding="utf-8")
+    assert list(InputStream(str(cs))) == [("name", "Ada Lovelace"), ("profileUrl", "https://www.facebook.com/profile.php?id=4")]
+
+def test_prefetch_is_bounded_and_propagates_errors():
+    produced = []
+    gate = threading.Event()
+
+    def source():
+        for i in range(100):
+            produced.append(i)
+            yield i
+        gate.wait(1)
+        raise RuntimeError("bad input")
+
+    it = prefetch(source(), maxsize=5)
+    assert next(it) == 0
+    threading.Event().wait(0.05)
+    assert len(produced) <= 8  # the reader is held back by the bounded queue
+    gate.set()
+    rest = []
+    try:
+        for x in it:
+            rest.append(x)
+    except RuntimeError as e:
+        assert "bad input" in str(e)
+    else:
+        raise AssertionError("expected the reader error to surface")
+    assert rest == list(range(1, 100))
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import sys
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.profile_matcher import ProfileMatcher  # noqa: E402
+from main import build_arg_parser, iter_fetch_jobs, run  # noqa: E402
+from outputs.job_store import EXPORTED, JobStore  # noqa: E402
+
+ITEMS = [
+    ("profileUrl", "https://www.facebook.com/a"),
+    ("name", "Ada Lovelace"),
+    ("profileUrl", "https://www.facebook.com/b"),
+]
+
+def test_records_are_unique_per_key_and_survive_reopen(tmp_path):
+    db = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(db)
+    store.create_job("j1", {"inputs": "x"})
+    assert store.add_record("k1", {"name": "A"})
+    assert not store.add_record("k1", {"name": "A again"})
+    assert store.add_record("k2", {"name": "B"})
+    store.close()
+
+    store = JobStore(db)
+    assert store.load_job("j1") == {"inputs": "x"}
+    assert [r["name"] for r in store.iter_records(batch_size=1)] == ["A", "B"]
+    store.close()
+
+def test_resume_skips_finished_inputs_and_replays_candidates(tmp_path):
+    db = str(tmp_path / "jobs.sqlite3")
+    matcher = ProfileMatcher(online=False)
+    store = JobStore(db)
+    store.create_job("j1", {})
+    jobs = iter_fetch_jobs(iter(ITEMS), matcher, 2, lambda doc, task_id: None, store)
+    url, (source, task_id) = next(jobs)
+    store.set_state(task_id, EXPORTED)
+    url, (source, first_candidate) = next(jobs)  # the name was searched; one candidate handed out
+    assert source == "nameSearch"
+    store.set_state(first_candidate, EXPORTED)
+    store.close()  # simulated crash: the rest never ran
+
+    store = JobStore(db)
+    store.load_job("j1")
+    resumed = list(iter_fetch_jobs(iter(ITEMS), matcher, 2, lambda doc, task_id: None, store, resuming=True))
+    urls = [u for u, _ in resumed]
+    assert "https://www.facebook.com/a" not in urls
+    assert urls[-1] == "https://www.facebook.com/b"
+    assert [src for _, (src, _) in resumed] == ["nameSearch", "profileUrl"]
+    store.close()
+
+def test_back_to_back_runs_get_their_own_job_and_files(tmp_path):
+    args = build_arg_parser().parse_args(["--output-dir", str(tmp_path), "--formats", "jsonl"])
+    assert run(args) > 0 and run(args) > 0
+    with sqlite3.connect(str(tmp_path / "jobs.sqlite3")) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'done'").fetchone()[0] == 2
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".jsonl")]) == 2
@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.facebook_parser import FacebookParser  # noqa: E402
+from telemetry.metrics import METRICS, MetricsRegistry, MetricsReporter  # noqa: E402
+
+def test_registry_snapshot_and_prometheus_text():
+    reg = MetricsRegistry()
+    reg.inc("errors_total", labels={"stage": "fetch"})
+    reg.inc("errors_total", 2, labels={"stage": "fetch"})
+    reg.set_gauge("fetch_queue_depth", 7)
+    for v in (0.002, 0.02, 0.2, 2.0):
+        reg.observe("fetch_seconds", v)
+    snap = reg.snapshot()
+    assert snap["counters"][0]["value"] == 3
+    hist = snap["histograms"][0]
+    assert hist["count"] == 4 and hist["max"] == 2.0 and hist["p50"] == 0.025
+    text = reg.to_prometheus()
+    assert 'fbscraper_errors_total{stage="fetch"} 3' in text
+    assert 'fbscraper_fetch_seconds_bucket{le="+Inf"} 4' in text
+    assert "fbscraper_fetch_queue_depth 7" in text
+    # Label values are escaped per the exposition format (a host or error text can contain anything)
+    reg.inc("errors_total", labels={"stage": 'say "hi"\\n\nbye'})
+    assert 'fbscraper_errors_total{stage="say \\"hi\\"\\\\n\\nbye"} 1' in reg.to_prometheus()
+
+def test_parser_records_parse_time_and_reporter_writes_json(tmp_path):
+    METRICS.reset()
+    FacebookParser(engine="lxml").parse_profile_html("<html><head><title>x</title></head></html>")
+    path = str(tmp_path / "metrics.json")
+    MetricsReporter(METRICS, path=path, interval=60).start().stop()
+    with open(path, encoding="utf-8") as f:
+        snap = json.load(f)
+    parse = [h for h in snap["histograms"] if h["name"] == "parse_seconds"]
+    assert parse and parse[0]["labels"] == {"engine": "lxml"} and parse[0]["count"] == 1
@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import threading
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.facebook_parser import FacebookParser  # noqa: E402
+from extractors.parse_pool import ParseError, ParsePool, ReorderBuffer, _parse_batch  # noqa: E402
+from main import build_arg_parser, run  # noqa: E402
+from telemetry.metrics import METRICS  # noqa: E402
+
+def make_doc(i):
+    return (
+        f'<html><head><meta property="og:title" content="User {i}"/></head>'
+        f"<body><ul><li>Works at Company {i}</li></ul><img src='https://example.com/{i}.jpg'/></body></html>"
+    )
+
+def test_process_pool_matches_in_process_parse_and_keeps_order():
+    docs = [(make_doc(i), f"https://www.facebook.com/profile.php?id={i}") for i in range(40)]
+    expected = [FacebookParser(engine="lxml").parse_profile_html(html, base_url=url) for html, url in docs]
+    with ParsePool(workers=2, batch_size=4, ordered=True, inline_below=5) as pool:
+        out = []
+        for i, (html, url) in enumerate(docs):
+            pool.submit(html, url, i)
+            out.extend(pool.ready())
+        out.extend(pool.drain())
+    assert [tag for tag, _rec, _err in out] == list(range(40))
+    assert [rec for _tag, rec, _err in out] == expected
+
+def test_parse_errors_are_reported_per_document():
+    with ParsePool(workers=0) as pool:
+        pool.submit(123, None, "bad")
+        pool.submit(make_doc(1), None, "good")
+        results = {tag: (rec, err) for tag, rec, err in pool.drain()}
+    assert isinstance(results["bad"][1], ParseError)
+    assert results["good"][0]["name"] == "User 1"
+
+def test_workers_started_mid_run_do_not_inherit_held_locks():
+    # A fetch thread holding the metrics lock while the pool starts must not wedge the workers
+    held, release = threading.Event(), threading.Event()
+
+    def hold_metrics_lock():
+        with METRICS._lock:
+            held.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_metrics_lock)
+    holder.start()
+    held.wait()
+    pool = ParsePool(workers=2)
+    try:
+        pool._start_executor()
+        future = pool._executor.submit(_parse_batch, [(make_doc(1), None)])
+        release.set()
+        results = future.result(timeout=30)
+        assert results[0][0]["name"] == "User 1"
+    except TimeoutError:
+        # A wedged worker never exits on its own
+        for proc in pool._executor._processes.values():
+            proc.kill()
+        raise
+    finally:
+        release.set()
+        holder.join()
+        pool.close()
+
+def test_inflight_batches_are_bounded_and_reorder_buffer_restores_sequence():
+    with ParsePool(workers=2, batch_size=1, inline_below=0, max_inflight=2) as pool:
+        for i in range(12):
+            pool.submit(make_doc(i), None, i)
+            assert pool._busy_workers() <= 2
+        assert sorted(tag for tag, _rec, _err in pool.drain()) == list(range(12))
+    buffer = ReorderBuffer()
+    assert buffer.put(1, "b") == [] and buffer.put(2, "c") == [] and len(buffer) == 2
+    assert buffer.put(0, "a") == ["a", "b", "c"] and buffer.put(3, "d") == ["d"]
+
+def test_ordered_run_writes_records_in_input_order(tmp_path):
+    # Embedded documents are parsed without a fetch, so unordered they overtake earlier URLs
+    inputs = tmp_path / "inputs.ndjson"
+    lines = []
+    for i in range(30):
+        if i % 3 == 0:
+            lines.append(json.dumps({"html": make_doc(i), "baseUrl": f"https://www.facebook.com/profile.php?id={i}"}))
+        else:
+            lines.append(json.dumps(f"https://www.facebook.com/user.n{i}"))
+    inputs.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    out = tmp_path / "out"
+    run(build_arg_parser().parse_args(
+        ["--inputs", str(inputs), "--output-dir", str(out), "--formats", "jsonl", "--parse-workers", "2", "--ordered"]
+    ))
+    (path,) = out.glob("*.jsonl")
+    names = [json.loads(line)["name"] for line in path.read_text(encoding="utf-8").splitlines()]
+    assert names == [f"User {i}" if i % 3 == 0 else f"User N{i}" for i in range(30)]
@@ -1,12 +1,15 @@
 import os
 import sys
 
+import pytest
+
 # Ensure src/ is importable when running pytest from repo root
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 SRC = os.path.join(ROOT, "src")
 if SRC not in sys.path:
     sys.path.insert(0, SRC)
 
+from extractors import facebook_parser  # noqa: E402
 from extractors.facebook_parser import FacebookParser  # noqa: E402
 
 def test_parse_profile_html_minimal():
@@ -47,4 +50,65 @@ def test_parse_profile_from_url_offline_synth():
     assert rec["name"].lower().startswith("ada")
     assert rec["profileUrl"] == url
     assert rec["userId"] is not None
-    assert isinstance(rec["images"], list) and len(rec["images"]) >= 3
\ No newline at end of file
+    assert isinstance(rec["images"], list) and len(rec["images"]) >= 3
+
+def test_lxml_engine_matches_bs4():
+    html = """
+    <html>
+      <head>
+        <title>Fallback Title</title>
+        <meta name="og:image" content=" https://example.com/p.jpg "/>
+        <meta property="og:url" content="https://www.facebook.com/jane.doe"/>
+      </head>
+      <body>
+        <div data-imgperflogname="profileCoverPhoto"><img src="https://example.com/cover.jpg"/></div>
+        <div><div><span>Works at</span> <b>Example Corp</b></div><div>Studied at Example College</div></div>
+        <!-- "entity_id":"1" -->
+        <ul><li>Studied at <!-- x -->MIT</li><li>Works <!-- c --> at Acme</li><li><?pi x?>Works at Initech</li></ul>
+        <div>Studied <![CDATA[Law <and> Art]]> at Example University</div>
+        <h1>Jane <!-- --> Doe</h1>
+        <!-- c -->{"entity_id":"777"}
+        <div data-x='{"entity_id":"777"}'>"entity_id":"888"</div>
+        <script>var s = {"entity_id": "888"};</script>
+        <img src="https://example.com/a.jpg"/><img src="https://example.com/a.jpg"/>
+        <img src="https://example.com/x.gif"/><img src="https://example.com/sprite.png"/>
+      </body>
+    </html>
+    """
+    bs4_rec = FacebookParser(engine="bs4").parse_profile_html(html)
+    lxml_rec = FacebookParser(engine="lxml").parse_profile_html(html)
+    assert lxml_rec == bs4_rec
+    assert lxml_rec["coverImage"] == "https://example.com/cover.jpg"
+    assert lxml_rec["userId"] == "777"
+    assert [d["text"] for d in lxml_rec["userData"]][-4:] == [
+        "Studied at MIT", "Works at Acme", "Works at Initech", "Studied Law <and> Art at Example University",
+    ]
+    assert FacebookParser(engine="lxml", fields="name").parse_profile_html(html.replace("<title>Fallback Title</title>", "")) == {"name": "JaneDoe"}
+    assert FacebookParser(engine="lxml").parse_profile_html("", base_url="https://www.facebook.com/4") == \
+        FacebookParser(engine="bs4").parse_profile_html("", base_url="https://www.facebook.com/4")
+
+def test_field_projection_matches_full_parse():
+    html = """
+    <html><head>
+      <meta property="og:title" content="Jane Doe"/>
+      <meta property="og:url" content="https://www.facebook.com/jane.doe"/>
+    </head><body>
+      <script>{"entity_id":"777"}</script>
+      <ul><li>Works at Example Corp</li></ul>
+      <img src="https://example.com/a.jpg"/>
+    </body></html>
+    """
+    for engine in ("bs4", "lxml"):
+        full = FacebookParser(engine=engine).parse_profile_html(html, base_url="https://www.facebook.com/jane.doe")
+        for fields in (["name"], ["name", "userId"], ["images", "userData"], "profileUrl,name"):
+            parser = FacebookParser(engine=engine, fields=fields)
+            rec = parser.parse_profile_html(html, base_url="https://www.facebook.com/jane.doe")
+            assert rec == {k: full[k] for k in parser.fields}
+    with pytest.raises(ValueError):
+        FacebookParser(fields="name,nope")
+
+def test_missing_bs4_is_reported_clearly(monkeypatch):
+    real = facebook_parser.lazy_import
+    monkeypatch.setattr(facebook_parser, "lazy_import", lambda name: None if name == "bs4" else real(name))
+    with pytest.raises(RuntimeError, match="bs4 not available"):
+        FacebookParser(engine="bs4").parse_profile_html("<html><body><h1>Ada</h1></body></html>")
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.rate_control import HostLimiter, RequestScheduler, parse_retry_after  # noqa: E402
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def make_scheduler(**kwargs):
+    sleeps = []
+    scheduler = RequestScheduler(initial_rate=100, max_rate=100, burst=10, sleep=sleeps.append, **kwargs)
+    return scheduler, sleeps
+
+def test_retry_after_and_backoff():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == 10.0
+    assert parse_retry_after("soon") is None
+
+    scheduler, sleeps = make_scheduler(max_retries=3)
+    responses = [FakeResponse(429, {"Retry-After": "0"}), FakeResponse(502), FakeResponse(200)]
+    resp = scheduler.request("https://www.facebook.com/a", lambda: responses.pop(0))
+    assert resp.status_code == 200 and len(sleeps) == 2
+    assert all(0 <= s <= 1.0 for s in sleeps)  # full jitter within base * 2^attempt
+    assert scheduler.limiter("https://www.facebook.com/b").rate < 51  # 429 halved the host's rate
+
+def test_retry_budget_is_shared_across_requests():
+    scheduler, sleeps = make_scheduler(max_retries=5, retry_budget=2)
+    assert scheduler.request("https://x.com/1", lambda: FakeResponse(503)).status_code == 503
+    assert len(sleeps) == 2
+    assert scheduler.request("https://x.com/2", lambda: FakeResponse(503)).status_code == 503
+    assert len(sleeps) == 2  # budget spent: no more retries anywhere
+    assert scheduler.request("https://x.com/3", lambda: FakeResponse(404)).status_code == 404
+
+def test_non_retryable_errors_release_the_host_slot():
+    scheduler, _sleeps = make_scheduler(max_concurrency=2)
+
+    def broken():
+        raise ValueError("Invalid URL")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            scheduler.request("https://www.facebook.com/a", broken)
+    assert scheduler.limiter("https://www.facebook.com/a").inflight == 0
+    # Would block forever in acquire() if the failed requests had leaked their slots
+    assert scheduler.request("https://www.facebook.com/b", lambda: FakeResponse(200)).status_code == 200
+
+def test_aimd_limit_and_retry_after_pause():
+    limiter = HostLimiter(
+        "x.com", initial_rate=1000, min_rate=1, max_rate=1000, rate_increase=1, burst=100,
+        initial_concurrency=2, max_concurrency=4, decrease_factor=0.5, latency_factor=3.0,
+    )
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(0.01)
+    assert limiter.limit == 4
+    limiter.acquire()
+    limiter.release(0.01, throttled=True, retry_after=0.2)
+    assert limiter.limit == 2
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+    limiter.release(0.01)
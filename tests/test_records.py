@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from outputs.export_manager import ExportManager  # noqa: E402
+from outputs.records import ProfileRecord  # noqa: E402
+
+PARSED = {
+    "name": "Jane \"JD\" Doe",
+    "profileImage": "https://example.com/p.jpg",
+    "images": ["https://example.com/p.jpg", "https://example.com/c.jpg"],
+    "userId": "1",
+    "profileUrl": "https://www.facebook.com/jane.doe",
+    "userData": [
+        {"type": "work", "text": "Works at <Example> & Co", "icon": None},
+        {"type": "location", "text": "Lives in Zürich\nSwitzerland", "icon": "https://example.com/i.png"},
+    ],
+    "_source": "profileUrl",
+}
+
+def test_reads_like_its_dict_and_round_trips():
+    rec = ProfileRecord(PARSED, source="profileUrl", fetched_at=0.0)
+    assert rec["name"] == PARSED["name"]
+    assert rec.get("coverImage") is None and "coverImage" in rec
+    assert rec["userData"][1] == PARSED["userData"][1]
+    assert rec["_fetchedAt"] == "1970-01-01T00:00:00Z"
+    rec["_change"] = "new"
+    data = rec.to_dict()
+    assert list(data) == ["name", "profileImage", "coverImage", "images", "userId", "profileUrl", "userData", "_fetchedAt", "_source", "_change"]
+    assert data["images"] == PARSED["images"]
+    assert ProfileRecord.from_dict(json.loads(json.dumps(data))) == rec
+    # The enum-like strings are shared between records
+    other = ProfileRecord(json.loads(json.dumps(PARSED)), source="profile" + "Url")
+    assert other.userData[0][0] is rec.userData[0][0] and other.source is rec.source
+
+def test_exports_match_dict_records(tmp_path):
+    recs = [ProfileRecord(PARSED, fetched_at=1.5), ProfileRecord({"name": "Ünïcode"}, source="nameSearch", fetched_at=2.0)]
+    exporter = ExportManager(str(tmp_path))
+    for fmt in ("json", "jsonl", "csv", "xml"):
+        with exporter.open_writer(fmt, f"slots.{fmt}") as w:
+            w.write_many(recs)
+        with exporter.open_writer(fmt, f"dicts.{fmt}") as w:
+            w.write_many(r.to_dict() for r in recs)
+        assert (tmp_path / f"slots.{fmt}").read_bytes() == (tmp_path / f"dicts.{fmt}").read_bytes()
+
+def test_projection(tmp_path):
+    rec = ProfileRecord(PARSED, fields=["name", "userId"])
+    assert rec.keys() == ["name", "userId", "_fetchedAt", "_source"]
+    assert "images" not in rec and rec.get("images") is None
+    assert ProfileRecord(PARSED, fields=("name", "userId")).fields is rec.fields
+
+    exporter = ExportManager(str(tmp_path), fields=["userId", "name"])
+    with exporter.open_writer("jsonl", "out.jsonl") as w:
+        w.write(ProfileRecord(PARSED))
+    line = json.loads((tmp_path / "out.jsonl").read_text(encoding="utf-8"))
+    assert list(line) == ["name", "userId", "_fetchedAt", "_source"]
@@ -0,0 +1,66 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+import pytest
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from outputs.export_manager import ExportManager  # noqa: E402
+from outputs.shard_merge import read_records  # noqa: E402
+
+def _records(n):
+    return [{"name": f"User {i}", "profileUrl": f"https://www.facebook.com/user{i}", "userId": str(i)} for i in range(n)]
+
+def _manifest(tmp_path):
+    with open(tmp_path / "out.shards.json", encoding="utf-8") as f:
+        return json.load(f)
+
+def test_rotates_by_record_count_and_compresses_shards(tmp_path):
+    sharded = ExportManager(str(tmp_path)).open_sharded("out", ["jsonl", "json", "csv"], max_records=4, compression="gzip")
+    for record in _records(10):
+        for sink in sharded.sinks:
+            sink.write(record)
+    sharded.close()
+
+    manifest = _manifest(tmp_path)
+    assert manifest["complete"] and manifest["compression"] == "gzip"
+    jsonl = [s for s in manifest["shards"] if s["format"] == "jsonl"]
+    assert [s["records"] for s in jsonl] == [4, 4, 2] and [s["index"] for s in jsonl] == [0, 1, 2]
+    assert len(manifest["shards"]) == 9 and not any(f.endswith((".jsonl", ".json", ".csv")) for f in os.listdir(tmp_path) if "part-" in f)
+    for shard in manifest["shards"]:
+        path = tmp_path / shard["path"]
+        assert hashlib.sha256(path.read_bytes()).hexdigest() == shard["sha256"]
+        assert shard["bytes"] == path.stat().st_size and len(gzip.decompress(path.read_bytes())) == shard["rawBytes"]
+    # Each shard is a complete document that the merge/match readers accept as is
+    names = [r["name"] for s in manifest["shards"] if s["format"] != "csv" for r in read_records(str(tmp_path / s["path"]))]
+    assert names == 2 * [r["name"] for r in _records(10)]
+    assert gzip.decompress((tmp_path / "out.part-00002.csv.gz").read_bytes()).decode().startswith("name,profileUrl,userId")
+
+def test_rotates_by_size(tmp_path):
+    sharded = ExportManager(str(tmp_path)).open_sharded("out", ["jsonl"], max_bytes=64 * 1024)
+    sink = sharded.sinks[0]
+    sink.write_many(_records(3000))
+    sharded.close()
+    shards = _manifest(tmp_path)["shards"]
+    assert len(shards) > 2 and sum(s["records"] for s in shards) == sink.count == 3000
+    # A shard may run over the limit by at most one text buffer plus a record
+    assert all(s["rawBytes"] < 64 * 1024 + 16 * 1024 for s in shards)
+    assert all(s["bytes"] >= 64 * 1024 for s in shards[:-1])
+
+def test_empty_and_interrupted_runs(tmp_path):
+    exporter = ExportManager(str(tmp_path))
+    with pytest.raises(ValueError):
+        exporter.open_sharded("bad", ["jsonl"], compression="lz4")
+    sharded = exporter.open_sharded("out", ["json", "xml"], max_records=10)
+    assert _manifest(tmp_path)["shards"] == [] and not _manifest(tmp_path)["complete"]
+    sharded.close(complete=False)
+    manifest = _manifest(tmp_path)
+    assert not manifest["complete"] and [(s["format"], s["records"]) for s in manifest["shards"]] == [("json", 0), ("xml", 0)]
+    assert list(read_records(str(tmp_path / "out.part-00000.json"))) == []
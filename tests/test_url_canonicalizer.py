@@ -0,0 +1,53 @@
+import os
+import sys
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.dedup_index import DedupIndex  # noqa: E402
+from extractors.url_canonicalizer import canonicalize_profile_url, record_aliases  # noqa: E402
+
+def test_profile_url_variants_share_a_key():
+    vanity = {
+        "https://www.facebook.com/Mark.Zuckerberg",
+        "http://m.facebook.com/mark.zuckerberg/?ref=bookmarks",
+        "https://facebook.com/mark.zuckerberg/about#top",
+        "www.facebook.com/mark.zuckerberg/",
+        "https://de-de.facebook.com/mark.zuckerberg",
+    }
+    assert {canonicalize_profile_url(u) for u in vanity} == {
+        ("vanity:mark.zuckerberg", "https://www.facebook.com/mark.zuckerberg")
+    }
+    by_id = {
+        "https://www.facebook.com/profile.php?id=4",
+        "https://mbasic.facebook.com/profile.php?id=4&ref=xyz",
+        "https://www.fb.com/people/Mark-Zuckerberg/4/",
+    }
+    assert {canonicalize_profile_url(u)[0] for u in by_id} == {"id:4"}
+    assert canonicalize_profile_url("https://example.com/x/")[0].startswith("url:")
+
+def test_non_ascii_vanity_names_and_non_profile_paths():
+    assert canonicalize_profile_url("https://www.facebook.com/Алексей.Иванов")[0] == "vanity:алексей.иванов"
+    assert canonicalize_profile_url("https://m.facebook.com/%E5%BC%A0%E4%BC%9F/about")[0] == "vanity:张伟"
+    assert canonicalize_profile_url("https://www.facebook.com/张伟")[0] == "vanity:张伟"
+    assert canonicalize_profile_url("https://www.facebook.com/john_smith-99")[0] == "vanity:john_smith-99"
+    # Numeric ids outside profile.php?id= and /people/<name>/<id> don't name a profile
+    for url in ("https://www.facebook.com/groups/123456", "https://www.facebook.com/zuck/posts/10112"):
+        key, canonical = canonicalize_profile_url(url)
+        assert key.startswith("url:") and canonical == url
+
+def test_record_aliases_cover_id_and_url():
+    rec = {"userId": "4", "profileUrl": "https://m.facebook.com/zuck"}
+    assert record_aliases(rec) == ("id:4", "vanity:zuck")
+
+def test_dedup_index_spills_without_losing_keys(tmp_path):
+    for spill in ("sqlite", "bloom"):
+        index = DedupIndex(memory_budget=2000, spill=spill, directory=str(tmp_path), capacity=1000)
+        assert all(index.add(f"id:{i}") for i in range(500))
+        assert index.backend == spill
+        assert not index.add("id:7") and "id:499" in index
+        index.close()
+    assert not list(tmp_path.iterdir())  # the sqlite spill file is removed on close
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Ensure src/ is importable when running pytest from repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from extractors.profile_matcher import ProfileMatcher  # noqa: E402
+from extractors.utils_scroll import AsyncScrollPaginator, ScrollPaginator  # noqa: E402
+
+def test_pages_are_fetched_lazily_and_stop_early():
+    fetched = []
+
+    def fetch(i):
+        fetched.append(i)
+        return [f"u{i}a", f"u{i}b"]
+
+    pages = ScrollPaginator(fetch).iter_pages(100)
+    assert next(pages) == ["u0a", "u0b"]
+    pages.close()
+    assert fetched == [0]
+
+    # An empty page, or a page of only already-seen items, ends the scroll
+    data = {0: ["a", "b"], 1: ["b", "c"], 2: ["a", "c"], 3: ["d"]}
+    assert ScrollPaginator(lambda i: data[i]).collect_pages(4) == [["a", "b"], ["b", "c"]]
+    assert ScrollPaginator(lambda i: [] if i == 1 else [i]).collect_pages(5) == [[0]]
+
+def test_prefetch_runs_ahead_and_is_cancelled_when_consumer_stops():
+    lock = threading.Lock()
+    started = []
+
+    def fetch(i):
+        with lock:
+            started.append(i)
+        time.sleep(0.02)
+        return [i]
+
+    pages = ScrollPaginator(fetch, prefetch=2).iter_pages(50)
+    assert next(pages) == [0]
+    pages.close()
+    time.sleep(0.1)
+    assert set(started) <= {0, 1, 2, 3}
+
+def test_async_paginator_matches_sync_behaviour():
+    async def fetch(i):
+        await asyncio.sleep(0)
+        return [] if i == 3 else [i]
+
+    pages = asyncio.run(AsyncScrollPaginator(fetch, prefetch=2).collect_pages(10))
+    assert pages == [[0], [1], [2]]
+
+def test_online_search_stops_fetching_at_limit():
+    matcher = ProfileMatcher(online=True, scrolls_amount=50, prefetch_pages=0)
+    calls = []
+    original = matcher._online_fetch_stub
+    matcher._online_fetch_stub = lambda name, page: calls.append(page) or original(name, page)
+    assert len(matcher.search_profiles_by_name("Ada Lovelace", limit=4)) == 4
+    assert calls == [0, 1]